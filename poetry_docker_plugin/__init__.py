@@ -1,18 +1,23 @@
-from .docker_builder import (
-    Arg,
-    Cmd,
-    Copy,
-    DockerFile,
-    EntryPoint,
-    Env,
-    Expose,
-    From,
-    Labels,
-    Run,
-    User,
-    Volume,
-    WorkDir,
-)
+# Types
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    # Project
+    from .docker_builder import (
+        Arg,
+        Cmd,
+        Copy,
+        DockerFile,
+        EntryPoint,
+        Env,
+        Expose,
+        From,
+        Labels,
+        Run,
+        User,
+        Volume,
+        WorkDir,
+    )
 
 __all__ = [
     "Arg",
@@ -29,3 +34,13 @@ __all__ = [
     "Run",
     "DockerFile",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # instructions are imported lazily, keeping the plugin activation by poetry lightweight
+    if name in __all__:
+        # Project
+        from . import docker_builder
+
+        return getattr(docker_builder, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,89 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import TYPE_CHECKING
+
+# Standard Library
+import glob
+import hashlib
+import os
+
+if TYPE_CHECKING:
+    # Standard Library
+    from pathlib import Path
+
+    # Dependencies
+    from poetry.poetry import Poetry
+
+
+def package_files(poetry: Poetry) -> list[Path]:
+    """
+    :param poetry: the poetry project
+    :return: the resolved paths of every file included in the source distribution of the project
+    """
+    # Dependencies
+    from poetry.core.masonry.builders.sdist import SdistBuilder
+
+    return sorted({file.path.resolve() for file in SdistBuilder(poetry).find_files_to_add()})
+
+
+def package_fingerprint(poetry: Poetry) -> str:
+    """
+    Computes a fingerprint of all inputs of the project distribution, that is, every file
+    included in the source distribution, the pyproject.toml and the lock file.
+
+    :param poetry: the poetry project
+    :return: the hex digest of the distribution inputs
+    """
+    project_root = poetry.pyproject_path.resolve().parent
+    paths = set(package_files(poetry))
+    paths.add(poetry.pyproject_path.resolve())
+    if poetry.locker.is_locked():
+        paths.add(poetry.locker.lock.resolve())
+
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(f"{os.path.relpath(path, project_root)}\0".encode())
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def is_up_to_date(fingerprint: str, fingerprint_path: str, artifacts: list[str]) -> bool:
+    """
+    Checks whether the distribution artifacts exist and were built from the given inputs.
+
+    :param fingerprint: the fingerprint of the distribution inputs
+    :param fingerprint_path: path to the fingerprint recorded by the last packaging
+    :param artifacts: path patterns of the distribution artifacts, each one should match at least one file
+    :return: true if the artifacts are up to date, false otherwise
+    """
+    if not all(glob.glob(artifact) for artifact in artifacts) or not os.path.exists(fingerprint_path):
+        return False
+
+    with open(fingerprint_path) as fingerprint_file:
+        return fingerprint_file.read().strip() == fingerprint
+
+
+def find_wheel(distribution_name: str, path: str = "dist") -> str | None:
+    """
+    Searches for a platform independent wheel of the distribution, that is, a wheel that
+    can be installed in images of any platform.
+
+    :param distribution_name: the distribution name and version, e.g. 'demo_app-1.0.0'
+    :param path: the directory holding the distribution artifacts
+    :return: the wheel file name, or none if no platform independent wheel exists
+    """
+    wheels = sorted(glob.glob(os.path.join(path, f"{distribution_name}-*-none-any.whl")))
+    return os.path.basename(wheels[-1]) if wheels else None
+
+
+def find_wheels(path: str = "dist") -> list[str]:
+    """
+    :param path: the directory holding the distribution artifacts
+    :return: the file names of every wheel, which determine the package installed into images
+    """
+    return sorted(os.path.basename(wheel) for wheel in glob.glob(os.path.join(path, "*.whl")))
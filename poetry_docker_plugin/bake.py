@@ -0,0 +1,89 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import Any
+
+# Standard Library
+import json
+import os
+import re
+
+# Project
+from .docker_builder import BuildCache, ImageBuild
+
+BAKE_FILE_PATH = "dist/docker-bake.json"
+
+# the bake target of the image declared directly in [tool.docker]
+DEFAULT_TARGET = "image"
+
+
+def target_name(config_name: str | None) -> str:
+    """
+    :param config_name: the name of the image in [tool.docker], or none for a single image
+    :return: a valid bake target name for the image
+    """
+    return DEFAULT_TARGET if config_name is None else re.sub(r"[^\w-]", "-", config_name)
+
+
+def bake_target(image_build: ImageBuild, context: str | None = None) -> dict[str, Any]:
+    """
+    Creates the bake target of an image build, holding its tags, platforms, build arguments,
+    cache settings and secrets.
+
+    https://docs.docker.com/build/bake/reference/#target
+
+    :param image_build: a planned image build
+    :param context: path to the build context, by default the 'dist' directory (optional)
+    :return: the bake target
+    """
+    target: dict[str, Any] = {
+        "context": os.path.abspath("dist") if context is None else context,
+        "dockerfile": os.path.abspath(os.path.join("dist", image_build.dockerfile_name)),
+        "tags": image_build.image_tags,
+    }
+    if image_build.platform:
+        target["platforms"] = image_build.platform
+    if image_build.arguments:
+        target["args"] = image_build.arguments
+    if image_build.secrets:
+        target["secret"] = image_build.secrets
+    target.update((BuildCache() if image_build.cache is None else image_build.cache).attributes())
+
+    # similar to build commands, images of a single platform are loaded into docker, even when
+    # pushed, so that later builds find them, while images of multiple platforms are only kept
+    # in the build cache, unless pushed or exported
+    outputs = []
+    if image_build.push:
+        outputs.append("type=registry")
+    if len(image_build.platform) < 2:
+        outputs.append("type=docker")
+    if image_build.oci_path is not None:
+        outputs.append(f"type=oci,dest={os.path.abspath(image_build.oci_path)}")
+    if outputs:
+        target["output"] = outputs
+    return target
+
+
+def write_bake_file(targets: dict[str, dict[str, Any]], path: str = BAKE_FILE_PATH) -> None:
+    """
+    Writes a bake file that builds all given targets as part of the default group.
+
+    https://docs.docker.com/build/bake/reference/
+
+    :param targets: a dictionary of bake target names and their attributes
+    :param path: path to the bake file
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    definition = {"group": {"default": {"targets": list(targets)}}, "target": targets}
+    with open(path, "w") as bake_file:
+        json.dump(definition, bake_file, indent=2)
+
+
+class BakeCommand:
+    def __init__(self, bake_file: str = BAKE_FILE_PATH, targets: list[str] | None = None) -> None:
+        self.bake_file = bake_file
+        self.targets = [] if targets is None else targets
+
+    def command(self) -> list[str]:
+        return ["docker", "buildx", "bake", "--file", self.bake_file, *self.targets]
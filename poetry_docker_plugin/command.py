@@ -0,0 +1,1013 @@
+# Types
+from typing import Any, NoReturn, Optional, Union
+
+# Standard Library
+import cProfile
+import json
+import os
+import re
+import sys
+import time
+
+# Dependencies
+from cleo.formatters.formatter import Formatter
+from cleo.helpers import option
+from poetry.console.commands.command import Command
+from poetry.factory import Factory
+
+from .artifacts import find_wheel, find_wheels, is_up_to_date, package_files, package_fingerprint
+from .bake import BAKE_FILE_PATH, BakeCommand, bake_target, target_name, write_bake_file
+from .context import source_files, write_ignore_file
+from .docker_builder import (
+    COMMANDS,
+    BuildCache,
+    Cmd,
+    Copy,
+    DockerFile,
+    EntryPoint,
+    Env,
+    Expose,
+    From,
+    ImageBuild,
+    Labels,
+    Mount,
+    Run,
+    User,
+    Volume,
+    WorkDir,
+)
+from .engine import DockerEngine
+from .export import ArchiveExport
+from .graph import dependent_images, image_dependencies, run_graph, topological_order
+from .manifest import BuildManifest
+from .plan import BuildPlan, ImagePlan, plan_key
+from .requirements import export_requirements
+from .runner import CommandError, run_command
+from .templates import TemplateEngine, UndeclaredVariableError
+from .timing import Timings
+from .vcs import commit_sha as resolve_commit_sha
+from .vcs import is_dirty
+from .watch import PollingWatcher, changed_paths, snapshot
+
+# name of the build stage that builds wheels in multistage mode, and the path of the wheels
+BUILDER_STAGE = "builder"
+WHEELS_PATH = "/wheels"
+
+PACKAGE_FORMATS = ("sdist", "wheel")
+
+PIP_CACHE_PATH = "/root/.cache/pip"
+
+# official python images, e.g. 'python:3.11-slim-bookworm', given by their version and variant
+PYTHON_IMAGE = re.compile(r"^(?P<repository>(?:.+/)?python):(?P<version>\d+(?:\.\d+)*)(?:-(?P<variant>[\w.-]+))?$")
+
+# flow mount options and the corresponding mount parameters
+MOUNT_OPTIONS = {
+    "type": "mount_type",
+    "target": "target",
+    "source": "source",
+    "from": "from_stage",
+    "id": "mount_id",
+    "sharing": "sharing",
+}
+
+
+class DockerBuild(Command):
+    name = "docker"
+    description = "Builds docker image."
+
+    # list of command options
+    options = [
+        option(
+            long_name="dockerfile-only",
+            description="Creates Dockerfile, but does not build the image.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="build-only",
+            description="Builds only selected images.",
+            flag=False,
+            value_required=False,
+            multiple=True,
+        ),
+        option(
+            short_name="p",
+            long_name="platform",
+            description="Sets a target platform.",
+            flag=False,
+            value_required=False,
+            multiple=True,
+        ),
+        option(
+            long_name="exclude-package",
+            description="Does not install project package inside docker container.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="push",
+            description="Pushes the image to the registry.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            short_name="r",
+            long_name="var",
+            description="Declares a custom variable using the syntax 'name:value'. "
+            "Then, the variable can be used in the docker configuration using: @(name).",
+            flag=False,
+            value_required=False,
+            multiple=True,
+        ),
+        option(
+            short_name="a",
+            long_name="arg",
+            description="Declares a build argument using the syntax 'name:value'",
+            flag=False,
+            value_required=False,
+            multiple=True,
+        ),
+        option(
+            long_name="oci",
+            description="Exports each image as an OCI layout tarball to the 'dist' directory.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="export",
+            description="Exports each image as a compressed archive, loadable by 'docker load', to the 'dist' directory.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="export-compression",
+            description="Sets the compression of exported archives, one of 'gzip' or 'zstd'.",
+            flag=False,
+            value_required=True,
+            default="gzip",
+        ),
+        option(
+            long_name="secret",
+            description="Exposes a secret to RUN secret mounts using the syntax 'id=name,src=path'.",
+            flag=False,
+            value_required=False,
+            multiple=True,
+        ),
+        option(
+            long_name="cache",
+            description="Sets the layer cache mode of all images, one of 'none', 'local' or 'registry'.",
+            flag=False,
+            value_required=True,
+        ),
+        option(
+            short_name="j",
+            long_name="jobs",
+            description="Sets the number of images to build concurrently.",
+            flag=False,
+            value_required=True,
+            default="1",
+        ),
+        option(
+            long_name="push-jobs",
+            description="Sets the number of image tags to push concurrently.",
+            flag=False,
+            value_required=True,
+            default="4",
+        ),
+        option(
+            long_name="log",
+            description="Writes the output of docker commands of each image into 'dist/logs/<Dockerfile>.log'.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="timings",
+            description="Reports the time spent in each build phase and writes it into 'dist/timings.json'.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="profile",
+            description="Profiles the command and writes the statistics into 'dist/poetry-docker.pstats'.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="engine",
+            description="Builds and pushes images through the Docker Engine API socket, instead of the docker CLI.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="bake",
+            description="Builds all images using a single 'docker buildx bake' invocation.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="plan",
+            description="Prints the build plan of all images as JSON, without packaging the project or building them.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="watch",
+            description="Keeps running and rebuilds the images affected by changes of the project files.",
+            flag=True,
+            value_required=False,
+        ),
+        option(
+            long_name="force",
+            description="Plans and builds all images, even if their inputs have not changed since their last build.",
+            flag=True,
+            value_required=False,
+        ),
+    ]
+
+    def _write_line(self, line: str) -> None:
+        # when printing the plan, the standard output holds only the plan
+        if self.option("plan"):
+            self.io.write_error_line(line)
+        else:
+            self.io.write_line(line)
+
+    def info(self, message: str) -> None:
+        self._write_line(f"<info>[INFO]:</info> {message}")
+
+    def debug(self, message: str) -> None:
+        self._write_line(f"<debug>[DEBUG]:</debug> {message}")
+
+    def warning(self, message: str) -> None:
+        self._write_line(f"<warning>[WARN]:</warning> {message}")
+
+    def error(self, message: str) -> NoReturn:
+        self.io.write_error_line(f"<error>[ERROR]:</error> {message}")
+        raise RuntimeError(message)
+
+    def handle(self) -> int:
+        self._timings = Timings()
+        profiler = cProfile.Profile() if self.option("profile") else None
+        try:
+            if profiler is not None:
+                profiler.enable()
+            with self._timings.phase("total"):
+                return self._handle()
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs("dist", exist_ok=True)
+                profiler.dump_stats("dist/poetry-docker.pstats")
+                self.info("Profile statistics are located in 'dist/poetry-docker.pstats'.")
+            if self.option("timings"):
+                self.info("Timings:")
+                for line in self._timings.report():
+                    self._write_line(f"    {line}")
+                self._timings.write("dist/timings.json")
+                self.info("Timings report is located in 'dist/timings.json'.")
+
+    def _handle(self) -> int:
+        # try to retrieve commit SHA-256
+        with self._timings.phase("git"):
+            commit_sha = resolve_commit_sha()
+            if commit_sha is None:
+                self.warning("Invalid git repository or no commits found. Cannot retrieve commit SHA.")
+            else:
+                commit_sha = commit_sha[:7]
+                if is_dirty():
+                    self.warning(f"Working tree has unstaged changes, thus images do not match commit '{commit_sha}'.")
+
+        # talk to the docker daemon directly, falling back to the docker CLI if its socket is not reachable
+        self._docker_engine = DockerEngine.from_environment() if self.option("engine") else None
+        if self.option("engine") and (self._docker_engine is None or not self._docker_engine.ping()):
+            self.warning("Docker Engine API is not reachable over a unix socket, using the docker CLI instead.")
+            self._docker_engine = None
+
+        # the number of tags pushed concurrently, shared by all images
+        self._push_jobs = self._positive_integer("push-jobs")
+
+        # built images are saved into compressed archives, reusing layers compressed by previous exports
+        self._archive_export = None
+        if self.option("export"):
+            if len(self.option("platform")) > 1:
+                self.error(
+                    "Images of multiple platforms cannot be loaded into docker, thus they cannot be saved using "
+                    "'--export'. Consider using '--oci' instead."
+                )
+            try:
+                self._archive_export = ArchiveExport(self.option("export-compression"))
+            except RuntimeError as e:
+                self.error(str(e))
+
+        # warm state, reused across the builds of watch mode
+        self._build_plan: Optional[BuildPlan] = None
+        self._image_builds: dict[Optional[str], ImageBuild] = dict()
+        self._dependencies: dict[Optional[str], dict[str, Optional[str]]] = dict()
+
+        if self.option("watch"):
+            if self.option("plan"):
+                self.error("Options '--watch' and '--plan' cannot be used together.")
+            return self._watch(commit_sha)
+
+        return self._build(commit_sha)
+
+    def _build(self, commit_sha: Optional[str], changes: Optional[set[str]] = None) -> int:
+        # in watch mode, only images copying changed files, or files changed by packaging, are rebuilt
+        context_files = snapshot(self._context_files()) if changes is not None else dict()
+        plan = self._current_plan(commit_sha)
+
+        if self.option("plan"):
+            self.io.write_line(Formatter.escape(json.dumps(plan.to_dict(), indent=2)))
+            return 0
+
+        # create the docker files of all images, unless they are up to date with the plan
+        if plan is not self._build_plan:
+            self._build_plan = plan
+            self._image_builds, self._dependencies = self._image_builds_of(plan)
+        image_builds, dependencies = self._image_builds, self._dependencies
+
+        if self.option("dockerfile-only"):
+            return 0
+
+        graph = {name: set(bases.values()) for name, bases in dependencies.items()}
+        if changes is not None:
+            changes = changes | changed_paths(context_files, snapshot(self._context_files()))
+            copied = {image.name for image in plan.images if changes.intersection(self._context_files(image))}
+            affected = dependent_images(graph, copied)
+            if not affected:
+                self.info("Changes do not affect any image, skipping build.")
+                return 0
+            self.info(f"Changes affect image(s): {sorted(affected, key=str)}.")
+            image_builds = {name: image_build for name, image_build in image_builds.items() if name in affected}
+            dependencies = {name: bases for name, bases in dependencies.items() if name in affected}
+            graph = {name: bases & affected for name, bases in graph.items() if name in affected}
+
+        if self.option("platform"):
+            self.info(f"Building docker image for platforms: '{self.option('platform')}'.")
+
+        # written once, before any image is built, since images use 'dist' as build context when it cannot be staged
+        write_ignore_file()
+
+        if self.option("bake"):
+            with self._timings.phase("images"):
+                return self._bake(image_builds, dependencies)
+
+        jobs = self._positive_integer("jobs")
+        if self.option("profile") and jobs > 1:
+            # the profiler only records the calling thread, thus images are built in it, one at a time
+            self.info("Profiling builds images one at a time, ignoring '--jobs'.")
+            jobs = 1
+
+        if len(image_builds) > 1 and jobs > 1:
+            self.info(f"Building '{len(image_builds)}' images using '{min(jobs, len(image_builds))}' jobs.")
+
+        if len(self.option("platform")) > 1 and not self.option("push") and any(graph.values()):
+            self.warning(
+                "Images of multiple platforms are only kept in the build cache, thus images based on other images "
+                "of the project cannot use them unless they are pushed. Consider using '--bake' or '--push'."
+            )
+
+        with self._timings.phase("images"):
+            failures = run_graph(graph, lambda name: image_builds[name].run(), jobs)
+
+        for config_name, failure in failures.items():
+            prefix = "" if config_name is None else f"[{config_name}] "
+            self.io.write_error_line(f"<error>[ERROR]:</error> {prefix}{failure}")
+
+        return 1 if failures else 0
+
+    def _plan_key(self, commit_sha: Optional[str], packaged: bool) -> str:
+        # the plan of all images is cached, keyed on the project files, the options affecting it
+        # and the wheels of the project, since they determine the package installed into images
+        options = {
+            name: self.option(name)
+            for name in (
+                "build-only",
+                "platform",
+                "exclude-package",
+                "push",
+                "var",
+                "arg",
+                "secret",
+                "cache",
+                "oci",
+                "engine",
+            )
+        }
+        pyproject_path = self.poetry.pyproject_path
+        return plan_key(
+            [pyproject_path.as_posix(), pyproject_path.with_name("poetry.lock").as_posix()],
+            {
+                **options,
+                "packaged": packaged,
+                "sha": commit_sha,
+                "python": list(sys.version_info[:2]),
+                "wheels": find_wheels(),
+            },
+        )
+
+    def _current_plan(self, commit_sha: Optional[str]) -> BuildPlan:
+        packaged = not (self.option("exclude-package") or self.option("dockerfile-only") or self.option("plan"))
+        key = self._plan_key(commit_sha, packaged)
+
+        plan = None
+        if not self.option("force"):
+            plan = self._build_plan if self._build_plan is not None and self._build_plan.key == key else None
+            plan = BuildPlan.load(key) if plan is None else plan
+        if plan is not None:
+            if packaged and plan.package_mode:
+                with self._timings.phase("package"):
+                    self._package(plan.project_name, plan.project_version)
+            if packaged and not plan.is_complete():
+                plan = None
+            else:
+                self.info(f"Build plan is up to date, skipping planning of '{len(plan.images)}' image(s).")
+        if plan is None:
+            plan = self._plan(commit_sha, packaged)
+            # printing the plan leaves the project untouched
+            if not self.option("plan"):
+                plan.write()
+        return plan
+
+    def _image_builds_of(
+        self, plan: BuildPlan
+    ) -> tuple[dict[Optional[str], ImageBuild], dict[Optional[str], dict[str, Optional[str]]]]:
+        manifest = None if self.option("force") else BuildManifest()
+        image_builds: dict[Optional[str], ImageBuild] = dict()
+        for image_plan in plan.images:
+            image_builds[image_plan.name] = self._image_build(image_plan, manifest)
+
+        # images based on other images of the project are built after them, reusing the local image
+        dependencies = image_dependencies(image_builds)
+        try:
+            topological_order({name: set(bases.values()) for name, bases in dependencies.items()})
+        except RuntimeError as e:
+            self.error(str(e))
+        for name, bases in dependencies.items():
+            image_builds[name].bases = [image_builds[base] for base in bases.values()]
+            if bases:
+                prefix = "" if name is None else f"[{name}] "
+                self.info(f"{prefix}Based on images {sorted(bases)} of the project, building them first.")
+
+        return image_builds, dependencies
+
+    def _watch(self, commit_sha: Optional[str]) -> int:
+        status = self._build(commit_sha)
+        watcher = PollingWatcher()
+        pyproject_path = self.poetry.pyproject_path
+        project_files = {pyproject_path.as_posix(), pyproject_path.with_name("poetry.lock").as_posix()}
+        try:
+            while True:
+                watcher.watch(self._watched_paths())
+                self.info("Watching for changes, press Ctrl+C to stop.")
+                changes = watcher.wait()
+                if not changes:
+                    return status
+                self.info(f"Detected changes in {sorted(os.path.relpath(path) for path in changes)}.")
+                try:
+                    if changes & project_files:
+                        # the configuration changed, thus the project is reloaded and all images are planned again
+                        self._reload_poetry()
+                        status = self._build(commit_sha)
+                    else:
+                        status = self._build(commit_sha, changes)
+                except RuntimeError:
+                    # errors are already reported, the next change may fix them
+                    status = 1
+        except KeyboardInterrupt:
+            self.info("Stopped watching.")
+            return status
+
+    def _watched_paths(self) -> list[str]:
+        pyproject_path = self.poetry.pyproject_path
+        paths = [pyproject_path.as_posix(), pyproject_path.with_name("poetry.lock").as_posix()]
+        plan = self._build_plan
+        if plan is not None and plan.package_mode and not self.option("exclude-package"):
+            # directories of the package are watched for added or removed files
+            files = package_files(self.poetry)
+            paths += [file.as_posix() for file in files] + sorted({file.parent.as_posix() for file in files})
+        return paths + self._context_files()
+
+    def _context_files(self, image_plan: Optional[ImagePlan] = None) -> list[str]:
+        # the build context files copied into the given image, or into any planned image
+        if self._build_plan is None:
+            return []
+        images = self._build_plan.images if image_plan is None else (image_plan,)
+        return [path for image in images for source in image.sources for path in source_files(source)]
+
+    def _reload_poetry(self) -> None:
+        if self._poetry is None:
+            self.reset_poetry()
+        else:
+            self.set_poetry(Factory().create_poetry(self.poetry.pyproject_path.parent))
+
+    def _plan(self, commit_sha: Optional[str], packaged: bool) -> BuildPlan:
+        start = time.perf_counter()
+        pyproject_config = self.poetry.pyproject.data.unwrap()
+        poetry_config = self.poetry.pyproject.poetry_config
+        project_config: dict[str, Any] = pyproject_config.get("project", dict())
+        docker_config: dict[str, Any] = pyproject_config.get("tool", dict()).get("docker", dict())
+
+        # if no configuration exists, then stop execution
+        if not docker_config:
+            self.error("No configuration found in [tool.docker] in pyproject.toml")
+
+        # infer image(s) structure
+        multiple_images = {None}
+        if all(entry not in COMMANDS for entry in set(docker_config)):
+            if all(entry in COMMANDS for image in set(docker_config) for entry in docker_config[image]):
+                multiple_images = set(docker_config)  # type: ignore
+                self.info(f"Detected '{len(set(docker_config))}' image(s): {list(set(docker_config))}.")
+
+                # check if only a subset of images should be build
+                if self.option("build-only"):
+                    selected = set(self.option("build-only"))
+                    multiple_images = multiple_images.intersection(selected)
+                    self.warning(f"Building only image(s): {list(multiple_images)}.")
+            else:
+                for image in set(docker_config):
+                    if any(entry not in COMMANDS for entry in docker_config[image]):
+                        self.error(
+                            f"Image [{image}] has unknown commands: {','.join(set(docker_config[image]).difference(COMMANDS))}"
+                        )
+
+        elif any(entry not in COMMANDS for entry in set(docker_config)):
+            self.error(f"Unknown commands: {','.join(set(docker_config).difference(COMMANDS))}")
+
+        # extract project name, version, authors and python version
+        project_name = project_config["name"]
+        project_version = poetry_config.get("version", project_config["version"])
+        project_authors = [f"{author['name']} <{author['email']}>" for author in project_config["authors"]]
+        full_python_version = poetry_config.get("dependencies", project_config.get("dependencies", dict())).get(
+            "python"
+        )
+        package_mode = poetry_config.get("package-mode", True)  # if None assume to be True
+
+        # parse Python version
+        if full_python_version == "*":
+            self.warning("Python version is too generic, using system's running version.")
+            python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
+        elif re.match("[\\^~]?(\\d\\.\\d+)(\\.\\d+)?", full_python_version) is not None:
+            python_version = re.match("[\\^~]?(\\d\\.\\d+)(\\.\\d+)?", full_python_version).group(1)  # type: ignore
+        elif re.match("[\\^~]?(\\d)(\\.\\*)?", full_python_version) is not None:
+            python_version = re.match("[\\^~]?(\\d)(\\.\\*)?", full_python_version).group(1)  # type: ignore
+        else:
+            match = re.match(">=?(\\d\\.\\d+)(\\.\\d+)?,<=?(\\d\\.\\d+)(\\.\\d+)?", full_python_version)
+            python_version = match.group(1)  # type: ignore
+            self.warning(
+                f"Found a range of compatible Python versions '{full_python_version}', "
+                f"using the oldest for building the image '{python_version}'."
+            )
+
+        self._timings.record("config", time.perf_counter() - start)
+
+        # collect variables
+        user_variables = {}
+        for var in self.option("var"):
+            _var = var.split(":")
+            if _var[0] in {"name", "version", "py_version", "sha"}:
+                self.error(f"Variable name @({_var[0]}) is already in use by the plugin and cannot be redefined.")
+            user_variables[_var[0]] = _var[1]
+
+        # compile variable templates once, shared across all images
+        engine = TemplateEngine(
+            {
+                "name": project_name.replace("-", "_"),
+                "version": project_version,
+                "py_version": python_version,
+                "sha": "" if commit_sha is None else commit_sha,
+                **user_variables,
+            }
+        )
+
+        # collect arguments
+        user_arguments = {}
+        for arg in self.option("arg"):
+            _arg = arg.split(":")
+            user_arguments[_arg[0]] = _arg[1]
+
+        # package the project, unless exclude-package option is specified
+        if not self.option("exclude-package") and package_mode:
+            if self.option("dockerfile-only") or self.option("plan"):
+                self.info("Skipping packaging, distribution is not required for creating Dockerfiles.")
+            else:
+                with self._timings.phase("package"):
+                    self._package(project_name, project_version)
+
+        # plan all images up front
+        image_plans = []
+        for config_name in sorted(multiple_images, key=str):
+            image_config = docker_config if config_name is None else docker_config.get(config_name)
+            with self._timings.phase("plan", config_name):
+                image_plan = self._plan_image(
+                    project_name,
+                    project_version,
+                    project_authors,
+                    python_version,
+                    package_mode,
+                    engine,
+                    user_arguments,
+                    image_config,
+                    config_name,
+                )
+                image_plans.append(image_plan)
+
+        # packaging may have created the wheels, thus the plan is keyed on the resulting ones
+        key = self._plan_key(commit_sha, packaged)
+        return BuildPlan(key, project_name, project_version, package_mode, image_plans)
+
+    def _positive_integer(self, option_name: str) -> int:
+        try:
+            value = int(self.option(option_name))
+        except ValueError:
+            value = 0
+        if value < 1:
+            self.error(f"Invalid number of {option_name} '{self.option(option_name)}', expected a positive integer.")
+        return value
+
+    def _bake(
+        self,
+        image_builds: dict[Optional[str], ImageBuild],
+        dependencies: dict[Optional[str], dict[str, Optional[str]]],
+    ) -> int:
+        failures: dict[Optional[str], str] = dict()
+        targets: dict[str, dict[str, Any]] = dict()
+        baked: dict[Optional[str], ImageBuild] = dict()
+        for config_name, image_build in image_builds.items():
+            if image_build.is_up_to_date():
+                # unchanged images are only tagged and pushed, as in regular builds
+                try:
+                    image_build.run()
+                except RuntimeError as e:
+                    failures[config_name] = str(e)
+            else:
+                targets[target_name(config_name)] = bake_target(image_build, image_build.context())
+                baked[config_name] = image_build
+
+        # images based on baked images of the project use them directly, through a named context
+        for config_name, bases in dependencies.items():
+            contexts = {
+                reference: f"target:{target_name(base)}"
+                for reference, base in bases.items()
+                if target_name(base) in targets
+            }
+            if contexts and target_name(config_name) in targets:
+                targets[target_name(config_name)]["contexts"] = contexts
+
+        if targets:
+            write_bake_file(targets)
+            self.info(f"Building images {list(targets)} using a single bake from '{BAKE_FILE_PATH}'.")
+            log_path = None
+            if self.option("log"):
+                log_path = "dist/logs/docker-bake.log"
+                if os.path.exists(log_path):
+                    os.remove(log_path)
+            try:
+                with self._timings.phase("bake"):
+                    run_command(BakeCommand(targets=list(targets)).command(), self.io, log_path=log_path)
+            except CommandError as e:
+                failures[None] = f"Failed to bake images {list(targets)}. {e}"
+            else:
+                for image_build in baked.values():
+                    image_build.record()
+                self.info("Images successfully baked!")
+                for config_name, image_build in baked.items():
+                    try:
+                        image_build.export()
+                    except RuntimeError as e:
+                        failures[config_name] = str(e)
+
+        for config_name, failure in failures.items():
+            prefix = "" if config_name is None else f"[{config_name}] "
+            self.io.write_error_line(f"<error>[ERROR]:</error> {prefix}{failure}")
+
+        return 1 if failures else 0
+
+    def _package(self, project_name: str, project_version: str) -> None:
+        start = time.perf_counter()
+        distribution_name = f"{project_name.replace('-', '_')}-{project_version}"
+        fingerprint_path = f"dist/.{distribution_name}.fingerprint"
+        fingerprint = package_fingerprint(self.poetry)
+        artifacts = [f"dist/{distribution_name}.tar.gz", f"dist/{distribution_name}-*.whl"]
+
+        if is_up_to_date(fingerprint, fingerprint_path, artifacts):
+            self.info(f"Distribution is up to date, skipping packaging ({time.perf_counter() - start:.2f}s).")
+            return
+
+        if self.call("build") != 0:
+            self.error("Failed to package the project.")
+
+        with open(fingerprint_path, "w") as fingerprint_file:
+            fingerprint_file.write(fingerprint)
+        self.info(f"Packaged project in {time.perf_counter() - start:.2f}s.")
+
+    def _plan_image(
+        self,
+        project_name: str,
+        project_version: str,
+        project_authors: list[str],
+        python_version: str,
+        package_mode: bool,
+        engine: TemplateEngine,
+        user_arguments: dict[str, str],
+        image_config: dict[str, Any],
+        config_name: Optional[str],
+    ) -> ImagePlan:
+        section = "[tool.docker]" if config_name is None else f"[tool.docker.{config_name}]"
+
+        def render(text: str, location: str) -> str:
+            return engine.render(text, f"{section}.{location}")
+
+        exclude_package: bool = self.option("exclude-package")
+
+        image_tags = [render(tag, f"tags[{i}]") for i, tag in enumerate(image_config.get("tags", list()))]
+        if not image_tags or any([re.search(".*/.*?(:.*)", tag) is None for tag in image_tags]):
+            author_name = re.match("([\\w+\\s*]+)(<.*>)?", project_authors[0])
+            if author_name is None:
+                self.error("Author name cannot be matched.")
+
+            org: str = author_name.group(1).strip().lower().replace(" ", ".")
+            name: str = project_name if config_name is None else f"{project_name}-{config_name}"
+            image_tags = [f"{org}/{name}:latest"]
+            self.info(f"Image tags are not defined or are invalid, using '{image_tags}'.")
+        else:
+            self.info(f"Found images tags: {list(image_tags)}")
+
+        # Create docker file
+        dockerfile_name = "Dockerfile" if config_name is None else f"Dockerfile_{config_name}"
+        docker_file = DockerFile(self.io, name=config_name)
+
+        # Collect all docker ARG and validate that all user arguments exist in the configuration
+        args = {name: render(value, f"args.{name}") for name, value in image_config.get("args", dict()).items()}
+        for arg, _ in user_arguments.items():
+            if arg not in args:
+                self.error(f"Argument '{arg}' does not exist in docker config.")
+
+        install_package = not exclude_package and package_mode
+        distribution_name = f"{project_name.replace('-', '_')}-{project_version}"
+        # install the pre-built wheel, unless the source distribution is requested or there is no
+        # platform independent wheel, since it avoids building the package inside the image
+        package_format = image_config.get("package", "wheel")
+        if package_format not in PACKAGE_FORMATS:
+            self.error(f"Unknown package format '{package_format}', expected one of: {', '.join(PACKAGE_FORMATS)}.")
+        package_name = f"{distribution_name}.tar.gz"
+        if package_format == "wheel" and install_package:
+            wheel_name = find_wheel(distribution_name)
+            if wheel_name is None:
+                self.info(f"No platform independent wheel found, installing '{package_name}' instead.")
+            else:
+                package_name = wheel_name
+        # when the dependency layer is enabled, the locked dependencies are exported and installed
+        # in a separate layer, before the distribution package, so that code changes reuse it
+        dependency_layer = bool(image_config.get("dependency_layer", False)) and install_package
+        # in multistage mode, wheels for the package and its locked dependencies are built in a
+        # builder stage, and the final stage only installs the resulting wheels
+        multistage_config = image_config.get("multistage", False)
+        if not isinstance(multistage_config, (bool, dict)):
+            self.error(f"Invalid multistage configuration: {multistage_config}")
+        multistage = bool(multistage_config) and install_package
+
+        requirements_name = "requirements.txt" if config_name is None else f"requirements-{config_name}.txt"
+        if (dependency_layer or multistage) and not self.option("plan"):
+            if not self.poetry.locker.is_locked():
+                self.error("No poetry.lock found, exporting dependencies requires a locked project.")
+            try:
+                if export_requirements(
+                    self.poetry.locker.lock.as_posix(),
+                    f"dist/{requirements_name}",
+                    {
+                        dependency.name: "" if dependency.marker.is_any() else str(dependency.marker)
+                        for dependency in self.poetry.package.requires
+                    },
+                ):
+                    self.info(f"Exported locked dependencies to 'dist/{requirements_name}'.")
+            except RuntimeError as e:
+                self.error(str(e))
+
+        # plugin generated pip commands keep their downloads in a BuildKit cache mount, unless disabled.
+        # The engine API lacks BuildKit, thus the cache mount is disabled by default when using it
+        pip_cache = bool(image_config.get("pip_cache", not self.option("engine")))
+
+        def pip(command: str, *mounts: Mount) -> Run:
+            subcommand, _, arguments = command.partition(" ")
+            if pip_cache:
+                return Run(f"pip {command}", [*mounts, Mount("cache", target=PIP_CACHE_PATH)])
+            return Run(f"pip {subcommand} --no-cache-dir {arguments}", list(mounts))
+
+        # Resolve the base image of the final stage
+        base_image: Optional[str] = image_config.get("from")
+        if base_image is not None:
+            base_image = render(base_image, "from")
+        else:
+            self.warning(
+                f"No 'from' statement found in [tool.docker] in pyproject.toml, "
+                f"using 'python:{python_version}' as base image."
+            )
+            base_image = f"python:{python_version}"
+
+        # Append builder stage
+        if multistage:
+            builder_image = _builder_image(base_image)
+            if isinstance(multistage_config, dict) and "from" in multistage_config:
+                builder_image = render(multistage_config["from"], "multistage.from")
+                builder_match, base_match = PYTHON_IMAGE.match(builder_image), PYTHON_IMAGE.match(base_image)
+                if builder_match and base_match and builder_match.group("version") != base_match.group("version"):
+                    self.warning(
+                        f"Builder image '{builder_image}' uses Python {builder_match.group('version')}, while "
+                        f"base image '{base_image}' uses Python {base_match.group('version')}, thus the built "
+                        f"wheels may not be installable."
+                    )
+            docker_file.add(From(builder_image, stage=BUILDER_STAGE))
+            docker_file.add(Copy(requirements_name, "/package/requirements.txt"))
+            docker_file.add(pip(f"wheel --wheel-dir {WHEELS_PATH} -r /package/requirements.txt"))
+            if package_name.endswith(".whl"):
+                docker_file.add(Copy(package_name, f"{WHEELS_PATH}/{package_name}"))
+            else:
+                docker_file.add(Copy(package_name, f"/package/{package_name}"))
+                docker_file.add(pip(f"wheel --no-deps --wheel-dir {WHEELS_PATH} /package/{package_name}"))
+
+        # Append FROM command
+        docker_file.add(From(base_image))
+
+        # Append all docker LABEL
+        labels = {name: render(value, f"labels.{name}") for name, value in image_config.get("labels", dict()).items()}
+        docker_file.add(Labels(labels))
+
+        # Append COPY commands
+        copy_statements: list[dict[str, str]] = image_config.get("copy", dict())
+        # in multistage mode, wheels are mounted from the builder stage while installing them
+        if dependency_layer and not multistage:
+            docker_file.add(Copy(requirements_name, "/package/requirements.txt"))
+        # unless excluded copy the distribution package into the container
+        elif install_package and not multistage:
+            docker_file.add(Copy(package_name, f"/package/{package_name}"))
+        for i, statement in enumerate(copy_statements):
+            if "source" not in statement or "target" not in statement:
+                self.error(f"Source/target not present in copy command: {str(statement)}")
+
+            docker_file.add(
+                Copy(render(statement["source"], f"copy[{i}].source"), render(statement["target"], f"copy[{i}].target"))
+            )
+
+        # Append ENV commands
+        env = image_config.get("env", dict())
+        for env_name, value in env.items():
+            docker_file.add(Env(env_name, render(value, f"env.{env_name}")))
+
+        # Append VOLUME commands
+        volumes = image_config.get("volume", list())
+        for vol in volumes:
+            docker_file.add(Volume(vol))
+
+        # Append WORKDIR, USER, and RUN commands
+        flow = image_config.get("flow", list())
+        # unless excluded, install package
+        if multistage:
+            wheels = Mount("bind", target=WHEELS_PATH, source=WHEELS_PATH, from_stage=BUILDER_STAGE)
+            docker_file.add(Run(f"pip install --no-cache-dir --no-index --no-deps {WHEELS_PATH}/*.whl", [wheels]))
+        elif dependency_layer:
+            docker_file.add(pip("install -r /package/requirements.txt"))
+            docker_file.add(Copy(package_name, f"/package/{package_name}"))
+            docker_file.add(pip(f"install --no-deps /package/{package_name}"))
+        elif install_package:
+            docker_file.add(pip(f"install /package/{package_name}"))
+        for i, instruction in enumerate(flow):
+            if "work_dir" in instruction:
+                docker_file.add(WorkDir(render(instruction["work_dir"], f"flow[{i}].work_dir")))
+            elif "user" in instruction:
+                docker_file.add(User(render(instruction["user"], f"flow[{i}].user")))
+            elif "run" in instruction:
+                mounts = []
+                for j, mount_config in enumerate(instruction.get("mounts", list())):
+                    location = f"flow[{i}].mounts[{j}]"
+                    if "type" not in mount_config or not set(mount_config).issubset(MOUNT_OPTIONS):
+                        self.error(f"Invalid mount in {section}.{location}: {mount_config}")
+                    try:
+                        mounts.append(
+                            Mount(
+                                **{
+                                    MOUNT_OPTIONS[key]: render(str(value), f"{location}.{key}")
+                                    for key, value in mount_config.items()
+                                }
+                            )
+                        )
+                    except RuntimeError as e:
+                        self.error(f"Invalid mount in {section}.{location}: {e}")
+                docker_file.add(Run(render(instruction["run"], f"flow[{i}].run"), mounts))
+            else:
+                self.error(f"Unknown command '{instruction}'")
+
+        # Append EXPOSE command
+        ports = image_config.get("expose", list())
+        for port in ports:
+            docker_file.add(Expose(port))
+
+        # Append CMD command
+        cmd = image_config.get("cmd")
+        if cmd is not None:
+            docker_file.add(Cmd([render(part, f"cmd[{i}]") for i, part in enumerate(cmd)]))
+
+        # Append ENTRYPOINT command
+        entry_point = image_config.get("entrypoint")
+        if entry_point is not None:
+            docker_file.add(EntryPoint([render(part, f"entrypoint[{i}]") for i, part in enumerate(entry_point)]))
+
+        # Resolve the layer cache settings
+        cache_config = image_config.get("cache", "none")
+        if isinstance(cache_config, str):
+            cache_config = {"mode": cache_config}
+        elif not isinstance(cache_config, dict):
+            self.error(f"Invalid cache configuration: {cache_config}")
+
+        cache_mode: str = self.option("cache") or cache_config.get("mode", "none")
+        cache_from = [
+            render(source, f"cache.from[{i}]") for i, source in enumerate(_as_list(cache_config.get("from", list())))
+        ]
+        cache_to = [
+            render(target, f"cache.to[{i}]") for i, target in enumerate(_as_list(cache_config.get("to", list())))
+        ]
+        if cache_mode == "registry" and not cache_from and not cache_to:
+            # when no cache reference is given, keep the cache next to the image using a dedicated tag
+            tag = image_tags[0]
+            repository = tag[: tag.rfind(":")] if tag.rfind(":") > tag.rfind("/") else tag
+            cache_from = cache_to = [f"{repository}:buildcache"]
+        try:
+            cache = BuildCache(cache_mode, cache_from, cache_to)
+        except RuntimeError as e:
+            self.error(str(e))
+
+        if cache_mode != "none":
+            self.info(f"Using '{cache_mode}' layer cache.")
+
+        # declare each docker ARG once per build stage, right before its first reference
+        docker_file.declare_arguments(args)
+
+        try:
+            engine.check()
+        except UndeclaredVariableError as e:
+            self.error(str(e))
+
+        if image_config.get("optimize", False):
+            docker_file.optimize()
+
+        return ImagePlan(
+            config_name,
+            dockerfile_name,
+            image_tags,
+            self.option("platform"),
+            user_arguments,
+            docker_file.instructions,
+            docker_file.sources(),
+            cache,
+            self.option("push"),
+            self.option("secret"),
+            os.path.join("dist", f"{dockerfile_name}.oci.tar") if self.option("oci") else None,
+        )
+
+    def _image_build(self, image_plan: ImagePlan, manifest: Optional[BuildManifest] = None) -> ImageBuild:
+        log_path = None
+        if self.option("log"):
+            log_path = f"dist/logs/{image_plan.dockerfile_name}.log"
+            if os.path.exists(log_path):
+                os.remove(log_path)
+        docker_file = DockerFile(
+            self.io,
+            list(image_plan.instructions),
+            name=image_plan.name,
+            log_path=log_path,
+            timings=self._timings,
+            push_jobs=self._push_jobs,
+            engine=self._docker_engine,
+        )
+        docker_file.create(image_plan.dockerfile_name)
+        self.info(f"Dockerfile is located in 'dist/{image_plan.dockerfile_name}'.")
+
+        return ImageBuild(
+            docker_file,
+            list(image_plan.image_tags),
+            list(image_plan.platform),
+            dict(image_plan.arguments),
+            image_plan.dockerfile_name,
+            image_plan.push,
+            image_plan.cache(),
+            manifest,
+            list(image_plan.secrets),
+            image_plan.oci_path,
+            self._archive_export,
+        )
+
+
+def _as_list(value: Union[str, list[str]]) -> list[str]:
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _builder_image(base_image: str) -> str:
+    # wheels are built using the full python image of the version and distribution of the base
+    # image, since slim images lack the build toolchain, while any other base image is used as is
+    match = PYTHON_IMAGE.match(base_image)
+    if match is None:
+        return base_image
+    variant = match.group("variant") or ""
+    if variant == "slim" or variant.startswith("slim-"):
+        distribution = variant[len("slim-") :]
+        return f"{match.group('repository')}:{match.group('version')}{'-' if distribution else ''}{distribution}"
+    return base_image
@@ -0,0 +1,158 @@
+# Futures
+from __future__ import annotations
+
+# Standard Library
+import fnmatch
+import os
+import re
+import shutil
+
+# Project
+from .export import EXPORT_DIRECTORY
+
+CONTEXT_DIRECTORY = ".context"
+
+# files and directories the plugin generates under the source directory, which are never part of a build context
+GENERATED_PATHS = (
+    CONTEXT_DIRECTORY,
+    EXPORT_DIRECTORY,
+    "logs",
+    ".dockerignore",
+    ".docker-manifest.json",
+    ".docker-plan.json",
+    ".*.fingerprint",
+    "docker-bake.json",
+    "timings.json",
+    "poetry-docker.pstats",
+    "Dockerfile*.layers.json",
+    "Dockerfile*.tar.gz",
+    "Dockerfile*.tar.zst",
+    "Dockerfile*.oci.tar",
+)
+
+WILDCARD = re.compile(r"[*?[]")
+
+
+def _glob(source_path: str, source: str) -> list[str]:
+    # unlike glob, wildcards match hidden files as well, as COPY instructions do
+    paths = [source_path]
+    for part in source.split("/"):
+        if not part or part == ".":
+            continue
+        if WILDCARD.search(part) is None:
+            paths = [os.path.join(path, part) for path in paths if os.path.lexists(os.path.join(path, part))]
+        else:
+            paths = [
+                os.path.join(path, name)
+                for path in paths
+                if os.path.isdir(path)
+                for name in sorted(os.listdir(path))
+                if fnmatch.fnmatchcase(name, part)
+            ]
+    return paths
+
+
+def is_generated(path: str, source_path: str = "dist") -> bool:
+    """
+    :param path: a path under the source directory
+    :param source_path: the source directory
+    :return: true if the path is, or is inside, a file or directory generated by the plugin
+    """
+    name = os.path.relpath(path, source_path).split(os.sep)[0]
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in GENERATED_PATHS)
+
+
+def source_files(source: str, source_path: str = "dist") -> list[str]:
+    """
+    Resolves the source of a COPY instruction into the files it copies. Wildcards match
+    hidden files as well, as COPY instructions do, while the files generated by the plugin
+    are left out, since they are never part of a build context. Sources referencing build
+    arguments cannot be resolved, thus they are assumed to copy any file of the context.
+
+    :param source: the source of a COPY instruction, relative to the source directory
+    :param source_path: the directory the source is relative to
+    :return: the matching files in a stable order, where matching directories are expanded to the files they contain
+    """
+    files: list[str] = []
+    for path in _glob(source_path, "." if "$" in source else source.lstrip("/")):
+        if is_generated(path, source_path):
+            continue
+        if os.path.isdir(path):
+            for root, directories, names in os.walk(path):
+                directories[:] = sorted(
+                    name for name in directories if not is_generated(os.path.join(root, name), source_path)
+                )
+                files.extend(
+                    os.path.join(root, name)
+                    for name in sorted(names)
+                    if not is_generated(os.path.join(root, name), source_path)
+                )
+        else:
+            files.append(path)
+    return files
+
+
+def write_ignore_file(source_path: str = "dist") -> None:
+    """
+    Adds the files generated by the plugin to the '.dockerignore' of the source directory,
+    so that they are excluded whenever the whole source directory is used as build context.
+
+    :param source_path: the source directory
+    """
+    ignore_path = os.path.join(source_path, ".dockerignore")
+    content = ""
+    if os.path.exists(ignore_path):
+        with open(ignore_path) as ignore_file:
+            content = ignore_file.read()
+    missing = [pattern for pattern in GENERATED_PATHS if pattern not in content.splitlines()]
+    if missing:
+        os.makedirs(source_path, exist_ok=True)
+        with open(ignore_path, "a") as ignore_file:
+            if content and not content.endswith("\n"):
+                ignore_file.write("\n")
+            ignore_file.writelines(f"{pattern}\n" for pattern in missing)
+
+
+def stage_context(sources: list[str], context_path: str, source_path: str = "dist") -> bool:
+    """
+    Assembles a minimal build context that contains only the given sources. Files are
+    hard-linked into the context, or copied when hard links are not supported.
+
+    Staging fails when a source cannot be resolved into files, for instance when it
+    references a build argument, in which case the full source directory should be used
+    as build context instead, excluding the files generated by the plugin through the
+    ignore file, see 'write_ignore_file'. Hidden files are staged as well, while the files
+    generated by the plugin, e.g. the build manifest, staged contexts and logs, are never
+    staged.
+
+    :param sources: the sources of all COPY instructions, relative to the source directory
+    :param context_path: path to the resulting build context
+    :param source_path: the directory the sources are relative to
+    :return: true if the context was staged, false otherwise
+    """
+    files: list[str] = []
+    for source in sources:
+        source = source.lstrip("/")
+        if "$" in source or ".." in source.split("/"):
+            return False
+
+        matches = _glob(source_path, source)
+        if not matches:
+            return False
+        files.extend(source_files(source, source_path))
+
+    if os.path.exists(context_path):
+        shutil.rmtree(context_path)
+    os.makedirs(context_path)
+
+    for file in files:
+        target = os.path.join(context_path, os.path.relpath(file, source_path))
+        if os.path.exists(target):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(file, target)
+        except OSError:
+            shutil.copy2(file, target)
+
+    return True
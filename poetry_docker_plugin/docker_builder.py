@@ -1,15 +1,78 @@
 # Futures
 from __future__ import annotations
 
+# Types
+from typing import Any, Callable, TypeVar
+
 # Standard Library
 import abc
 import os
+import re
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractContextManager, nullcontext
 
 # Dependencies
+from cleo.formatters.formatter import Formatter
 from cleo.io.io import IO
 
-COMMANDS = ("tags", "args", "from", "labels", "copy", "env", "expose", "volume", "flow", "cmd", "entrypoint")
+# Project
+from .context import CONTEXT_DIRECTORY, stage_context
+from .engine import DockerEngine, EngineError, OutputHandler, PushResult
+from .export import ArchiveExport
+from .manifest import BuildManifest, image_digest
+from .runner import CommandError, run_command
+from .timing import Timings
+
+COMMANDS = (
+    "tags",
+    "args",
+    "from",
+    "labels",
+    "copy",
+    "env",
+    "expose",
+    "volume",
+    "flow",
+    "cmd",
+    "entrypoint",
+    "cache",
+    "dependency_layer",
+    "optimize",
+    "multistage",
+    "package",
+    "pip_cache",
+)
+
+CACHE_MODES = ("none", "local", "registry")
+
+MOUNT_TYPES = ("bind", "cache", "secret")
+
+MOUNT_SHARING_MODES = ("shared", "private", "locked")
+
+# push failures worth retrying, e.g. network errors, rate limits or server errors of the registry
+TRANSIENT_PUSH_ERROR = re.compile(
+    r"timeout|timed out|connection reset|connection refused|broken pipe|unexpected eof|tls handshake"
+    r"|too many requests|service unavailable|bad gateway|\b(429|500|502|503|504)\b",
+    re.IGNORECASE,
+)
+PUSHED_DIGEST = re.compile(r"digest: (sha256:[0-9a-f]{64})")
+CREATED_DIGEST = re.compile(r"pushing (sha256:[0-9a-f]{64}) to ")
+
+# the number of retries of a failed push, and the delay before the first retry in seconds, doubled on every retry
+PUSH_RETRIES = 3
+PUSH_BACKOFF = 1.0
+
+# the Dockerfile frontend supporting RUN mounts, declared when any instruction uses them
+SYNTAX_HEADER = "# syntax=docker/dockerfile:1"
+
+# references to docker arguments, i.e., ${name} or $name
+ARGUMENT_REFERENCE = re.compile(r"\$\{?(\w+)")
+ARGUMENT_SUBSTITUTION = re.compile(r"\$\{(\w+)\}|\$(\w+)")
+
+T = TypeVar("T")
 
 
 class Instruction(metaclass=abc.ABCMeta):
@@ -18,10 +81,12 @@ class Instruction(metaclass=abc.ABCMeta):
     supported by the plugin.
     """
 
-    pass
+    __slots__ = ()
 
 
 class Arg(Instruction):
+    __slots__ = ("_arg_name", "_default_value")
+
     def __init__(self, arg_name: str, default_value: str | None = None):
         """
         Creates a docker ARG instruction:
@@ -34,27 +99,47 @@ class Arg(Instruction):
         self._arg_name = arg_name
         self._default_value = default_value
 
+    @property
+    def name(self) -> str:
+        return self._arg_name
+
+    @property
+    def default_value(self) -> str | None:
+        return self._default_value
+
     def __str__(self) -> str:
         return f"ARG {self._arg_name}={self._default_value}" if self._default_value else f"ARG {self._arg_name}"
 
 
 class Labels(Instruction):
-    def __init__(self, labels: dict[str, str]):
+    __slots__ = ("_labels", "_single_instruction")
+
+    def __init__(self, labels: dict[str, str], single_instruction: bool = False):
         """
         Creates a docker LABEL instruction:
 
         https://docs.docker.com/engine/reference/builder/#label
 
         :param labels: a dictionary of key/value labels
+        :param single_instruction: declares all labels in a single LABEL instruction, instead of one per label
         """
         self._labels = labels
+        self._single_instruction = single_instruction
+
+    @property
+    def labels(self) -> dict[str, str]:
+        return self._labels
 
     def __str__(self) -> str:
+        if self._single_instruction and self._labels:
+            return "LABEL " + " ".join([f"{key}={value}" for key, value in self._labels.items()])
         return "\n".join([f"LABEL {key}={value}" for key, value in self._labels.items()])
 
 
 class From(Instruction):
-    def __init__(self, base_image: str, platform: str | None = None):
+    __slots__ = ("_base_image", "_platform", "_stage")
+
+    def __init__(self, base_image: str, platform: str | None = None, stage: str | None = None):
         """
         Creates a docker FROM instruction:
 
@@ -62,20 +147,33 @@ class From(Instruction):
 
         :param base_image: the base image tag
         :param platform: the target platform (optional)
+        :param stage: a name for the build stage (optional)
         """
         self._base_image = base_image
         self._platform = platform
+        self._stage = stage
+
+    @property
+    def base_image(self) -> str:
+        return self._base_image
+
+    @property
+    def stage(self) -> str | None:
+        return self._stage
 
     def __str__(self) -> str:
-        return (
+        instruction = (
             f"FROM {self._base_image}"
             if self._platform is None
             else f"FROM --platform {self._platform} {self._base_image}"
         )
+        return instruction if self._stage is None else f"{instruction} AS {self._stage}"
 
 
 class Copy(Instruction):
-    def __init__(self, source: str, destination: str):
+    __slots__ = ("_destination", "_from_stage", "_source")
+
+    def __init__(self, source: str, destination: str, from_stage: str | None = None):
         """
         Creates a docker COPY instruction:
 
@@ -83,16 +181,30 @@ class Copy(Instruction):
 
         :param source: the source file to copy
         :param destination: the destination inside docker container
+        :param from_stage: a build stage to copy the source from, instead of the build context (optional)
         """
 
         self._source = source
         self._destination = destination
+        self._from_stage = from_stage
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    @property
+    def from_stage(self) -> str | None:
+        return self._from_stage
 
     def __str__(self) -> str:
+        if self._from_stage is not None:
+            return f"COPY --from={self._from_stage} {self._source} {self._destination}"
         return f"COPY {self._source} {self._destination}"
 
 
 class Env(Instruction):
+    __slots__ = ("_variables",)
+
     def __init__(self, env_name: str, value: str):
         """
         Creates a docker ENV instruction:
@@ -102,14 +214,32 @@ class Env(Instruction):
         :param env_name: the name of the environment variable
         :param value: the value assigned to the variable
         """
-        self._env_name = env_name
-        self._value = value
+        self._variables = {env_name: value}
+
+    @classmethod
+    def of(cls, variables: dict[str, str]) -> Env:
+        """
+        Creates a docker ENV instruction that sets multiple environment variables at once.
+
+        :param variables: a dictionary of environment variable names and values
+        :return: the ENV instruction
+        """
+        env_name, value = next(iter(variables.items()))
+        env = cls(env_name, value)
+        env._variables.update(variables)
+        return env
+
+    @property
+    def variables(self) -> dict[str, str]:
+        return self._variables
 
     def __str__(self) -> str:
-        return f'ENV {self._env_name}="{self._value}"'
+        return "ENV " + " ".join([f'{name}="{value}"' for name, value in self._variables.items()])
 
 
 class Expose(Instruction):
+    __slots__ = ("_port",)
+
     def __init__(self, port: int):
         """
         Creates a docker EXPOSE instruction:
@@ -128,6 +258,8 @@ class Expose(Instruction):
 
 
 class Volume(Instruction):
+    __slots__ = ("_path",)
+
     def __init__(self, path: str):
         """
         Creates a docker VOLUME instruction:
@@ -143,6 +275,8 @@ class Volume(Instruction):
 
 
 class WorkDir(Instruction):
+    __slots__ = ("_path",)
+
     def __init__(self, path: str):
         """
         Creates a docker WORKDIR instruction:
@@ -158,6 +292,8 @@ class WorkDir(Instruction):
 
 
 class User(Instruction):
+    __slots__ = ("_group", "_user")
+
     def __init__(self, user: str, group: str | None = None):
         """
         Creates a docker USER instruction:
@@ -174,8 +310,72 @@ class User(Instruction):
         return f"USER {self._user}" if self._group is None else f"USER {self._user}:{self._group}"
 
 
+class Mount:
+    __slots__ = ("_from_stage", "_mount_id", "_mount_type", "_sharing", "_source", "_target")
+
+    def __init__(
+        self,
+        mount_type: str,
+        target: str | None = None,
+        source: str | None = None,
+        from_stage: str | None = None,
+        mount_id: str | None = None,
+        sharing: str | None = None,
+    ):
+        """
+        Creates a BuildKit mount for a docker RUN instruction:
+
+        https://docs.docker.com/reference/dockerfile/#run---mount
+
+        :param mount_type: the mount type, one of 'bind', 'cache' or 'secret'
+        :param target: the mount path inside the container, mandatory for bind and cache mounts
+        :param source: the source path, relative to the build context or the from stage (optional)
+        :param from_stage: a build stage or image to mount the source from (optional)
+        :param mount_id: the cache or secret id (optional)
+        :param sharing: the sharing mode of cache mounts, one of 'shared', 'private' or 'locked' (optional)
+        """
+        if mount_type not in MOUNT_TYPES:
+            raise RuntimeError(f"Unknown mount type '{mount_type}', expected one of: {', '.join(MOUNT_TYPES)}.")
+        if target is None and mount_type != "secret":
+            raise RuntimeError(f"A target is required for {mount_type} mounts.")
+        if sharing is not None and sharing not in MOUNT_SHARING_MODES:
+            raise RuntimeError(f"Unknown sharing mode '{sharing}', expected one of: {', '.join(MOUNT_SHARING_MODES)}.")
+
+        self._mount_type = mount_type
+        self._target = target
+        self._source = source
+        self._from_stage = from_stage
+        self._mount_id = mount_id
+        self._sharing = sharing
+
+    @property
+    def mount_type(self) -> str:
+        return self._mount_type
+
+    @property
+    def source(self) -> str | None:
+        return self._source
+
+    @property
+    def from_stage(self) -> str | None:
+        return self._from_stage
+
+    def __str__(self) -> str:
+        options = {
+            "type": self._mount_type,
+            "id": self._mount_id,
+            "from": self._from_stage,
+            "source": self._source,
+            "target": self._target,
+            "sharing": self._sharing,
+        }
+        return "--mount=" + ",".join(f"{key}={value}" for key, value in options.items() if value is not None)
+
+
 class Run(Instruction):
-    def __init__(self, command: str):
+    __slots__ = ("_command", "_mounts")
+
+    def __init__(self, command: str, mounts: list[Mount] | None = None):
         """
         Creates a docker RUN instruction:
 
@@ -186,14 +386,26 @@ class Run(Instruction):
         piping output, chaining commands, and I/O redirection.
 
         :param command: a shell command to run
+        :param mounts: a list of BuildKit mounts available to the command (optional)
         """
         self._command = command
+        self._mounts = [] if mounts is None else mounts
+
+    @property
+    def command(self) -> str:
+        return self._command
+
+    @property
+    def mounts(self) -> list[Mount]:
+        return self._mounts
 
     def __str__(self) -> str:
-        return f"RUN {self._command}"
+        return " ".join(["RUN", *[str(mount) for mount in self._mounts], self._command])
 
 
 class Cmd(Instruction):
+    __slots__ = ("_args",)
+
     def __init__(self, args: list[str]):
         """
         Creates a docker CMD instruction:
@@ -214,6 +426,8 @@ class Cmd(Instruction):
 
 
 class EntryPoint(Instruction):
+    __slots__ = ("_args",)
+
     def __init__(self, args: list[str]):
         """
         Creates a docker ENTRYPOINT instruction:
@@ -234,14 +448,95 @@ class EntryPoint(Instruction):
 
 
 class DockerFile:
-    def __init__(self, io: IO, instructions: list[Instruction] | None = None):
+    # serializes output lines of docker files built concurrently
+    _output_lock = threading.Lock()
+
+    def __init__(
+        self,
+        io: IO,
+        instructions: list[Instruction] | None = None,
+        name: str | None = None,
+        log_path: str | None = None,
+        timings: Timings | None = None,
+        push_jobs: int = 4,
+        engine: DockerEngine | None = None,
+    ):
         """
         Creates a docker file from a sequence of instructions.
 
+        :param io: the console IO used for reporting progress
         :param instructions: a list of instructions to pre-append (optional)
+        :param name: a name for the image, used for prefixing its output (optional)
+        :param log_path: path to a file the output of docker commands is appended to (optional)
+        :param timings: records the time spent building and pushing the image (optional)
+        :param push_jobs: the maximum number of image tags to push concurrently
+        :param engine: a Docker Engine API client used instead of the docker CLI, whenever possible (optional)
         """
         self._io = io
         self._instructions = [] if instructions is None else instructions
+        self._name = name
+        self._log_path = log_path
+        self._timings = timings
+        self._push_jobs = push_jobs
+        self._engine = engine
+
+    def _phase(self, name: str) -> AbstractContextManager[None]:
+        return nullcontext() if self._timings is None else self._timings.phase(name, self._name)
+
+    def info(self, message: str) -> None:
+        prefix = "" if self._name is None else f"[{self._name}] "
+        with DockerFile._output_lock:
+            self._io.write_line(f"<info>[INFO]:</info> {prefix}{message}")
+
+    def warning(self, message: str) -> None:
+        prefix = "" if self._name is None else f"[{self._name}] "
+        with DockerFile._output_lock:
+            self._io.write_line(f"<warning>[WARN]:</warning> {prefix}{message}")
+
+    def _run(self, command: list[str], failure: str) -> list[str]:
+        prefix = "" if self._name is None else f"[{self._name}] "
+        try:
+            return run_command(command, self._io, prefix, self._log_path, lock=DockerFile._output_lock)
+        except CommandError as e:
+            raise RuntimeError(f"{failure} {e}") from e
+
+    def _call_engine(self, operation: Callable[[OutputHandler], T], failure: str) -> T:
+        prefix = "" if self._name is None else f"[{self._name}] "
+        if self._log_path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self._log_path)), exist_ok=True)
+
+        with nullcontext() if self._log_path is None else open(self._log_path, "a") as log_file:
+
+            def output(line: str) -> None:
+                if log_file is not None:
+                    log_file.write(f"{line}\n")
+                with DockerFile._output_lock:
+                    self._io.write_line(f"{prefix}{Formatter.escape(line)}")
+
+            try:
+                return operation(output)
+            except EngineError as e:
+                raise RuntimeError(f"{failure} {e}") from e
+
+    def _engine_limitation(
+        self, platform: list[str], cache: BuildCache | None, secrets: list[str] | None, oci_path: str | None
+    ) -> str | None:
+        # the classic builder of the engine API lacks BuildKit features, which are built using the docker CLI
+        if len(platform) > 1:
+            return "multiple platforms"
+        if secrets:
+            return "secrets"
+        if oci_path is not None:
+            return "OCI exports"
+        if cache is not None and (cache.mode == "registry" or cache.cache_from or cache.cache_to):
+            return "cache imports or exports"
+        if any(isinstance(instruction, Run) and instruction.mounts for instruction in self._instructions):
+            return "RUN mounts"
+        return None
+
+    @property
+    def instructions(self) -> list[Instruction]:
+        return list(self._instructions)
 
     def add(self, instruction: Instruction) -> None:
         """
@@ -251,6 +546,102 @@ class DockerFile:
         """
         self._instructions.append(instruction)
 
+    def base_images(self, arguments: dict[str, str] | None = None) -> list[str]:
+        """
+        Resolves the base images of all build stages, excluding the ones that refer to
+        previous build stages. Arguments are resolved using the global ARG instructions.
+
+        :param arguments: a dictionary of build arguments, overriding the argument defaults (optional)
+        :return: the base images of the docker file
+        """
+        values: dict[str, str] = dict()
+        stages: set[str] = set()
+        base_images: list[str] = []
+        for instruction in self._instructions:
+            if isinstance(instruction, Arg) and not base_images:
+                # arguments declared before the first FROM instruction
+                values[instruction.name] = instruction.default_value or ""
+            elif isinstance(instruction, From):
+                values.update(arguments or dict())
+                base_image = ARGUMENT_SUBSTITUTION.sub(
+                    lambda match: values.get(match.group(1) or match.group(2), match.group(0)),
+                    instruction.base_image,
+                )
+                if base_image not in stages:
+                    base_images.append(base_image)
+                if instruction.stage is not None:
+                    stages.add(instruction.stage)
+        return base_images
+
+    def declare_arguments(self, arguments: dict[str, str]) -> None:
+        """
+        Declares the given docker arguments, in a single pass over the instructions. Arguments
+        referenced by FROM instructions are declared once before the first build stage, while
+        arguments referenced inside a build stage are declared once per stage, right before
+        their first reference, so that changing their value only invalidates the cache of the
+        layers that use them.
+
+        :param arguments: a dictionary of argument names and their default values
+        """
+        global_arguments: dict[str, Instruction] = dict()
+        instructions: list[Instruction] = []
+        declared: set[str] = set()
+        for instruction in self._instructions:
+            referenced = [name for name in ARGUMENT_REFERENCE.findall(str(instruction)) if name in arguments]
+            if isinstance(instruction, From):
+                # arguments are scoped by build stage
+                declared = set()
+                for name in referenced:
+                    global_arguments.setdefault(name, Arg(name, arguments[name]))
+            elif isinstance(instruction, Arg):
+                declared.add(instruction.name)
+            else:
+                for name in referenced:
+                    if name not in declared:
+                        declared.add(name)
+                        instructions.append(Arg(name, arguments[name]))
+            instructions.append(instruction)
+
+        self._instructions = list(global_arguments.values()) + instructions
+
+    def optimize(self) -> None:
+        """
+        Optimizes the instructions of the docker file, reducing the number of layers
+        and instructions, without changing the resulting image.
+        """
+        # Project
+        from .optimizer import optimize
+
+        self._instructions = optimize(self._instructions)
+
+    def sources(self) -> list[str]:
+        """
+        :return: the sources of all COPY instructions and bind mounts, relative to the build context
+        """
+        sources = []
+        for instruction in self._instructions:
+            if isinstance(instruction, Copy) and instruction.from_stage is None:
+                sources.append(instruction.source)
+            elif isinstance(instruction, Run):
+                # bind mounts without a source mount the whole build context
+                sources.extend(
+                    "*" if mount.source is None else mount.source
+                    for mount in instruction.mounts
+                    if mount.mount_type == "bind" and mount.from_stage is None
+                )
+        return sources
+
+    def render(self) -> str:
+        """
+        :return: the content of the docker file
+        """
+        header = (
+            [SYNTAX_HEADER]
+            if any(isinstance(instruction, Run) and instruction.mounts for instruction in self._instructions)
+            else []
+        )
+        return "".join(f"{instruction}{os.linesep}" for instruction in [*header, *self._instructions])
+
     def create(self, dockerfile_name: str = "Dockerfile") -> None:
         """
         Creates the docker file.
@@ -261,9 +652,7 @@ class DockerFile:
             os.makedirs("dist")
 
         with open(f"dist/{dockerfile_name}", "w") as docker_file:
-            for instruction in self._instructions:
-                docker_file.write(str(instruction))
-                docker_file.write(os.linesep)
+            docker_file.write(self.render())
 
     def build(
         self,
@@ -272,57 +661,425 @@ class DockerFile:
         arguments: dict[str, str] | None = None,
         dockerfile_name: str = "Dockerfile",
         push: bool = False,
+        cache: BuildCache | None = None,
+        context: str | None = None,
+        secrets: list[str] | None = None,
+        oci_path: str | None = None,
     ) -> None:
         """
-        Builds the docker image.
+        Builds the docker image. Images of multiple platforms are pushed by the build itself,
+        since they are only kept in the build cache.
 
         :param image_tags: a list of tags for the docker image
         :param platform: a list of image platform
         :param arguments: a dictionary of build arguments
         :param dockerfile_name: a name for the resulting Dockerfile
         :param push: pushed the resulting image
+        :param cache: the layer cache settings of the build (optional)
+        :param context: path to the build context, by default the 'dist' directory (optional)
+        :param secrets: a list of secrets exposed to RUN secret mounts, e.g. 'id=token,src=token.txt' (optional)
+        :param oci_path: path to an OCI layout tarball the image is exported to (optional)
         """
         self.create(dockerfile_name)
 
-        build_command = BuildCommand(image_tags, platform, arguments, dockerfile_name)
-        result = subprocess.run(
-            build_command.command(),
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            text=True,
+        limitation = None if self._engine is None else self._engine_limitation(platform, cache, secrets, oci_path)
+        if limitation is not None:
+            self.warning(f"Docker Engine API cannot build images using {limitation}, using the docker CLI instead.")
+        elif self._engine is not None:
+            engine = self._engine
+            with self._phase("build"):
+                result = self._call_engine(
+                    lambda output: engine.build(
+                        os.path.abspath("dist") if context is None else context,
+                        f"dist/{dockerfile_name}",
+                        image_tags,
+                        arguments,
+                        platform[0] if platform else None,
+                        cache is None or cache.mode == "none",
+                        output,
+                    ),
+                    f"Failed to build image tags {image_tags}.",
+                )
+            self.info(f"Image tags successfully created{'' if result.image_id is None else f' ({result.image_id})'}!")
+            if push:
+                self.push(image_tags, platform, arguments, dockerfile_name, context, secrets)
+            return
+
+        push_build = push and len(platform) > 1
+        build_command = BuildCommand(
+            image_tags, platform, arguments, dockerfile_name, cache, context, secrets, push_build, oci_path
         )
+        with self._phase("build"):
+            self._run(build_command.command(), f"Failed to build image tags {image_tags}.")
+        self.info("Image tags successfully created!")
+        if oci_path is not None:
+            self.info(f"Image exported to '{oci_path}'.")
+
+        if push_build:
+            self.info("Image tags were successfully pushed!")
+        elif push:
+            self.push(image_tags, platform, arguments, dockerfile_name, context, secrets)
+
+    def push(
+        self,
+        image_tags: list[str],
+        platform: list[str],
+        arguments: dict[str, str] | None = None,
+        dockerfile_name: str = "Dockerfile",
+        context: str | None = None,
+        secrets: list[str] | None = None,
+    ) -> None:
+        """
+        Pushes the docker image tags to the registry.
 
-        if result.returncode == 0:
-            self._io.write_line("<info>[INFO]:</info> Image tags successfully created!")
+        :param image_tags: a list of tags for the docker image
+        :param platform: a list of image platform
+        :param arguments: a dictionary of build arguments
+        :param dockerfile_name: a name for the resulting Dockerfile
+        :param context: path to the build context, by default the 'dist' directory (optional)
+        :param secrets: a list of secrets exposed to RUN secret mounts (optional)
+        """
+        with self._phase("push"):
+            if len(platform) > 1:
+                push_command = PushCommand(image_tags, platform, arguments, dockerfile_name, context, secrets)
+                self._run(push_command.command(), f"Failed to push image tags {image_tags}.")
+                self.info("Image tags were successfully pushed!")
+            else:
+                self.__push_tags(image_tags)
+
+    def tag(self, source_tag: str, image_tag: str) -> None:
+        """
+        Creates a tag that refers to an existing image.
 
-        if push and len(platform) > 1:
-            push_command = PushCommand(image_tags, platform, arguments, dockerfile_name)
-            subprocess.run(
-                push_command.command(),
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                text=True,
-            )
-        elif push:
-            for tag in image_tags:
-                self.__push(tag)
+        :param source_tag: a tag of the existing image
+        :param image_tag: the new tag
+        """
+        failure = f"Failed to tag image '{source_tag}' as '{image_tag}'."
+        if self._engine is not None:
+            engine = self._engine
+            self._call_engine(lambda _: engine.tag(source_tag, image_tag), failure)
+        else:
+            self._run(["docker", "tag", source_tag, image_tag], failure)
+        self.info(f"Image tag '{image_tag}' successfully created from '{source_tag}'!")
 
-    def __push(self, image_tag: str) -> None:
-        result = subprocess.run(
-            [
-                "docker",
-                "push",
-                image_tag,
-            ],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            text=True,
+    def tag_remote(self, source_tag: str, image_tags: list[str]) -> None:
+        """
+        Creates tags in the registry that refer to an image already pushed there, e.g. an image of
+        multiple platforms, which is only kept in the build cache and thus cannot be tagged locally.
+
+        :param source_tag: a pushed tag of the existing image
+        :param image_tags: the new tags
+        """
+        with self._phase("push"):
+            self.__create_tags(source_tag, image_tags, remote=True)
+
+    def image_exists(self, image_tag: str) -> bool:
+        """
+        :param image_tag: a tag of an image
+        :return: true if the image exists in the local image store
+        """
+        if self._engine is not None:
+            try:
+                return self._engine.image_exists(image_tag)
+            except EngineError:
+                return False
+        try:
+            command = ["docker", "image", "inspect", image_tag]
+            return subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, check=False).returncode == 0
+        except OSError:
+            return False
+
+    def _with_retries(self, call: Callable[[], T], failure: str) -> T:
+        attempt = 0
+        while True:
+            try:
+                return call()
+            except RuntimeError as e:
+                cause = e.__cause__
+                lines = cause.tail if isinstance(cause, CommandError) else [str(cause)] if cause is not None else []
+                transient = isinstance(cause, (CommandError, EngineError)) and any(
+                    TRANSIENT_PUSH_ERROR.search(line) for line in lines
+                )
+                if not transient or attempt == PUSH_RETRIES:
+                    raise
+                delay = PUSH_BACKOFF * 2**attempt
+                attempt += 1
+                self.info(f"{failure} Retrying in {delay:g}s ({attempt}/{PUSH_RETRIES}).")
+                time.sleep(delay)
+
+    def __push_tags(self, image_tags: list[str]) -> None:
+        # all tags refer to the same image, thus once the first tag is pushed along with the image layers,
+        # the remaining tags only need a manifest in the registry, created concurrently
+        digest = self.__push(image_tags[0])
+        source = image_tags[0]
+        if digest is not None:
+            repository = image_tags[0].rsplit(":", 1)[0] if ":" in image_tags[0].rsplit("/", 1)[-1] else image_tags[0]
+            source = f"{repository}@{digest}"
+
+        self.__create_tags(source, image_tags[1:])
+
+    def __create_tags(self, source: str, image_tags: list[str], remote: bool = False) -> None:
+        failures = []
+        with ThreadPoolExecutor(max_workers=self._push_jobs) as executor:
+            for future in [executor.submit(self.__create_tag, source, tag, remote) for tag in image_tags]:
+                try:
+                    future.result()
+                except RuntimeError as e:
+                    failures.append(str(e))
+        if failures:
+            raise RuntimeError("\n".join(failures))
+
+    def __push(self, image_tag: str) -> str | None:
+        failure = f"Failed to push image tag '{image_tag}'."
+        if self._engine is not None:
+            digest = self.__engine_push(self._engine, image_tag, failure).digest
+        else:
+            output = self._with_retries(lambda: self._run(["docker", "push", image_tag], failure), failure)
+            digest = next((match.group(1) for match in map(PUSHED_DIGEST.search, output) if match), None)
+        self.info(f"Image tag '{image_tag}' was successfully pushed{'' if digest is None else f' ({digest})'}!")
+        return digest
+
+    def __engine_push(self, engine: DockerEngine, image_tag: str, failure: str) -> PushResult:
+        return self._with_retries(
+            lambda: self._call_engine(lambda output: engine.push(image_tag, output), failure), failure
         )
 
-        if result.returncode == 0:
-            self._io.write_line(f"<info>[INFO]:</info> Image tag '{image_tag}' was successfully pushed!")
+    def __create_tag(self, source: str, image_tag: str, remote: bool = False) -> None:
+        failure = f"Failed to push image tag '{image_tag}'."
+        if self._engine is not None and not remote:
+            # the engine cannot create manifests in the registry, but pushing another tag only uploads its manifest
+            digest = self.__engine_push(self._engine, image_tag, failure).digest
         else:
-            raise RuntimeError(f"Failed to push image tag '{image_tag}'.")
+            # the digest of the manifest created in the registry, which may differ from the source image
+            command = ["docker", "buildx", "imagetools", "create", "--tag", image_tag, source]
+            output = self._with_retries(lambda: self._run(command, failure), failure)
+            digest = next((match.group(1) for match in map(CREATED_DIGEST.search, output) if match), None)
+        self.info(f"Image tag '{image_tag}' was successfully pushed{'' if digest is None else f' ({digest})'}!")
+
+
+class ImageBuild:
+    def __init__(
+        self,
+        docker_file: DockerFile,
+        image_tags: list[str],
+        platform: list[str],
+        arguments: dict[str, str] | None = None,
+        dockerfile_name: str = "Dockerfile",
+        push: bool = False,
+        cache: BuildCache | None = None,
+        manifest: BuildManifest | None = None,
+        secrets: list[str] | None = None,
+        oci_path: str | None = None,
+        archive_export: ArchiveExport | None = None,
+    ) -> None:
+        """
+        Creates a planned build of a docker image, that is, a docker file along with the
+        parameters of its build.
+
+        :param docker_file: the docker file of the image
+        :param image_tags: a list of tags for the docker image
+        :param platform: a list of image platform
+        :param arguments: a dictionary of build arguments
+        :param dockerfile_name: a name for the resulting Dockerfile
+        :param push: pushed the resulting image
+        :param cache: the layer cache settings of the build (optional)
+        :param manifest: a manifest of previous builds, used to skip unchanged images (optional)
+        :param secrets: a list of secrets exposed to RUN secret mounts (optional)
+        :param oci_path: path to an OCI layout tarball the image is exported to (optional)
+        :param archive_export: exports the image into compressed archives for 'docker load' (optional)
+        """
+        self.docker_file = docker_file
+        self.image_tags = image_tags
+        self.platform = platform
+        self.arguments = arguments
+        self.dockerfile_name = dockerfile_name
+        self.push = push
+        self.cache = cache
+        self.manifest = manifest
+        self.secrets = secrets
+        self.oci_path = oci_path
+        self.archive_export = archive_export
+        # images of the project this image is based on, so that changes to them rebuild this image
+        self.bases: list[ImageBuild] = []
+
+    def digest(self) -> str:
+        """
+        :return: the digest of all inputs of the image build
+        """
+        return image_digest(
+            self.docker_file.render(),
+            self.arguments,
+            self.platform,
+            self.docker_file.sources(),
+            base_digests=[base.digest() for base in self.bases],
+        )
+
+    def context(self) -> str | None:
+        """
+        Stages a minimal build context holding only the files copied into the image.
+
+        :return: path to the build context, or none if the whole 'dist' directory should be used
+        """
+        context_path = os.path.join("dist", CONTEXT_DIRECTORY, self.dockerfile_name)
+        if stage_context(self.docker_file.sources(), context_path):
+            return os.path.abspath(context_path)
+
+        self.docker_file.info("Cannot resolve all COPY sources, using 'dist' as build context.")
+        return None
+
+    def is_up_to_date(self) -> bool:
+        """
+        :return: true if a manifest is given and the image inputs have not changed since its last successful build
+        """
+        if self.manifest is None or (self.oci_path is not None and not os.path.exists(self.oci_path)):
+            return False
+
+        entry = self.manifest.get(self.dockerfile_name)
+        if entry is None or entry["digest"] != self.digest():
+            return False
+
+        # multi-platform images are only kept in the build cache, thus they can only be re-tagged once pushed
+        if len(self.platform) > 1:
+            return (self.push and entry["pushed"]) or all(tag in entry["tags"] for tag in self.image_tags)
+
+        # the image may have been removed since, e.g. by 'docker image prune'
+        if not self.docker_file.image_exists(entry["tags"][0]):
+            self.docker_file.info(f"Image '{entry['tags'][0]}' no longer exists, rebuilding it.")
+            return False
+        return True
+
+    def record(self) -> None:
+        """
+        Records a successful build of the image in the manifest, if given.
+        """
+        if self.manifest is not None:
+            self.manifest.record(self.dockerfile_name, self.digest(), self.image_tags, self.push)
+
+    def run(self) -> None:
+        """
+        Builds, and optionally pushes, the docker image. If a manifest is given and the
+        image inputs have not changed since its last successful build, the build is skipped
+        and only new tags are created and pushed.
+        """
+        if self.manifest is None or not self.is_up_to_date():
+            self.docker_file.build(
+                self.image_tags,
+                self.platform,
+                self.arguments,
+                self.dockerfile_name,
+                self.push,
+                self.cache,
+                self.context(),
+                self.secrets,
+                self.oci_path,
+            )
+            self.record()
+            self.export()
+            return
+
+        entry = self.manifest.get(self.dockerfile_name)
+        assert entry is not None
+        new_tags = [tag for tag in self.image_tags if tag not in entry["tags"]]
+
+        self.docker_file.info("Image inputs have not changed since the last build, skipping build.")
+        if len(self.platform) > 1 and new_tags:
+            # the pushed image is tagged in the registry, thus the new tags are pushed as well
+            self.docker_file.tag_remote(entry["tags"][0], new_tags)
+        else:
+            for tag in new_tags:
+                self.docker_file.tag(entry["tags"][0], tag)
+
+        pushed = entry["pushed"] and (not new_tags or len(self.platform) > 1)
+        if self.push and not pushed:
+            context = self.context() if len(self.platform) > 1 else None
+            self.docker_file.push(
+                self.image_tags, self.platform, self.arguments, self.dockerfile_name, context, self.secrets
+            )
+
+        self.manifest.record(self.dockerfile_name, self.digest(), self.image_tags, self.push or pushed)
+        self.export()
+
+    def export(self) -> None:
+        """
+        Exports the image into a compressed archive, along with its layer manifest. If a manifest
+        is given and the archive was exported from the same image inputs, the export is skipped.
+        """
+        if self.archive_export is None:
+            return
+
+        digest = self.digest()
+        archive_path = self.archive_export.archive_path(self.dockerfile_name)
+        archive_manifest = self.archive_export.manifest(archive_path)
+        if self.manifest is not None and archive_manifest is not None and archive_manifest.get("inputs") == digest:
+            self.docker_file.info(f"Archive '{archive_path}' is up to date, skipping export.")
+            return
+
+        try:
+            with self.docker_file._phase("export"):
+                result = self.archive_export.export(self.image_tags[0], archive_path, metadata={"inputs": digest})
+        except CommandError as e:
+            raise RuntimeError(f"Failed to export image '{self.image_tags[0]}'. {e}") from e
+        self.docker_file.info(
+            f"Image exported to '{archive_path}' ({result.size / (1 << 20):.1f} MiB, "
+            f"reused {result.reused} of {len(result.layers)} compressed layers)."
+        )
+
+
+class BuildCache:
+    def __init__(
+        self,
+        mode: str = "none",
+        cache_from: list[str] | None = None,
+        cache_to: list[str] | None = None,
+    ) -> None:
+        """
+        Creates the layer cache settings of a docker build.
+
+        https://docs.docker.com/build/cache/backends/
+
+        In 'none' mode the build ignores any cached layers. In 'local' mode the layer cache of
+        the builder is reused and, optionally, imported from or exported to local directories.
+        In 'registry' mode the cache is imported from and exported to image references.
+        Targets that already declare a cache backend (e.g. 'type=gha') are passed as is.
+
+        :param mode: the cache mode, one of 'none', 'local' or 'registry'
+        :param cache_from: a list of directories or image references to import the cache from
+        :param cache_to: a list of directories or image references to export the cache to
+        """
+        if mode not in CACHE_MODES:
+            raise RuntimeError(f"Unknown cache mode '{mode}', expected one of: {', '.join(CACHE_MODES)}.")
+
+        self.mode = mode
+        self.cache_from = [] if cache_from is None else cache_from
+        self.cache_to = [] if cache_to is None else cache_to
+
+    def _target(self, target: str, export: bool) -> str:
+        if "type=" in target:
+            return target
+        if self.mode == "local":
+            return f"type=local,dest={target},mode=max" if export else f"type=local,src={target}"
+        return f"type=registry,ref={target},mode=max" if export else f"type=registry,ref={target}"
+
+    def attributes(self) -> dict[str, Any]:
+        """
+        :return: the cache settings as attributes of a bake target
+        """
+        if self.mode == "none":
+            return {"no-cache": True}
+
+        return {
+            "cache-from": [self._target(source, export=False) for source in self.cache_from],
+            "cache-to": [self._target(target, export=True) for target in self.cache_to],
+        }
+
+    def arguments(self) -> list[str]:
+        if self.mode == "none":
+            return ["--no-cache"]
+
+        return [
+            *[f"--cache-from={self._target(source, export=False)}" for source in self.cache_from],
+            *[f"--cache-to={self._target(target, export=True)}" for target in self.cache_to],
+        ]
 
 
 class BuildCommand:
@@ -332,51 +1089,75 @@ class BuildCommand:
         platform: list[str],
         arguments: dict[str, str] | None = None,
         dockerfile_name: str = "Dockerfile",
+        cache: BuildCache | None = None,
+        context: str | None = None,
+        secrets: list[str] | None = None,
+        push: bool = False,
+        oci_path: str | None = None,
     ) -> None:
         self.arguments = arguments
         self.image_tags = image_tags
         self.dockerfile_name = dockerfile_name
         self.platform = platform
+        self.cache = BuildCache() if cache is None else cache
+        self.context = os.path.abspath("dist") if context is None else context
+        self.secrets = [] if secrets is None else secrets
+        self.push = push
+        self.oci_path = oci_path
+
+    def outputs(self) -> list[str]:
+        """
+        :return: the exporters of the build, apart from the default docker image store of plain builds
+        """
+        outputs = []
+        if len(self.platform) == 1 or (not self.platform and self.oci_path is not None):
+            outputs.append("type=docker")
+        elif self.push:
+            # images of multiple platforms cannot be loaded into docker, thus they are pushed by the build itself
+            outputs.append("type=registry")
+        if self.oci_path is not None:
+            outputs.append(f"type=oci,dest={self.oci_path}")
+        return outputs
 
     def command(self) -> list[str]:
+        cache_args = self.cache.arguments()
         common_args = [
             *[
                 f"--build-arg={arg}={value}"
                 for arg, value in ({} if self.arguments is None else self.arguments).items()
             ],
+            *[f"--secret={secret}" for secret in self.secrets],
             *[arg for tag in self.image_tags for arg in ["--tag", tag]],
             "--file",
             f"dist/{self.dockerfile_name}",
-            os.path.abspath("dist"),
+            self.context,
         ]
-        if not self.platform:
+        outputs = self.outputs()
+        if not self.platform and not outputs:
             # when there are no platforms specified, use standard build command
 
             return [
                 "docker",
                 "build",
-                "--no-cache",
+                *cache_args,
             ] + common_args
 
-        if len(self.platform) < 2:
-            # when there is one platform specified, use cross-build command and load the image into docker
-
-            return [
-                "docker",
-                "buildx",
-                "build",
-                "--load",
-                "--no-cache",
-                f"--platform={self.platform[0]}",
-            ] + common_args
+        if outputs == ["type=docker"]:
+            output_args = ["--load"]
+        elif outputs == ["type=registry"]:
+            output_args = ["--push"]
+        else:
+            output_args = [f"--output={output}" for output in outputs]
 
-        # when there is more than one platform specified, use cross-build command and keep images in build cache
+        # when platforms are specified, use cross-build command. Images of one platform are loaded into docker,
+        # while images of more platforms are kept in build cache, unless pushed or exported
         return [
             "docker",
             "buildx",
             "build",
-            "--no-cache",
-            f"--platform={','.join(self.platform)}",
+            *output_args,
+            *cache_args,
+            *([f"--platform={','.join(self.platform)}"] if self.platform else []),
         ] + common_args
 
 
@@ -387,11 +1168,15 @@ class PushCommand:
         platform: list[str],
         arguments: dict[str, str] | None = None,
         dockerfile_name: str = "Dockerfile",
+        context: str | None = None,
+        secrets: list[str] | None = None,
     ) -> None:
         self.arguments = arguments
         self.image_tags = image_tags
         self.dockerfile_name = dockerfile_name
         self.platform = platform
+        self.context = os.path.abspath("dist") if context is None else context
+        self.secrets = [] if secrets is None else secrets
 
     def command(self) -> list[str]:
         return [
@@ -404,8 +1189,9 @@ class PushCommand:
                 f"--build-arg={arg}={value}"
                 for arg, value in ({} if self.arguments is None else self.arguments).items()
             ],
+            *[f"--secret={secret}" for secret in self.secrets],
             *[arg for tag in self.image_tags for arg in ["--tag", tag]],
             "--file",
             f"dist/{self.dockerfile_name}",
-            os.path.abspath("dist"),
+            self.context,
         ]
@@ -0,0 +1,423 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import Any, Callable
+
+# Standard Library
+import base64
+import fnmatch
+import http.client
+import json
+import os
+import socket
+import subprocess
+import tarfile
+from collections.abc import Iterable, Iterator
+from urllib.parse import quote, urlencode
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+
+# the registry key of Docker Hub in the docker config
+DOCKER_HUB_REGISTRY = "https://index.docker.io/v1/"
+
+# the number of bytes read from the response at once, while streaming progress messages
+READ_SIZE = 64 * 1024
+
+OutputHandler = Callable[[str], None]
+
+
+class EngineError(RuntimeError):
+    def __init__(self, message: str, status: int | None = None):
+        """
+        Raised when the Docker Engine API rejects a request or reports an error in its progress stream.
+
+        :param message: the error message of the engine
+        :param status: the HTTP status of the response, or none for errors reported in the progress stream
+        """
+        self.message = message
+        self.status = status
+        super().__init__(message if status is None else f"{message} (HTTP {status})")
+
+
+class BuildResult:
+    def __init__(self, image_id: str | None, output: list[str]):
+        """
+        :param image_id: the ID of the built image, or none if the engine did not report it
+        :param output: the output lines of the build
+        """
+        self.image_id = image_id
+        self.output = output
+
+
+class PushResult:
+    def __init__(self, image_tag: str, digest: str | None, size: int | None):
+        """
+        :param image_tag: the pushed image tag
+        :param digest: the manifest digest of the pushed image, or none if the engine did not report it
+        :param size: the manifest size of the pushed image, or none if the engine did not report it
+        """
+        self.image_tag = image_tag
+        self.digest = digest
+        self.size = size
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float | None = None):
+        """
+        An HTTP connection over a unix domain socket.
+
+        :param socket_path: path to the unix socket
+        :param timeout: the socket timeout in seconds, or none to block indefinitely
+        """
+        super().__init__("localhost")
+        self.socket_path = socket_path
+        self.socket_timeout = timeout
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.socket_timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def split_reference(image_tag: str) -> tuple[str, str]:
+    """
+    :param image_tag: an image tag, e.g. 'localhost:5000/org/foo:1.0.0'
+    :return: the repository and the tag of the image, which defaults to 'latest'
+    """
+    repository, separator, tag = image_tag.rpartition(":")
+    if not separator or "/" in tag:
+        return image_tag, "latest"
+    return repository, tag
+
+
+def registry_name(repository: str) -> str:
+    """
+    :param repository: an image repository, e.g. 'localhost:5000/org/foo' or 'org/foo'
+    :return: the registry hosting the repository, as named in the docker config
+    """
+    host, separator, _ = repository.partition("/")
+    if separator and ("." in host or ":" in host or host == "localhost"):
+        return host
+    return DOCKER_HUB_REGISTRY
+
+
+def registry_auth(repository: str, config_dir: str | None = None) -> dict[str, str]:
+    """
+    Resolves the credentials of the registry hosting a repository from the docker config,
+    either stored directly or provided by a credential helper.
+
+    https://docs.docker.com/reference/cli/docker/login/#credential-stores
+
+    :param repository: an image repository
+    :param config_dir: the docker config directory, by default '$DOCKER_CONFIG' or '~/.docker' (optional)
+    :return: the registry credentials, or an empty dictionary for anonymous access
+    """
+    if config_dir is None:
+        config_dir = os.environ.get("DOCKER_CONFIG", os.path.join(os.path.expanduser("~"), ".docker"))
+    config_path = os.path.join(config_dir, "config.json")
+    if not os.path.exists(config_path):
+        return dict()
+
+    with open(config_path) as config_file:
+        config = json.load(config_file)
+
+    registry = registry_name(repository)
+    entry = config.get("auths", dict()).get(registry, dict())
+    if entry.get("identitytoken"):
+        return {"identitytoken": entry["identitytoken"], "serveraddress": registry}
+    if entry.get("auth"):
+        username, _, password = base64.b64decode(entry["auth"]).decode().partition(":")
+        return {"username": username, "password": password, "serveraddress": registry}
+
+    helper = config.get("credHelpers", dict()).get(registry, config.get("credsStore"))
+    if helper is None:
+        return dict()
+    try:
+        process = subprocess.run(
+            [f"docker-credential-{helper}", "get"], input=registry, capture_output=True, text=True, check=True
+        )
+        credentials = json.loads(process.stdout)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return dict()
+    if credentials.get("Username") == "<token>":
+        return {"identitytoken": credentials["Secret"], "serveraddress": registry}
+    return {"username": credentials["Username"], "password": credentials["Secret"], "serveraddress": registry}
+
+
+def _ignore_patterns(context: str) -> list[str]:
+    ignore_path = os.path.join(context, ".dockerignore")
+    if not os.path.exists(ignore_path):
+        return []
+    with open(ignore_path) as ignore_file:
+        lines = (line.strip() for line in ignore_file)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def _is_ignored(path: str, patterns: list[str]) -> bool:
+    # the last matching pattern wins, while patterns starting with '!' re-include paths
+    ignored = False
+    for pattern in patterns:
+        negated = pattern.startswith("!")
+        pattern = os.path.normpath(pattern.lstrip("!").lstrip("/"))
+        parts = path.split("/")
+        if any(fnmatch.fnmatchcase("/".join(parts[: i + 1]), pattern) for i in range(len(parts))):
+            ignored = not negated
+    return ignored
+
+
+class _Chunks:
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self.chunks = self.chunks, []
+        yield from chunks
+
+
+def context_archive(context: str, dockerfile: str) -> tuple[Iterator[bytes], str]:
+    """
+    Streams a tar archive of a build context, excluding the paths ignored by its '.dockerignore'.
+    The archive is produced file by file, while it is sent, so that it is never held in memory.
+    Dockerfiles outside the build context are added to the archive, as the docker CLI does.
+
+    :param context: path to the build context
+    :param dockerfile: path to the Dockerfile
+    :return: the archive chunks and the path of the Dockerfile inside the archive
+    """
+    dockerfile_name = os.path.relpath(os.path.abspath(dockerfile), os.path.abspath(context))
+    outside = dockerfile_name.startswith("..")
+    if outside:
+        dockerfile_name = f".dockerfile.{os.path.basename(dockerfile)}"
+
+    def chunks() -> Iterator[bytes]:
+        patterns = _ignore_patterns(context)
+        output = _Chunks()
+        with tarfile.open(fileobj=output, mode="w|") as archive:  # type: ignore[call-overload]
+            for root, directories, names in os.walk(context):
+                relative_root = os.path.relpath(root, context)
+                for name in sorted(directories + names):
+                    path = name if relative_root == "." else f"{relative_root}/{name}"
+                    if _is_ignored(path, patterns) and path != dockerfile_name:
+                        if name in directories and not any(pattern.startswith("!") for pattern in patterns):
+                            directories.remove(name)
+                        continue
+                    archive.add(os.path.join(root, name), path, recursive=False)
+                    yield from output.drain()
+                directories.sort()
+            if outside:
+                archive.add(dockerfile, dockerfile_name, recursive=False)
+        yield from output.drain()
+
+    return chunks(), dockerfile_name
+
+
+class DockerEngine:
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, timeout: float | None = None):
+        """
+        A client of the Docker Engine API, which talks to the docker daemon over its unix
+        socket, instead of spawning docker CLI processes. The progress streams of the engine
+        are parsed into structured results, such as image IDs and digests.
+
+        The engine builds images using its classic builder, thus builds that require BuildKit,
+        e.g. RUN mounts, secrets, multiple platforms or cache exports, should use the docker CLI.
+
+        https://docs.docker.com/reference/api/engine/
+
+        :param socket_path: path to the unix socket of the docker daemon
+        :param timeout: the socket timeout in seconds, or none to block indefinitely
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    @classmethod
+    def from_environment(cls) -> DockerEngine | None:
+        """
+        :return: an engine client for the unix socket of '$DOCKER_HOST' or the default socket, or none if the
+            docker daemon is not reachable over a unix socket
+        """
+        host = os.environ.get("DOCKER_HOST", f"unix://{DEFAULT_SOCKET}")
+        if not host.startswith("unix://"):
+            return None
+        socket_path = host[len("unix://") :]
+        return cls(socket_path) if os.path.exists(socket_path) else None
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        params: Iterable[tuple[str, str]] = (),
+        body: Iterable[bytes] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[UnixHTTPConnection, http.client.HTTPResponse]:
+        query = urlencode(list(params))
+        connection = UnixHTTPConnection(self.socket_path, self.timeout)
+        try:
+            connection.request(method, f"{path}?{query}" if query else path, body=body, headers=headers or dict())
+            response = connection.getresponse()
+        except OSError as e:
+            connection.close()
+            raise EngineError(f"Cannot connect to the docker daemon at '{self.socket_path}': {e}") from e
+
+        if response.status >= 400:
+            content = response.read().decode(errors="replace")
+            connection.close()
+            try:
+                message = json.loads(content)["message"]
+            except (ValueError, KeyError, TypeError):
+                message = content.strip() or response.reason
+            raise EngineError(message, response.status)
+        return connection, response
+
+    def _messages(
+        self,
+        method: str,
+        path: str,
+        params: Iterable[tuple[str, str]] = (),
+        body: Iterable[bytes] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        # progress streams are a sequence of JSON objects, which may be split across reads
+        connection, response = self._request(method, path, params, body, headers)
+        decoder = json.JSONDecoder()
+        buffer = ""
+        try:
+            while True:
+                data = response.read1(READ_SIZE)
+                if not data:
+                    break
+                buffer += data.decode(errors="replace")
+                while True:
+                    buffer = buffer.lstrip()
+                    try:
+                        message, end = decoder.raw_decode(buffer)
+                    except ValueError:
+                        break
+                    buffer = buffer[end:]
+                    if "error" in message:
+                        detail = message.get("errorDetail") or dict()
+                        raise EngineError(detail.get("message") or message["error"])
+                    yield message
+        finally:
+            connection.close()
+
+    def ping(self) -> bool:
+        """
+        :return: true if the docker daemon responds, false otherwise
+        """
+        try:
+            connection, response = self._request("GET", "/_ping")
+        except EngineError:
+            return False
+        response.read()
+        connection.close()
+        return response.status == 200
+
+    def build(
+        self,
+        context: str,
+        dockerfile: str,
+        image_tags: list[str],
+        arguments: dict[str, str] | None = None,
+        platform: str | None = None,
+        no_cache: bool = False,
+        on_output: OutputHandler | None = None,
+    ) -> BuildResult:
+        """
+        Builds an image, streaming the build context to the engine.
+
+        :param context: path to the build context
+        :param dockerfile: path to the Dockerfile
+        :param image_tags: a list of tags for the image
+        :param arguments: a dictionary of build arguments (optional)
+        :param platform: the target platform of the image (optional)
+        :param no_cache: ignores any cached layers
+        :param on_output: a handler of the build output lines (optional)
+        :return: the build result
+        :raises EngineError: if the build fails
+        """
+        archive, dockerfile_name = context_archive(context, dockerfile)
+        params = [("dockerfile", dockerfile_name), *[("t", tag) for tag in image_tags], ("rm", "1")]
+        if arguments:
+            params.append(("buildargs", json.dumps(arguments)))
+        if platform is not None:
+            params.append(("platform", platform))
+        if no_cache:
+            params.append(("nocache", "1"))
+
+        image_id = None
+        output: list[str] = []
+        headers = {"Content-Type": "application/x-tar"}
+        for message in self._messages("POST", "/build", params, archive, headers):
+            if isinstance(message.get("aux"), dict) and "ID" in message["aux"]:
+                image_id = message["aux"]["ID"]
+            for line in message.get("stream", "").splitlines():
+                output.append(line)
+                if on_output is not None:
+                    on_output(line)
+        return BuildResult(image_id, output)
+
+    def push(self, image_tag: str, on_output: OutputHandler | None = None) -> PushResult:
+        """
+        Pushes an image tag to its registry, using the credentials of the docker config.
+
+        :param image_tag: the image tag
+        :param on_output: a handler of the push progress lines (optional)
+        :return: the push result
+        :raises EngineError: if the push fails
+        """
+        repository, tag = split_reference(image_tag)
+        auth = json.dumps(registry_auth(repository)).encode()
+        headers = {"X-Registry-Auth": base64.urlsafe_b64encode(auth).decode()}
+
+        digest = None
+        size = None
+        path = f"/images/{quote(repository, safe='/:')}/push"
+        for message in self._messages("POST", path, [("tag", tag)], headers=headers):
+            if isinstance(message.get("aux"), dict) and "Digest" in message["aux"]:
+                digest = message["aux"]["Digest"]
+                size = message["aux"].get("Size")
+            elif "status" in message and not message.get("progressDetail") and on_output is not None:
+                # per-layer progress is skipped, keeping the output readable
+                on_output(" ".join(str(message[key]) for key in ("id", "status") if key in message))
+        return PushResult(image_tag, digest, size)
+
+    def image_exists(self, image_tag: str) -> bool:
+        """
+        :param image_tag: a tag or ID of an image
+        :return: true if the image exists in the image store of the daemon
+        :raises EngineError: if the image cannot be inspected
+        """
+        try:
+            connection, response = self._request("GET", f"/images/{quote(image_tag, safe='/:')}/json")
+        except EngineError as e:
+            if e.status == 404:
+                return False
+            raise
+        response.read()
+        connection.close()
+        return True
+
+    def tag(self, source: str, image_tag: str) -> None:
+        """
+        Creates a tag that refers to an existing image.
+
+        :param source: a tag or ID of the existing image
+        :param image_tag: the new tag
+        :raises EngineError: if the image cannot be tagged
+        """
+        repository, tag = split_reference(image_tag)
+        connection, response = self._request(
+            "POST", f"/images/{quote(source, safe='/:')}/tag", [("repo", repository), ("tag", tag)]
+        )
+        response.read()
+        connection.close()
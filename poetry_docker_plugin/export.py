@@ -0,0 +1,334 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import IO, Any, Callable
+
+# Standard Library
+import gzip
+import hashlib
+import json
+import os
+import re
+import subprocess
+import tarfile
+import threading
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Project
+from .runner import CommandError
+
+# compressed layers of previous exports, reused by later exports, under the 'dist' directory
+EXPORT_DIRECTORY = ".export"
+
+# supported compressions and the extensions of the resulting archives
+COMPRESSIONS = {"gzip": ".tar.gz", "zstd": ".tar.zst"}
+
+# size of the chunks compressed in parallel
+CHUNK_SIZE = 4 << 20
+
+# the number of lines of the docker output kept for error messages
+ERROR_LINES = 20
+
+# layers of OCI layouts, as saved by docker 25 or later, and of legacy docker archives
+LAYER_PATTERN = re.compile(r"^(?:blobs/sha256/(?P<blob>[0-9a-f]{64})|(?P<layer>[0-9a-f]{64})/layer\.tar)$")
+
+
+def compressor(compression: str, level: int | None = None) -> Callable[[bytes], bytes]:
+    """
+    Creates a function compressing a chunk into a standalone gzip member or zstd frame. A
+    sequence of members, or frames, decompresses into the concatenation of their chunks,
+    thus chunks can be compressed in parallel and compressed layers can be reused as is.
+
+    :param compression: the compression, one of 'gzip' or 'zstd'
+    :param level: the compression level (optional)
+    :return: a function compressing a chunk
+    """
+    if compression == "gzip":
+        gzip_level = 6 if level is None else level
+        return lambda chunk: gzip.compress(chunk, gzip_level, mtime=0)
+
+    if compression == "zstd":
+        try:
+            # Dependencies
+            import zstandard
+        except ImportError:
+            raise RuntimeError("Compression 'zstd' requires the 'zstandard' package, install it using pip.")
+
+        zstd_level = 3 if level is None else level
+        # compressors are not thread safe, thus each chunk uses its own
+        return lambda chunk: zstandard.ZstdCompressor(level=zstd_level).compress(chunk)
+
+    raise RuntimeError(f"Unknown compression '{compression}', expected one of: {', '.join(COMPRESSIONS)}.")
+
+
+def _member_chunks(archive_file: IO[bytes], size: int, digest: Any = None) -> Iterator[bytes]:
+    # yields the content of a tar member in chunks, padding the last one to a whole tar block
+    remaining = size
+    while remaining > 0:
+        chunk = archive_file.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise RuntimeError("Unexpected end of the image archive.")
+        remaining -= len(chunk)
+        if digest is not None:
+            digest.update(chunk)
+        if remaining == 0:
+            chunk += tarfile.NUL * (-size % tarfile.BLOCKSIZE)
+        yield chunk
+
+
+class ExportResult:
+    def __init__(self, archive_path: str, digest: str, size: int, layers: list[dict[str, Any]]):
+        """
+        :param archive_path: path to the compressed archive
+        :param digest: the digest of the compressed archive
+        :param size: the size of the compressed archive in bytes
+        :param layers: the layers of the archive, each one given by its name, digest, size and compressed size
+        """
+        self.archive_path = archive_path
+        self.digest = digest
+        self.size = size
+        self.layers = layers
+
+    @property
+    def reused(self) -> int:
+        """
+        :return: the number of layers reused from previous exports
+        """
+        return sum(layer["reused"] for layer in self.layers)
+
+
+class _ArchiveWriter:
+    def __init__(self, archive_file: IO[bytes], compress: Callable[[bytes], bytes], jobs: int):
+        # writes compressed chunks in order, while up to 'jobs' chunks are compressed concurrently
+        self._archive_file = archive_file
+        self._compress = compress
+        self._jobs = jobs
+        self._executor = ThreadPoolExecutor(max_workers=jobs)
+        self._pending: deque[tuple[Future[bytes], IO[bytes] | None]] = deque()
+        self._buffer = bytearray()
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def _write(self, data: bytes, layer_file: IO[bytes] | None = None) -> None:
+        self._archive_file.write(data)
+        self.digest.update(data)
+        self.size += len(data)
+        if layer_file is not None:
+            layer_file.write(data)
+
+    def _submit(self, chunk: bytes, layer_file: IO[bytes] | None = None) -> None:
+        self._pending.append((self._executor.submit(self._compress, chunk), layer_file))
+        while len(self._pending) > self._jobs:
+            self._complete()
+
+    def _complete(self) -> None:
+        future, layer_file = self._pending.popleft()
+        self._write(future.result(), layer_file)
+
+    def buffer(self, data: bytes) -> None:
+        # small members, e.g. headers and image configurations, are compressed together
+        self._buffer += data
+        if len(self._buffer) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+
+    def compress(self, chunk: bytes, layer_file: IO[bytes] | None = None) -> None:
+        self.flush()
+        self._submit(chunk, layer_file)
+
+    def copy(self, compressed_path: str) -> None:
+        self.flush()
+        self.drain()
+        with open(compressed_path, "rb") as compressed_file:
+            for chunk in iter(lambda: compressed_file.read(CHUNK_SIZE), b""):
+                self._write(chunk)
+
+    def drain(self) -> None:
+        while self._pending:
+            self._complete()
+
+    def close(self) -> None:
+        self.flush()
+        self.drain()
+        self._executor.shutdown()
+
+
+class ArchiveExport:
+    def __init__(self, compression: str = "gzip", jobs: int | None = None, cache_path: str | None = None) -> None:
+        """
+        Creates the export settings of image archives, used for loading images on hosts
+        without access to a registry using 'docker load'.
+
+        Images are saved using 'docker save', which since docker 25 produces an archive
+        that is both an OCI image layout and a docker archive. The archive is compressed
+        in chunks in parallel, while each layer is compressed separately and kept in the
+        cache directory, so that later exports reuse the compressed layers they share.
+
+        :param compression: the compression of the archives, one of 'gzip' or 'zstd'
+        :param jobs: the number of chunks compressed concurrently (default: the number of CPUs)
+        :param cache_path: the directory holding the compressed layers (default: 'dist/.export')
+        """
+        compressor(compression)
+        self.compression = compression
+        self.jobs = jobs or os.cpu_count() or 1
+        self.cache_path = os.path.join("dist", EXPORT_DIRECTORY) if cache_path is None else cache_path
+
+    def archive_path(self, dockerfile_name: str, platform: str | None = None) -> str:
+        """
+        :param dockerfile_name: the name of the Dockerfile of the image
+        :param platform: the platform of the image (optional)
+        :return: the path to the archive of the image, under the 'dist' directory
+        """
+        suffix = "" if platform is None else f"-{platform.replace('/', '-')}"
+        return os.path.join("dist", f"{dockerfile_name}{suffix}{COMPRESSIONS[self.compression]}")
+
+    def manifest_path(self, archive_path: str) -> str:
+        """
+        :param archive_path: path to the archive of an image
+        :return: the path to the layer manifest of the archive
+        """
+        return f"{archive_path[: -len(COMPRESSIONS[self.compression])]}.layers.json"
+
+    def manifest(self, archive_path: str) -> dict[str, Any] | None:
+        """
+        :param archive_path: path to the archive of an image
+        :return: the layer manifest of the archive, or none if the archive or its manifest do not exist
+        """
+        manifest_path = self.manifest_path(archive_path)
+        if not os.path.exists(archive_path) or not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path) as manifest_file:
+                manifest: dict[str, Any] = json.load(manifest_file)
+            return manifest
+        except (OSError, ValueError):
+            return None
+
+    def export(
+        self, image_tag: str, archive_path: str, platform: str | None = None, metadata: dict[str, Any] | None = None
+    ) -> ExportResult:
+        """
+        Saves an image into a compressed archive and writes its layer manifest.
+
+        :param image_tag: the tag of the image
+        :param archive_path: path to the archive
+        :param platform: the platform of the image, for images of multiple platforms (optional)
+        :param metadata: additional entries of the layer manifest (optional)
+        :return: the exported archive
+        :raises CommandError: if 'docker save' fails
+        """
+        command = ["docker", "save", *([] if platform is None else ["--platform", platform]), image_tag]
+        compressed_layers = os.path.join(self.cache_path, self.compression)
+        os.makedirs(compressed_layers, exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
+
+        layers: list[dict[str, Any]] = []
+        invalid: Exception | None = None
+        with subprocess.Popen(
+            command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        ) as process:
+            assert process.stdout is not None and process.stderr is not None
+            # stderr is drained concurrently, so that a chatty docker never blocks on a full pipe
+            stderr = process.stderr
+            error_lines: deque[bytes] = deque(maxlen=ERROR_LINES)
+            error_reader = threading.Thread(target=lambda: error_lines.extend(stderr), daemon=True)
+            error_reader.start()
+            try:
+                with open(f"{archive_path}.tmp", "wb") as archive_file:
+                    writer = _ArchiveWriter(archive_file, compressor(self.compression), self.jobs)
+                    try:
+                        with tarfile.open(fileobj=process.stdout, mode="r|") as archive:
+                            for member in archive:
+                                layer = self._write_member(archive, member, writer, compressed_layers)
+                                if layer is not None:
+                                    layers.append(layer)
+                        # the end of the archive is marked by two empty blocks
+                        writer.buffer(tarfile.NUL * 2 * tarfile.BLOCKSIZE)
+                    finally:
+                        writer.close()
+                # drain the remaining padding, so that docker exits
+                while process.stdout.read(CHUNK_SIZE):
+                    pass
+            except (tarfile.TarError, RuntimeError) as e:
+                invalid = e
+                try:
+                    process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+            process.wait()
+            error_reader.join()
+            error = b"".join(error_lines)
+            if process.returncode != 0 or invalid is not None:
+                os.remove(f"{archive_path}.tmp")
+                # unless docker failed, the archive was invalid and docker was stopped
+                if invalid is None or process.returncode > 0:
+                    raise CommandError(command, process.returncode, _tail(error))
+                raise RuntimeError(f"Failed to read the archive of image '{image_tag}'. {invalid}")
+
+        os.replace(f"{archive_path}.tmp", archive_path)
+        result = ExportResult(archive_path, f"sha256:{writer.digest.hexdigest()}", writer.size, layers)
+        with open(self.manifest_path(archive_path), "w") as manifest_file:
+            json.dump(
+                {
+                    **(metadata or dict()),
+                    "image": image_tag,
+                    "platform": platform,
+                    "compression": self.compression,
+                    "archive": os.path.basename(archive_path),
+                    "digest": result.digest,
+                    "size": result.size,
+                    "layers": layers,
+                },
+                manifest_file,
+                indent=2,
+            )
+        return result
+
+    def _write_member(
+        self, archive: tarfile.TarFile, member: tarfile.TarInfo, writer: _ArchiveWriter, compressed_layers: str
+    ) -> dict[str, Any] | None:
+        writer.buffer(member.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape"))
+        member_file = archive.extractfile(member) if member.isfile() else None
+        if member_file is None:
+            return None
+
+        match = LAYER_PATTERN.match(member.name)
+        if match is None:
+            for chunk in _member_chunks(member_file, member.size):
+                writer.buffer(chunk)
+            return None
+
+        # layers are compressed separately, and reused if a previous export already compressed them
+        compressed_path = os.path.join(compressed_layers, match.group("blob") or match.group("layer"))
+        digest = hashlib.sha256()
+        reused = os.path.exists(compressed_path)
+        if reused:
+            for _ in _member_chunks(member_file, member.size, digest):
+                pass
+            writer.copy(compressed_path)
+        else:
+            with open(f"{compressed_path}.tmp", "wb") as layer_file:
+                for chunk in _member_chunks(member_file, member.size, digest):
+                    writer.compress(chunk, layer_file)
+                writer.drain()
+            os.replace(f"{compressed_path}.tmp", compressed_path)
+
+        return {
+            "name": member.name,
+            "digest": f"sha256:{digest.hexdigest()}",
+            "size": member.size,
+            "compressed_size": os.path.getsize(compressed_path),
+            "reused": reused,
+        }
+
+
+def _tail(output: bytes, lines: int = ERROR_LINES) -> list[str]:
+    return output.decode(errors="replace").splitlines()[-lines:]
@@ -0,0 +1,163 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import Callable, Optional
+
+# Standard Library
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+# Project
+from .docker_builder import ImageBuild
+
+# images are identified by their name in [tool.docker], or none for a single image
+ImageName = Optional[str]
+
+
+def normalize_reference(reference: str) -> str:
+    """
+    Normalizes an image reference, so that references to the same image of Docker Hub
+    are identical, e.g. 'python' and 'docker.io/library/python:latest'.
+
+    :param reference: an image reference
+    :return: the normalized image reference
+    """
+    for prefix in ("docker.io/library/", "docker.io/", "index.docker.io/library/", "index.docker.io/"):
+        if reference.startswith(prefix):
+            reference = reference[len(prefix) :]
+            break
+    name = reference.rsplit("/", 1)[-1]
+    if ":" not in name and "@" not in name:
+        reference = f"{reference}:latest"
+    return reference
+
+
+def image_dependencies(image_builds: dict[ImageName, ImageBuild]) -> dict[ImageName, dict[str, ImageName]]:
+    """
+    Finds the images that are based on other images of the project, that is, images whose
+    base image is a tag of another image.
+
+    :param image_builds: a dictionary of image names and their planned builds
+    :return: a dictionary of image names to their base images, each one given by its reference and image name
+    """
+    tags = {
+        normalize_reference(tag): name for name, image_build in image_builds.items() for tag in image_build.image_tags
+    }
+
+    dependencies: dict[ImageName, dict[str, ImageName]] = dict()
+    for name, image_build in image_builds.items():
+        base_images = image_build.docker_file.base_images(image_build.arguments)
+        dependencies[name] = {
+            base_image: tags[normalize_reference(base_image)]
+            for base_image in base_images
+            if tags.get(normalize_reference(base_image), name) != name
+        }
+    return dependencies
+
+
+def topological_order(graph: dict[ImageName, set[ImageName]]) -> list[ImageName]:
+    """
+    Orders the images of a dependency graph, so that every image comes after its base images.
+
+    :param graph: a dictionary of image names to the names of their base images
+    :return: the image names in build order
+    :raises RuntimeError: if the graph contains a cycle
+    """
+    remaining = {name: set(bases) for name, bases in graph.items()}
+    order: list[ImageName] = []
+    while remaining:
+        ready = sorted((name for name, bases in remaining.items() if not bases), key=str)
+        if not ready:
+            cycle = ", ".join(f"'{name}'" for name in sorted(remaining, key=str))
+            raise RuntimeError(f"Images {cycle} are based on each other.")
+        for name in ready:
+            del remaining[name]
+        for bases in remaining.values():
+            bases.difference_update(ready)
+        order.extend(ready)
+    return order
+
+
+def dependent_images(graph: dict[ImageName, set[ImageName]], names: set[ImageName]) -> set[ImageName]:
+    """
+    Finds the given images and every image based on them, directly or through other images.
+
+    :param graph: a dictionary of image names to the names of their base images
+    :param names: the names of the images
+    :return: the names of the given images and their dependent images
+    """
+    dependents = {name for name in names if name in graph}
+    while True:
+        more = {name for name, bases in graph.items() if name not in dependents and bases & dependents}
+        if not more:
+            return dependents
+        dependents |= more
+
+
+def _run_task(run: Callable[[ImageName], None], name: ImageName) -> str | None:
+    # runs the task of an image, returning its failure message if it fails
+    try:
+        run(name)
+    except RuntimeError as e:
+        return str(e)
+    except Exception as e:  # noqa: BLE001
+        # unexpected errors fail their image only, so that the remaining images still complete
+        return f"Unexpected error {type(e).__name__}: {e}"
+    return None
+
+
+def run_graph(
+    graph: dict[ImageName, set[ImageName]],
+    run: Callable[[ImageName], None],
+    jobs: int = 1,
+) -> dict[ImageName, str]:
+    """
+    Runs a task for every image of a dependency graph, once the tasks of all its base images
+    succeeded. Independent images run concurrently, while images whose base images failed
+    are skipped. A single job runs the tasks in the calling thread, e.g. so that a profiler
+    of the calling thread records them.
+
+    :param graph: a dictionary of image names to the names of their base images
+    :param run: the task to run for each image, raising an error on failure
+    :param jobs: the maximum number of concurrent tasks
+    :return: a dictionary of failed or skipped image names and their failure messages
+    :raises RuntimeError: if the graph contains a cycle
+    """
+    order = topological_order(graph)
+    failures: dict[ImageName, str] = dict()
+
+    if jobs == 1:
+        for name in order:
+            failed = sorted((base for base in graph[name] if base in failures), key=str)
+            failure = f"Skipped, since base image '{failed[0]}' failed to build." if failed else _run_task(run, name)
+            if failure is not None:
+                failures[name] = failure
+        return failures
+
+    completed: set[ImageName] = set()
+    running: dict[Future[str | None], ImageName] = dict()
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while order or running:
+            for name in list(order):
+                failed = sorted((base for base in graph[name] if base in failures), key=str)
+                if failed:
+                    order.remove(name)
+                    failures[name] = f"Skipped, since base image '{failed[0]}' failed to build."
+                elif graph[name].issubset(completed):
+                    order.remove(name)
+                    running[executor.submit(_run_task, run, name)] = name
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                failure = future.result()
+                if failure is None:
+                    completed.add(name)
+                else:
+                    failures[name] = failure
+
+    return failures
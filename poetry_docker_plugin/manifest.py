@@ -0,0 +1,97 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import Any
+
+# Standard Library
+import hashlib
+import json
+import os
+import threading
+
+# Project
+from .context import source_files
+
+MANIFEST_PATH = "dist/.docker-manifest.json"
+
+
+def image_digest(
+    dockerfile: str,
+    arguments: dict[str, str] | None,
+    platform: list[str],
+    sources: list[str],
+    context: str = "dist",
+    base_digests: list[str] | None = None,
+) -> str:
+    """
+    Computes a digest of all inputs of a docker image build, that is, the docker file
+    content, the build arguments, the target platforms and the content of every file
+    copied from the build context.
+
+    :param dockerfile: the content of the docker file
+    :param arguments: a dictionary of build arguments
+    :param platform: a list of image platform
+    :param sources: the sources of all COPY instructions, relative to the build context
+    :param context: the build context directory
+    :param base_digests: the digests of base images built by the project, if any (optional)
+    :return: the hex digest of the build inputs
+    """
+    digest = hashlib.sha256()
+    digest.update(dockerfile.encode())
+    digest.update(json.dumps(arguments or dict(), sort_keys=True).encode())
+    digest.update(json.dumps(sorted(platform)).encode())
+    if base_digests:
+        digest.update(json.dumps(base_digests).encode())
+
+    for source in sources:
+        digest.update(f"\0{source}\0".encode())
+        for path in source_files(source, context):
+            digest.update(f"{os.path.relpath(path, context)}\0".encode())
+            with open(path, "rb") as source_file:
+                for chunk in iter(lambda: source_file.read(1 << 20), b""):
+                    digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path: str = MANIFEST_PATH) -> None:
+        """
+        Creates a manifest recording the digest of the last successful build of each image.
+
+        :param path: path to the manifest file
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = dict()
+        if os.path.exists(path):
+            try:
+                with open(path) as manifest_file:
+                    self._entries = json.load(manifest_file)
+            except (OSError, ValueError):
+                self._entries = dict()
+
+    def get(self, dockerfile_name: str) -> dict[str, Any] | None:
+        """
+        :param dockerfile_name: the name of the Dockerfile of the image
+        :return: the entry of the last successful build of the image, if any
+        """
+        with self._lock:
+            return self._entries.get(dockerfile_name)
+
+    def record(self, dockerfile_name: str, digest: str, image_tags: list[str], pushed: bool) -> None:
+        """
+        Records a successful build of an image and stores the manifest.
+
+        :param dockerfile_name: the name of the Dockerfile of the image
+        :param digest: the digest of the build inputs
+        :param image_tags: a list of tags for the docker image
+        :param pushed: true if the image tags have been pushed to the registry
+        """
+        with self._lock:
+            self._entries[dockerfile_name] = {"digest": digest, "tags": image_tags, "pushed": pushed}
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            with open(f"{self._path}.tmp", "w") as manifest_file:
+                json.dump(self._entries, manifest_file, indent=2, sort_keys=True)
+            os.replace(f"{self._path}.tmp", self._path)
@@ -0,0 +1,97 @@
+# Futures
+from __future__ import annotations
+
+# Standard Library
+import re
+
+# Project
+from .docker_builder import Arg, Env, From, Instruction, Labels, Run
+
+# commands that cannot be safely chained, e.g. comments, here-documents or trailing background jobs
+UNCHAINABLE_COMMAND = re.compile(r"#|<<|\n|&\s*$|\\\s*$")
+
+# commands holding shell lists or pipelines, whose operators would bind with the chained commands
+COMPOUND_COMMAND = re.compile(r"[;&|]")
+
+# shell builtins that change the state of the shell for the commands that follow
+STATEFUL_COMMAND = re.compile(
+    r"(^|[;&|(]\s*)(cd|pushd|popd|export|unset|set|source|\.|umask|ulimit|alias|shopt|trap|exit|exec)(\s|;|$)"
+)
+
+
+def _chain(commands: list[str]) -> str:
+    # each RUN instruction starts a fresh shell, so commands that change the shell state run in a subshell, as
+    # well as compound commands, e.g. 'a || true', so that a failure of any chained command fails the instruction
+    return " && ".join(
+        f"({command})" if STATEFUL_COMMAND.search(command) or COMPOUND_COMMAND.search(command) else command
+        for command in commands
+    )
+
+
+def _references(value: str, names: dict[str, str]) -> bool:
+    return any(re.search(rf"\${{?{re.escape(name)}\b", value) for name in names)
+
+
+def optimize(instructions: list[Instruction]) -> list[Instruction]:
+    """
+    Optimizes a sequence of docker instructions, without changing the resulting image:
+
+    * adjacent RUN instructions, which share the same WORKDIR, USER and mounts, are chained into a single layer
+    * adjacent LABEL and ENV instructions are collapsed into a single instruction
+    * ARG instructions that redeclare an argument of the same build stage are dropped
+
+    :param instructions: a list of docker instructions
+    :return: the optimized list of docker instructions
+    """
+    optimized: list[Instruction] = []
+    declared_args: dict[str, str | None] = dict()
+    run_commands: list[str] = []
+
+    for instruction in instructions:
+        previous = optimized[-1] if optimized else None
+
+        if isinstance(instruction, Run):
+            if (
+                isinstance(previous, Run)
+                and run_commands
+                and not UNCHAINABLE_COMMAND.search(instruction.command)
+                and [str(mount) for mount in previous.mounts] == [str(mount) for mount in instruction.mounts]
+            ):
+                run_commands.append(instruction.command)
+                optimized[-1] = Run(_chain(run_commands), instruction.mounts)
+            else:
+                run_commands = [] if UNCHAINABLE_COMMAND.search(instruction.command) else [instruction.command]
+                optimized.append(instruction)
+            continue
+
+        if isinstance(instruction, From):
+            # arguments are scoped by build stage
+            declared_args = dict()
+        elif isinstance(instruction, Arg):
+            if instruction.name in declared_args and instruction.default_value in (
+                None,
+                declared_args[instruction.name],
+            ):
+                continue
+            declared_args[instruction.name] = instruction.default_value
+        elif isinstance(instruction, Labels):
+            if not instruction.labels:
+                continue
+            if isinstance(previous, Labels):
+                optimized[-1] = Labels({**previous.labels, **instruction.labels}, single_instruction=True)
+            else:
+                optimized.append(Labels(dict(instruction.labels), single_instruction=True))
+            continue
+        elif isinstance(instruction, Env):
+            variables = previous.variables if isinstance(previous, Env) else dict()
+            if (
+                isinstance(previous, Env)
+                and not set(variables).intersection(instruction.variables)
+                and not any(_references(value, variables) for value in instruction.variables.values())
+            ):
+                optimized[-1] = Env.of({**variables, **instruction.variables})
+                continue
+
+        optimized.append(instruction)
+
+    return optimized
@@ -0,0 +1,319 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import Any, NoReturn
+
+# Standard Library
+import glob
+import hashlib
+import json
+import os
+from collections.abc import Sequence
+
+# Project
+from .docker_builder import (
+    Arg,
+    BuildCache,
+    Cmd,
+    Copy,
+    EntryPoint,
+    Env,
+    Expose,
+    From,
+    Instruction,
+    Labels,
+    Mount,
+    Run,
+    User,
+    Volume,
+    WorkDir,
+)
+
+PLAN_CACHE_PATH = "dist/.docker-plan.json"
+
+# the version of the plan format, bumped whenever the planning of images changes
+PLAN_VERSION = 1
+
+INSTRUCTION_TYPES: dict[str, type[Instruction]] = {
+    cls.__name__: cls for cls in (Arg, Labels, From, Copy, Env, Expose, Volume, WorkDir, User, Run, Cmd, EntryPoint)
+}
+
+
+def _slots(cls: type) -> list[str]:
+    return [slot for klass in reversed(cls.__mro__) for slot in getattr(klass, "__slots__", ())]
+
+
+def _encode(value: Instruction | Mount) -> dict[str, Any]:
+    fields = {slot.lstrip("_"): getattr(value, slot) for slot in _slots(type(value))}
+    if isinstance(value, Run):
+        fields["mounts"] = [_encode(mount) for mount in value.mounts]
+    return fields if isinstance(value, Mount) else {"instruction": type(value).__name__, **fields}
+
+
+def _decode(cls: type[Any], fields: dict[str, Any]) -> Any:
+    # plans are only read from trusted caches, thus the validation of constructors is skipped
+    value = object.__new__(cls)
+    for slot in _slots(cls):
+        field = fields[slot.lstrip("_")]
+        setattr(value, slot, [_decode(Mount, mount) for mount in field] if cls is Run and slot == "_mounts" else field)
+    return value
+
+
+def encode_instruction(instruction: Instruction) -> dict[str, Any]:
+    """
+    :param instruction: a docker instruction
+    :return: the instruction as a JSON serializable dictionary
+    """
+    return _encode(instruction)
+
+
+def decode_instruction(data: dict[str, Any]) -> Instruction:
+    """
+    :param data: a docker instruction, as encoded by 'encode_instruction'
+    :return: the docker instruction
+    """
+    fields = dict(data)
+    return _decode(INSTRUCTION_TYPES[fields.pop("instruction")], fields)  # type: ignore[no-any-return]
+
+
+class _Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> NoReturn:
+        raise AttributeError(f"'{type(self).__name__}' is immutable.")
+
+    def __delattr__(self, name: str) -> NoReturn:
+        raise AttributeError(f"'{type(self).__name__}' is immutable.")
+
+
+class ImagePlan(_Frozen):
+    __slots__ = (
+        "arguments",
+        "cache_from",
+        "cache_mode",
+        "cache_to",
+        "dockerfile_name",
+        "image_tags",
+        "instructions",
+        "name",
+        "oci_path",
+        "platform",
+        "push",
+        "secrets",
+        "sources",
+    )
+
+    def __init__(
+        self,
+        name: str | None,
+        dockerfile_name: str,
+        image_tags: Sequence[str],
+        platform: Sequence[str],
+        arguments: dict[str, str],
+        instructions: Sequence[Instruction],
+        sources: Sequence[str],
+        cache: BuildCache,
+        push: bool = False,
+        secrets: Sequence[str] = (),
+        oci_path: str | None = None,
+    ):
+        """
+        Creates the immutable plan of an image build, that is, everything needed for building
+        the image, resolved from the docker configuration.
+
+        :param name: the name of the image in [tool.docker], or none for a single image
+        :param dockerfile_name: the name of the Dockerfile of the image
+        :param image_tags: the tags of the image
+        :param platform: the target platforms of the image
+        :param arguments: the build arguments given by the user
+        :param instructions: the docker instructions of the image
+        :param sources: the files copied from the build context, relative to the 'dist' directory
+        :param cache: the layer cache settings of the build
+        :param push: pushes the image to the registry
+        :param secrets: the secrets exposed to RUN secret mounts
+        :param oci_path: path to an OCI layout tarball the image is exported to (optional)
+        """
+        for slot, value in (
+            ("name", name),
+            ("dockerfile_name", dockerfile_name),
+            ("image_tags", tuple(image_tags)),
+            ("platform", tuple(platform)),
+            ("arguments", dict(arguments)),
+            ("instructions", tuple(instructions)),
+            ("sources", tuple(sources)),
+            ("cache_mode", cache.mode),
+            ("cache_from", tuple(cache.cache_from)),
+            ("cache_to", tuple(cache.cache_to)),
+            ("push", push),
+            ("secrets", tuple(secrets)),
+            ("oci_path", oci_path),
+        ):
+            object.__setattr__(self, slot, value)
+
+    # declared for type checkers, since the attributes are set through object.__setattr__
+    name: str | None
+    dockerfile_name: str
+    image_tags: tuple[str, ...]
+    platform: tuple[str, ...]
+    arguments: dict[str, str]
+    instructions: tuple[Instruction, ...]
+    sources: tuple[str, ...]
+    cache_mode: str
+    cache_from: tuple[str, ...]
+    cache_to: tuple[str, ...]
+    push: bool
+    secrets: tuple[str, ...]
+    oci_path: str | None
+
+    def cache(self) -> BuildCache:
+        """
+        :return: the layer cache settings of the build
+        """
+        return BuildCache(self.cache_mode, list(self.cache_from), list(self.cache_to))
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        :return: the plan as a JSON serializable dictionary
+        """
+        return {
+            "name": self.name,
+            "dockerfile_name": self.dockerfile_name,
+            "image_tags": list(self.image_tags),
+            "platform": list(self.platform),
+            "arguments": self.arguments,
+            "instructions": [encode_instruction(instruction) for instruction in self.instructions],
+            "sources": list(self.sources),
+            "cache": {"mode": self.cache_mode, "from": list(self.cache_from), "to": list(self.cache_to)},
+            "push": self.push,
+            "secrets": list(self.secrets),
+            "oci_path": self.oci_path,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ImagePlan:
+        """
+        :param data: an image plan, as returned by 'to_dict'
+        :return: the image plan
+        """
+        return cls(
+            data["name"],
+            data["dockerfile_name"],
+            data["image_tags"],
+            data["platform"],
+            data["arguments"],
+            [decode_instruction(instruction) for instruction in data["instructions"]],
+            data["sources"],
+            BuildCache(data["cache"]["mode"], data["cache"]["from"], data["cache"]["to"]),
+            data["push"],
+            data["secrets"],
+            data["oci_path"],
+        )
+
+
+class BuildPlan(_Frozen):
+    __slots__ = ("images", "key", "package_mode", "project_name", "project_version")
+
+    def __init__(
+        self, key: str, project_name: str, project_version: str, package_mode: bool, images: Sequence[ImagePlan]
+    ):
+        """
+        Creates the immutable plan of all image builds of a project.
+
+        :param key: the digest of the planning inputs, see 'plan_key'
+        :param project_name: the name of the project
+        :param project_version: the version of the project
+        :param package_mode: true if the project is packaged, false otherwise
+        :param images: the plans of the images
+        """
+        object.__setattr__(self, "key", key)
+        object.__setattr__(self, "project_name", project_name)
+        object.__setattr__(self, "project_version", project_version)
+        object.__setattr__(self, "package_mode", package_mode)
+        object.__setattr__(self, "images", tuple(images))
+
+    key: str
+    project_name: str
+    project_version: str
+    package_mode: bool
+    images: tuple[ImagePlan, ...]
+
+    def is_complete(self, context: str = "dist") -> bool:
+        """
+        :param context: the build context directory
+        :return: true if every source of the planned images exists, e.g. the distribution and requirements files
+        """
+        return all(
+            glob.glob(os.path.join(context, source.lstrip("/")))
+            for image in self.images
+            for source in image.sources
+            if "$" not in source
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        :return: the plan as a JSON serializable dictionary
+        """
+        return {
+            "version": PLAN_VERSION,
+            "key": self.key,
+            "project": {"name": self.project_name, "version": self.project_version, "package_mode": self.package_mode},
+            "images": [image.to_dict() for image in self.images],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> BuildPlan:
+        """
+        :param data: a build plan, as returned by 'to_dict'
+        :return: the build plan
+        """
+        project = data["project"]
+        images = [ImagePlan.from_dict(image) for image in data["images"]]
+        return cls(data["key"], project["name"], project["version"], project["package_mode"], images)
+
+    def write(self, path: str = PLAN_CACHE_PATH) -> None:
+        """
+        Writes the plan, so that subsequent invocations with the same inputs reuse it.
+
+        :param path: path to the plan file
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as plan_file:
+            json.dump(self.to_dict(), plan_file)
+
+    @classmethod
+    def load(cls, key: str, path: str = PLAN_CACHE_PATH) -> BuildPlan | None:
+        """
+        :param key: the digest of the current planning inputs
+        :param path: path to the plan file
+        :return: the cached plan, or none if there is no valid plan for the given key
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as plan_file:
+                data = json.load(plan_file)
+            if data.get("version") != PLAN_VERSION or data.get("key") != key:
+                return None
+            return cls.from_dict(data)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+
+def plan_key(paths: Sequence[str], options: dict[str, Any]) -> str:
+    """
+    Computes a digest of the planning inputs, that is, the content of the project files and
+    the options affecting the planned images.
+
+    :param paths: the project files, e.g. 'pyproject.toml' and 'poetry.lock'; missing files are skipped
+    :param options: a JSON serializable dictionary of the planning options
+    :return: the hex digest of the planning inputs
+    """
+    digest = hashlib.sha256(f"{PLAN_VERSION}\0".encode())
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    for path in paths:
+        digest.update(f"\0{os.path.basename(path)}\0".encode())
+        if os.path.exists(path):
+            with open(path, "rb") as project_file:
+                digest.update(project_file.read())
+    return digest.hexdigest()
@@ -0,0 +1,163 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import Any
+
+# Standard Library
+import hashlib
+import os
+import re
+from collections.abc import Iterable, Mapping
+
+LOCK_HASH_HEADER = "# poetry.lock sha256:"
+
+
+def canonicalize_name(name: str) -> str:
+    """
+    Normalizes a distribution name according to PEP 503.
+
+    :param name: a distribution name
+    :return: the normalized name
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def lock_hash(lock_path: str) -> str:
+    """
+    Computes the SHA-256 digest of a lock file content.
+
+    :param lock_path: path to the lock file
+    :return: the hex digest of the lock file
+    """
+    with open(lock_path, "rb") as lock_file:
+        return hashlib.sha256(lock_file.read()).hexdigest()
+
+
+def export_requirements(
+    lock_path: str, requirements_path: str, root_dependencies: Iterable[str] | Mapping[str, str]
+) -> bool:
+    """
+    Exports the locked runtime dependencies of a project into a pip requirements file,
+    pinning every package to its locked version and hashes.
+
+    The requirements file records the digest of the lock file it was exported from and
+    it is only regenerated when the lock file content changes.
+
+    :param lock_path: path to the poetry lock file
+    :param requirements_path: path to the resulting requirements file
+    :param root_dependencies: names of the project runtime dependencies, or a dictionary of their names and
+        environment markers, empty for unconditional dependencies
+    :return: true if the requirements file was (re)generated, false if it was up to date
+    """
+    digest = lock_hash(lock_path)
+    header = f"{LOCK_HASH_HEADER} {digest}"
+    if os.path.exists(requirements_path):
+        with open(requirements_path) as requirements_file:
+            if requirements_file.readline().strip() == header:
+                return False
+
+    # Dependencies
+    import tomlkit
+
+    with open(lock_path) as lock_file:
+        lock_data: dict[str, Any] = tomlkit.parse(lock_file.read()).unwrap()
+
+    packages = _runtime_packages(lock_data.get("package", list()), root_dependencies)
+    hashed = all(package.get("files") for package, _ in packages)
+
+    lines = [header]
+    for url in sorted({package["source"]["url"] for package, _ in packages if _source_type(package) == "legacy"}):
+        lines.append(f"--extra-index-url {url}")
+
+    for package, markers in sorted(packages, key=lambda p: canonicalize_name(p[0]["name"])):
+        requirement = _requirement(package, markers)
+        if hashed:
+            requirement += "".join(f" \\\n    --hash={file['hash']}" for file in package["files"])
+        lines.append(requirement)
+
+    os.makedirs(os.path.dirname(os.path.abspath(requirements_path)), exist_ok=True)
+    with open(requirements_path, "w") as requirements_file:
+        requirements_file.write("\n".join(lines) + "\n")
+
+    return True
+
+
+def _source_type(package: dict[str, Any]) -> str | None:
+    source: dict[str, Any] = package.get("source", dict())
+    return source.get("type")
+
+
+def _requirement(package: dict[str, Any], markers: str | None) -> str:
+    name, version = package["name"], package["version"]
+    source: dict[str, Any] = package.get("source", dict())
+    source_type = source.get("type")
+    if source_type == "git":
+        reference = source.get("resolved_reference") or source.get("reference")
+        requirement = f"{name} @ git+{source['url']}@{reference}"
+    elif source_type == "url":
+        requirement = f"{name} @ {source['url']}"
+    elif source_type in {"directory", "file"}:
+        raise RuntimeError(f"Package '{name}' is installed from a local path and cannot be exported.")
+    else:
+        requirement = f"{name}=={version}"
+
+    return requirement if not markers else f"{requirement} ; {markers}"
+
+
+def _edge_markers(constraint: Any) -> list[frozenset[str]]:
+    # the markers of a dependency, given by one constraint or by a list of alternative constraints
+    constraints = constraint if isinstance(constraint, list) else [constraint]
+    markers = [
+        frozenset([c["markers"]]) if isinstance(c, dict) and c.get("markers") else frozenset() for c in constraints
+    ]
+    return [frozenset()] if frozenset() in markers else markers
+
+
+def _marker(alternatives: list[frozenset[str]]) -> str | None:
+    # joins the markers of every path to a package, each one the conjunction of the markers along the path
+    if not alternatives or frozenset() in alternatives:
+        return None
+    conjunctions = [
+        " and ".join(
+            f"({marker})" if " or " in marker and len(conjuncts) > 1 else marker for marker in sorted(conjuncts)
+        )
+        for conjuncts in alternatives
+    ]
+    if len(conjunctions) == 1:
+        return conjunctions[0]
+    return " or ".join(
+        f"({conjunction})" if " and " in conjunction else conjunction for conjunction in sorted(conjunctions)
+    )
+
+
+def _runtime_packages(
+    packages: list[dict[str, Any]], root_dependencies: Iterable[str] | Mapping[str, str]
+) -> list[tuple[dict[str, Any], str | None]]:
+    # lock files since version 2.1 declare the groups and the markers of each package
+    if packages and all("groups" in package for package in packages):
+        runtime = []
+        for package in packages:
+            if "main" in package["groups"]:
+                markers = package.get("markers")
+                runtime.append((package, markers.get("main") if isinstance(markers, dict) else markers))
+        return runtime
+
+    # otherwise, walk the dependency tree starting from the project runtime dependencies, where a package
+    # is installed if the markers along any path to it hold, thus the markers of every path are collected
+    roots = root_dependencies if isinstance(root_dependencies, Mapping) else dict.fromkeys(root_dependencies, "")
+    by_name = {canonicalize_name(package["name"]): package for package in packages}
+    paths: dict[str, list[frozenset[str]]] = dict()
+    pending = [
+        (canonicalize_name(name), frozenset([marker]) if marker else frozenset()) for name, marker in roots.items()
+    ]
+    while pending:
+        name, conjuncts = pending.pop()
+        # a path whose markers are implied by the ones of another path adds nothing
+        if name not in by_name or any(other <= conjuncts for other in paths.get(name, [])):
+            continue
+        paths[name] = [other for other in paths.get(name, []) if not conjuncts <= other] + [conjuncts]
+        for dependency, constraint in by_name[name].get("dependencies", dict()).items():
+            pending.extend((canonicalize_name(dependency), conjuncts | edge) for edge in _edge_markers(constraint))
+
+    return [(by_name[name], _marker(alternatives)) for name, alternatives in paths.items()]
@@ -0,0 +1,92 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import TYPE_CHECKING
+
+# Standard Library
+import os
+import subprocess
+import threading
+from collections import deque
+from contextlib import ExitStack
+
+# Dependencies
+from cleo.formatters.formatter import Formatter
+
+if TYPE_CHECKING:
+    # Dependencies
+    from cleo.io.io import IO
+
+
+class CommandError(RuntimeError):
+    def __init__(self, command: list[str], return_code: int, tail: list[str]):
+        """
+        Raised when an external command exits with a non-zero code.
+
+        :param command: the failed command
+        :param return_code: the exit code of the command
+        :param tail: the last lines of the command output
+        """
+        self.command = command
+        self.return_code = return_code
+        self.tail = tail
+        output = "".join(f"\n    {line}" for line in tail)
+        super().__init__(f"Command '{' '.join(command[:2])}' failed with exit code {return_code}.{output}")
+
+
+def run_command(
+    command: list[str],
+    io: IO,
+    prefix: str = "",
+    log_path: str | None = None,
+    tail: int = 20,
+    lock: threading.Lock | None = None,
+) -> list[str]:
+    """
+    Runs an external command and forwards its output, line by line, as it arrives. Only
+    the last lines of the output are kept in memory, regardless of the output size.
+
+    :param command: the command to run
+    :param io: the console IO the output is forwarded to
+    :param prefix: a prefix for each output line
+    :param log_path: path to a file the output is appended to (optional)
+    :param tail: the number of output lines to keep
+    :param lock: a lock serializing the output of concurrent commands (optional)
+    :return: the last lines of the command output
+    :raises CommandError: if the command exits with a non-zero code
+    """
+    last_lines: deque[str] = deque(maxlen=tail)
+    if log_path is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+
+    with ExitStack() as stack:
+        log_file = None if log_path is None else stack.enter_context(open(log_path, "a"))
+        process = stack.enter_context(
+            subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                bufsize=1,
+            )
+        )
+        assert process.stdout is not None
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            last_lines.append(line)
+            if log_file is not None:
+                log_file.write(f"{line}\n")
+            if lock is None:
+                io.write_line(f"{prefix}{Formatter.escape(line)}")
+            else:
+                with lock:
+                    io.write_line(f"{prefix}{Formatter.escape(line)}")
+        return_code = process.wait()
+
+    if return_code != 0:
+        raise CommandError(command, return_code, list(last_lines))
+
+    return list(last_lines)
@@ -0,0 +1,109 @@
+# Futures
+from __future__ import annotations
+
+# Standard Library
+import re
+from collections.abc import Mapping
+
+VARIABLE_PATTERN = re.compile(r"@\(([\w.-]+)\)")
+
+
+class UndeclaredVariableError(RuntimeError):
+    def __init__(self, undeclared: list[tuple[str, str]]):
+        """
+        Raised when templates reference variables that have no value.
+
+        :param undeclared: a list of undeclared variable names along with their config location
+        """
+        self.undeclared = undeclared
+        variables = ", ".join(f"'@({name})' in {location}" for name, location in undeclared)
+        super().__init__(f"No value found for variables: {variables}.")
+
+
+class Template:
+    __slots__ = ("_literals", "_variables")
+
+    def __init__(self, text: str):
+        """
+        Compiles a text holding variables of the form @(name) into a sequence of literal
+        segments interleaved by variable names, so that it can be rendered in a single pass.
+
+        :param text: the template text
+        """
+        segments = VARIABLE_PATTERN.split(text)
+        self._literals = segments[0::2]
+        self._variables = segments[1::2]
+
+    @property
+    def variables(self) -> list[str]:
+        """
+        :return: the names of all variables referenced by the template
+        """
+        return list(self._variables)
+
+    def render(self, variables: Mapping[str, str]) -> tuple[str, list[str]]:
+        """
+        Renders the template. Undeclared variables are kept as is.
+
+        :param variables: a mapping of variable names to their values
+        :return: the rendered text and the names of the undeclared variables
+        """
+        if not self._variables:
+            return self._literals[0], []
+
+        parts = [self._literals[0]]
+        undeclared = []
+        for name, literal in zip(self._variables, self._literals[1:]):
+            value = variables.get(name)
+            if value is None:
+                undeclared.append(name)
+                value = f"@({name})"
+            parts.append(value)
+            parts.append(literal)
+        return "".join(parts), undeclared
+
+
+class TemplateEngine:
+    def __init__(self, variables: Mapping[str, str]):
+        """
+        Renders configuration templates, caching their compiled form, and collects every
+        undeclared variable along with its config location.
+
+        :param variables: a mapping of variable names to their values
+        """
+        self._variables = dict(variables)
+        self._templates: dict[str, Template] = dict()
+        self._undeclared: list[tuple[str, str]] = []
+
+    def compile(self, text: str) -> Template:
+        """
+        :param text: the template text
+        :return: the compiled template, cached across calls
+        """
+        template = self._templates.get(text)
+        if template is None:
+            template = self._templates[text] = Template(text)
+        return template
+
+    def render(self, text: str, location: str = "") -> str:
+        """
+        Renders a template text, recording any undeclared variables.
+
+        :param text: the template text
+        :param location: the config location of the text, used for reporting undeclared variables
+        :return: the rendered text
+        """
+        rendered, undeclared = self.compile(text).render(self._variables)
+        self._undeclared.extend((name, location) for name in undeclared)
+        return rendered
+
+    def check(self) -> None:
+        """
+        Verifies that all rendered templates declared their variables, and resets the
+        collected undeclared variables.
+
+        :raises UndeclaredVariableError: if any rendered template references undeclared variables
+        """
+        undeclared, self._undeclared = self._undeclared, []
+        if undeclared:
+            raise UndeclaredVariableError(undeclared)
@@ -0,0 +1,74 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import Any
+
+# Standard Library
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class Timings:
+    def __init__(self) -> None:
+        """
+        Records the wall-clock time of the phases of a build, either global or per image.
+        """
+        self._lock = threading.Lock()
+        self._records: list[dict[str, Any]] = []
+
+    @contextmanager
+    def phase(self, name: str, image: str | None = None) -> Iterator[None]:
+        """
+        Measures the wall-clock time of a phase.
+
+        :param name: the name of the phase
+        :param image: the name of the image the phase refers to (optional)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, image)
+
+    def record(self, name: str, seconds: float, image: str | None = None) -> None:
+        """
+        Records the wall-clock time of a phase.
+
+        :param name: the name of the phase
+        :param seconds: the wall-clock time of the phase in seconds
+        :param image: the name of the image the phase refers to (optional)
+        """
+        with self._lock:
+            self._records.append({"phase": name, "image": image, "seconds": seconds})
+
+    def records(self) -> list[dict[str, Any]]:
+        """
+        :return: all recorded phases in order of completion
+        """
+        with self._lock:
+            return list(self._records)
+
+    def report(self) -> list[str]:
+        """
+        :return: a human-readable line for each recorded phase
+        """
+        lines = []
+        for record in self.records():
+            label = record["phase"] if record["image"] is None else f"{record['phase']} [{record['image']}]"
+            lines.append(f"{label:<40} {record['seconds']:>9.3f}s")
+        return lines
+
+    def write(self, path: str) -> None:
+        """
+        Writes a machine-readable JSON report of all recorded phases.
+
+        :param path: path to the JSON report
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as report_file:
+            json.dump({"created": time.time(), "phases": self.records()}, report_file, indent=2)
@@ -0,0 +1,222 @@
+# Futures
+from __future__ import annotations
+
+# Standard Library
+import hashlib
+import os
+import stat
+import struct
+
+INDEX_ENTRY_FORMAT = struct.Struct(">10I20sH")
+
+
+class UnsupportedRepositoryError(RuntimeError):
+    """
+    Raised when a repository layout cannot be read directly, e.g. reftable references,
+    SHA-256 object names or index version 4.
+    """
+
+
+class GitRepository:
+    def __init__(self, git_dir: str, work_tree: str):
+        """
+        Creates a lightweight reader of a git repository, which reads HEAD, references and
+        the index directly from the git directory, without spawning git processes.
+
+        Worktrees and submodules, whose '.git' is a file pointing to the actual git
+        directory, are supported through the 'gitdir' and 'commondir' files.
+
+        :param git_dir: path to the git directory
+        :param work_tree: path to the working tree
+        """
+        self.git_dir = git_dir
+        self.work_tree = work_tree
+        self.common_dir = git_dir
+        common_dir_path = os.path.join(git_dir, "commondir")
+        if os.path.exists(common_dir_path):
+            with open(common_dir_path) as common_dir_file:
+                self.common_dir = os.path.normpath(os.path.join(git_dir, common_dir_file.read().strip()))
+
+    @classmethod
+    def find(cls, path: str = ".") -> GitRepository | None:
+        """
+        Searches for a git repository in the given directory and its parents.
+
+        :param path: the directory to start searching from
+        :return: the repository, or none if the directory is not inside a git repository
+        """
+        directory = os.path.abspath(path)
+        while True:
+            candidate = os.path.join(directory, ".git")
+            if os.path.isdir(candidate):
+                return cls(candidate, directory)
+            if os.path.isfile(candidate):
+                with open(candidate) as git_file:
+                    content = git_file.read().strip()
+                if content.startswith("gitdir:"):
+                    git_dir = os.path.join(directory, content[len("gitdir:") :].strip())
+                    return cls(os.path.normpath(git_dir), directory)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None
+            directory = parent
+
+    def _check_format(self) -> None:
+        config_path = os.path.join(self.common_dir, "config")
+        if os.path.exists(config_path):
+            with open(config_path) as config_file:
+                config = config_file.read().lower()
+            if "refstorage" in config or "objectformat" in config:
+                raise UnsupportedRepositoryError("Repository uses extensions that cannot be read directly.")
+
+    def _read_ref(self, ref: str) -> str | None:
+        for directory in (self.git_dir, self.common_dir):
+            path = os.path.join(directory, ref)
+            if os.path.isfile(path):
+                with open(path) as ref_file:
+                    return ref_file.read().strip()
+
+        packed_refs_path = os.path.join(self.common_dir, "packed-refs")
+        if os.path.exists(packed_refs_path):
+            with open(packed_refs_path) as packed_refs:
+                for line in packed_refs:
+                    if line.startswith(("#", "^")):
+                        continue
+                    sha, _, name = line.strip().partition(" ")
+                    if name == ref:
+                        return sha
+        return None
+
+    def head_sha(self) -> str | None:
+        """
+        Resolves the commit HEAD points to, following symbolic references.
+
+        :return: the commit SHA, or none if the current branch has no commits yet
+        :raises UnsupportedRepositoryError: if the repository cannot be read directly
+        """
+        self._check_format()
+        value = self._read_ref("HEAD")
+        for _ in range(10):
+            if value is None or not value.startswith("ref:"):
+                return value
+            value = self._read_ref(value[len("ref:") :].strip())
+        raise UnsupportedRepositoryError("Too many levels of symbolic references.")
+
+    def is_dirty(self) -> bool:
+        """
+        Checks whether tracked files of the working tree differ from the index, that is,
+        whether there are unstaged modifications or deletions. File contents are hashed
+        only when their size or modification time differs from the ones in the index.
+
+        :return: true if the working tree has unstaged changes, false otherwise
+        :raises UnsupportedRepositoryError: if the repository cannot be read directly
+        """
+        self._check_format()
+        index_path = os.path.join(self.git_dir, "index")
+        if not os.path.exists(index_path):
+            return False
+
+        with open(index_path, "rb") as index_file:
+            data = index_file.read()
+
+        signature, version, count = struct.unpack_from(">4sII", data)
+        if signature != b"DIRC" or version not in (2, 3):
+            raise UnsupportedRepositoryError(f"Index version {version} cannot be read directly.")
+
+        offset = 12
+        for _ in range(count):
+            _, _, mtime_s, mtime_ns, _, _, mode, _, _, size, sha, flags = INDEX_ENTRY_FORMAT.unpack_from(data, offset)
+            header_size = INDEX_ENTRY_FORMAT.size
+            skip = bool(flags & 0x8000)  # assume valid
+            if version >= 3 and flags & 0x4000:
+                (extended_flags,) = struct.unpack_from(">H", data, offset + header_size)
+                skip = skip or bool(extended_flags & 0x4000)  # skip worktree
+                header_size += 2
+            name_end = data.index(b"\0", offset + header_size)
+            name = data[offset + header_size : name_end].decode("utf-8", "surrogateescape")
+            offset += (name_end - offset + 8) & ~7
+
+            if (flags >> 12) & 0x3:
+                return True  # unresolved merge conflict
+            if skip or stat.S_IFMT(mode) == 0o160000:
+                continue  # submodules are not checked
+            if self._is_modified(name, mode, mtime_s, mtime_ns, size, sha):
+                return True
+
+        return False
+
+    def _is_modified(self, name: str, mode: int, mtime_s: int, mtime_ns: int, size: int, sha: bytes) -> bool:
+        path = os.path.join(self.work_tree, name)
+        try:
+            file_stat = os.lstat(path)
+        except OSError:
+            return True
+
+        if stat.S_IFMT(mode) == stat.S_IFLNK:
+            if not stat.S_ISLNK(file_stat.st_mode):
+                return True
+        elif not stat.S_ISREG(file_stat.st_mode) or bool(file_stat.st_mode & 0o100) != bool(mode & 0o100):
+            return True
+
+        if file_stat.st_size & 0xFFFFFFFF != size:
+            return True
+        if int(file_stat.st_mtime) & 0xFFFFFFFF == mtime_s and file_stat.st_mtime_ns % 1_000_000_000 == mtime_ns:
+            return False
+
+        # the file was touched, compare its content to the indexed object
+        if stat.S_ISLNK(file_stat.st_mode):
+            content = os.readlink(path).encode("utf-8", "surrogateescape")
+        else:
+            with open(path, "rb") as file:
+                content = file.read()
+        return hashlib.sha1(b"blob %d\0" % len(content) + content).digest() != sha
+
+
+def commit_sha(path: str = ".") -> str | None:
+    """
+    Resolves the commit SHA of the git repository containing the given directory. The
+    repository is read directly, falling back to GitPython for layouts that cannot be
+    read directly.
+
+    :param path: a directory inside the git repository
+    :return: the commit SHA, or none if there is no repository or commit
+    """
+    repository = GitRepository.find(path)
+    if repository is None:
+        return None
+
+    try:
+        return repository.head_sha()
+    except (OSError, UnsupportedRepositoryError):
+        # Dependencies
+        import git
+
+        try:
+            return git.Repo(path, search_parent_directories=True).head.object.hexsha
+        except (git.InvalidGitRepositoryError, ValueError):
+            return None
+
+
+def is_dirty(path: str = ".") -> bool:
+    """
+    Checks whether the git repository containing the given directory has unstaged changes
+    in tracked files. The repository is read directly, falling back to GitPython for
+    layouts that cannot be read directly.
+
+    :param path: a directory inside the git repository
+    :return: true if the working tree has unstaged changes, false otherwise
+    """
+    repository = GitRepository.find(path)
+    if repository is None:
+        return False
+
+    try:
+        return repository.is_dirty()
+    except (OSError, UnsupportedRepositoryError):
+        # Dependencies
+        import git
+
+        try:
+            return git.Repo(path, search_parent_directories=True).is_dirty(index=False, untracked_files=False)
+        except (git.InvalidGitRepositoryError, git.GitCommandError, ValueError):
+            return False
@@ -0,0 +1,95 @@
+# Futures
+from __future__ import annotations
+
+# Standard Library
+import os
+import threading
+from collections.abc import Iterable
+
+# seconds between two polls of the watched files, and seconds without further changes before reporting them
+WATCH_INTERVAL = 0.5
+WATCH_DEBOUNCE = 0.3
+
+
+def snapshot(paths: Iterable[str]) -> dict[str, tuple[int, int]]:
+    """
+    Records the modification time and size of each path. Directories are not walked, yet
+    their modification time changes whenever an entry is added, removed or renamed.
+
+    :param paths: the watched files and directories
+    :return: a dictionary of existing paths to their modification time, in nanoseconds, and size
+    """
+    entries: dict[str, tuple[int, int]] = dict()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries[path] = (stat.st_mtime_ns, stat.st_size)
+    return entries
+
+
+def changed_paths(before: dict[str, tuple[int, int]], after: dict[str, tuple[int, int]]) -> set[str]:
+    """
+    :param before: a snapshot of the watched paths
+    :param after: a later snapshot of the watched paths
+    :return: the paths that were created, modified or removed between the snapshots
+    """
+    return {path for path in before.keys() | after.keys() if before.get(path) != after.get(path)}
+
+
+class PollingWatcher:
+    def __init__(
+        self, interval: float | None = None, debounce: float | None = None, stop: threading.Event | None = None
+    ):
+        """
+        Creates a watcher, which polls the watched paths for changes. Polling only stats the
+        watched paths, thus it is cheap and works on every platform and file system.
+
+        :param interval: seconds between two polls (default: WATCH_INTERVAL)
+        :param debounce: seconds without further changes, before changes are reported (default: WATCH_DEBOUNCE)
+        :param stop: an event stopping the watcher when set (optional)
+        """
+        self.interval = WATCH_INTERVAL if interval is None else interval
+        self.debounce = WATCH_DEBOUNCE if debounce is None else debounce
+        self.stop = threading.Event() if stop is None else stop
+        self._paths: list[str] = []
+        self._snapshot: dict[str, tuple[int, int]] = dict()
+
+    def watch(self, paths: Iterable[str]) -> None:
+        """
+        Replaces the watched paths and records their current state, so that only later changes are reported.
+
+        :param paths: the watched files and directories
+        """
+        self._paths = list(dict.fromkeys(paths))
+        self._snapshot = snapshot(self._paths)
+
+    def wait(self) -> set[str]:
+        """
+        Blocks until the watched paths change, and then until they stop changing for the
+        debounce period, so that an editor saving several files triggers a single rebuild.
+
+        :return: the changed paths, or an empty set if the watcher was stopped
+        """
+        current = self._snapshot
+        changes: set[str] = set()
+        while not changes:
+            if self.stop.wait(self.interval):
+                return set()
+            latest = snapshot(self._paths)
+            changes = changed_paths(current, latest)
+            current = latest
+
+        while True:
+            if self.stop.wait(self.debounce):
+                return set()
+            latest = snapshot(self._paths)
+            more = changed_paths(current, latest)
+            if not more:
+                break
+            changes |= more
+            current = latest
+
+        self._snapshot = current
+        return changes
@@ -1,9 +1,73 @@
+# Futures
+from __future__ import annotations
+
+# Types
+from typing import Any, Callable, TypeVar
+
 # Standard Library
+import json
+import os
+import socketserver
+import statistics
+import sys
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from http.server import BaseHTTPRequestHandler
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
 
 # Dependencies
 import pytest
 
+T = TypeVar("T")
+
+BENCHMARK_REPORT_PATH = "dist/benchmarks.json"
+
+# benchmarks slower than their baseline by more than this ratio fail
+BENCHMARK_TOLERANCE = 1.5
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        help=f"Runs benchmarks at every scale and writes their timings into '{BENCHMARK_REPORT_PATH}'.",
+    )
+    parser.addoption(
+        "--benchmark-compare",
+        metavar="PATH",
+        help=f"Fails benchmarks more than {BENCHMARK_TOLERANCE}x slower than the ones of a previous report.",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "benchmark: benchmarks, run at every scale only using --benchmark")
+    config.benchmarks = dict()  # type: ignore[attr-defined]
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    # without --benchmark, only the smallest scale of each benchmark runs, as a smoke test
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="larger scales run only using --benchmark")
+    for item in items:
+        marker = item.get_closest_marker("benchmark")
+        callspec = getattr(item, "callspec", None)
+        if marker is not None and callspec is not None and callspec.indices and any(callspec.indices.values()):
+            item.add_marker(skip)
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    if exitstatus == 5:
+        session.exitstatus = 0
+
+    benchmarks = getattr(session.config, "benchmarks", None)
+    if benchmarks and session.config.getoption("--benchmark"):
+        os.makedirs(os.path.dirname(BENCHMARK_REPORT_PATH), exist_ok=True)
+        with open(BENCHMARK_REPORT_PATH, "w") as report:
+            json.dump(benchmarks, report, indent=2, sort_keys=True)
+
 
 @pytest.fixture
 def dist_directory() -> str:
@@ -13,6 +77,302 @@ def dist_directory() -> str:
     return (path / "dist").absolute().as_posix()
 
 
-def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
-    if exitstatus == 5:
-        session.exitstatus = 0
+class Benchmark:
+    def __init__(self, name: str, benchmarks: dict[str, Any], baseline: dict[str, Any]):
+        """
+        Times a function over several rounds, similar to the fixture of pytest-benchmark.
+
+        :param name: the name of the benchmark
+        :param benchmarks: a dictionary collecting the statistics of all benchmarks
+        :param baseline: a dictionary of benchmark statistics to compare against
+        """
+        self.name = name
+        self.benchmarks = benchmarks
+        self.baseline = baseline
+
+    def __call__(self, function: Callable[[], T], rounds: int = 3) -> T:
+        timings = []
+        result = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = function()
+            timings.append(time.perf_counter() - start)
+
+        stats = {"min": min(timings), "mean": statistics.mean(timings), "rounds": rounds}
+        self.benchmarks[self.name] = stats
+        baseline = self.baseline.get(self.name)
+        if baseline is not None and stats["min"] > baseline["min"] * BENCHMARK_TOLERANCE:
+            pytest.fail(
+                f"Benchmark {self.name} took {stats['min']:.3f}s, while its baseline is {baseline['min']:.3f}s."
+            )
+        return result  # type: ignore[return-value]
+
+
+@pytest.fixture
+def benchmark(request: pytest.FixtureRequest) -> Benchmark:
+    baseline: dict[str, Any] = dict()
+    compare_path = request.config.getoption("--benchmark-compare")
+    if compare_path:
+        with open(compare_path) as compare_file:
+            baseline = json.load(compare_file)
+    return Benchmark(request.node.name, request.config.benchmarks, baseline)  # type: ignore[attr-defined]
+
+
+class FakeDocker:
+    def __init__(self, bin_path: Path, log_path: Path, monkeypatch: pytest.MonkeyPatch):
+        """
+        Controls the fake docker executable placed on PATH, see 'tests/fake_docker.py'.
+
+        :param bin_path: the directory holding the fake executable
+        :param log_path: path to the invocation log
+        :param monkeypatch: used for setting the environment of the fake executable
+        """
+        self.bin_path = bin_path
+        self.log_path = log_path
+        self._monkeypatch = monkeypatch
+
+    def configure(
+        self, latency: float | None = None, fail: str | None = None, flaky: int | None = None, noise: int | None = None
+    ) -> None:
+        """
+        :param latency: seconds each build or push takes (optional)
+        :param fail: a regular expression, failing every invocation whose arguments match (optional)
+        :param flaky: the number of pushes failing with a transient registry error (optional)
+        :param noise: the number of warning lines save commands write to stderr (optional)
+        """
+        for name, value in (("LATENCY", latency), ("FAIL", fail), ("FLAKY", flaky), ("NOISE", noise)):
+            if value is not None:
+                self._monkeypatch.setenv(f"FAKE_DOCKER_{name}", str(value))
+
+    def load(self, *image_tags: str) -> None:
+        """
+        Adds images to the local image store, as if they had been built earlier.
+
+        :param image_tags: the tags of the images
+        """
+        with open(f"{self.log_path}.images", "a") as images_file:
+            images_file.writelines(f"{tag}\n" for tag in image_tags)
+
+    def invocations(self) -> list[list[str]]:
+        """
+        :return: the arguments of every docker invocation, in order
+        """
+        if not self.log_path.exists():
+            return []
+        return [json.loads(line)["args"] for line in self.log_path.read_text().splitlines()]
+
+
+@pytest.fixture
+def fake_docker(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeDocker]:
+    bin_path = tmp_path / "bin"
+    bin_path.mkdir()
+    executable = bin_path / "docker"
+    executable.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{Path(__file__).with_name("fake_docker.py")}" "$@"\n')
+    executable.chmod(0o755)
+
+    log_path = tmp_path / "docker.log"
+    monkeypatch.setenv("PATH", f"{bin_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_DOCKER_LOG", log_path.as_posix())
+    for name in ("LATENCY", "FAIL", "FLAKY", "NOISE"):
+        monkeypatch.delenv(f"FAKE_DOCKER_{name}", raising=False)
+    yield FakeDocker(bin_path, log_path, monkeypatch)
+
+
+class Request:
+    def __init__(self, method: str, path: str, query: dict[str, list[str]], headers: dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+
+class EngineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        """
+        A stand-in of the docker daemon, which records requests and replies with canned progress streams.
+        """
+        self.requests: list[Request] = []
+        self.responses: dict[str, tuple[int, list[dict[str, Any]]]] = dict()
+        super().__init__(socket_path, EngineHandler)
+
+
+class EngineHandler(BaseHTTPRequestHandler):
+    server: EngineServer
+
+    def address_string(self) -> str:
+        return "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b""
+        while True:
+            size = int(self.rfile.readline().strip(), 16)
+            chunk = self.rfile.read(size + 2)[:size]
+            if size == 0:
+                return body
+            body += chunk
+
+    def do_GET(self) -> None:
+        self.do_POST()
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        self.server.requests.append(
+            Request(self.command, url.path, parse_qs(url.query), dict(self.headers), self._body())
+        )
+        status, messages = self.server.responses.get(url.path, (200, []))
+        content = b"".join(json.dumps(message).encode() + b"\r\n" for message in messages)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if content:
+            self.wfile.write(content)
+
+
+@pytest.fixture
+def server(tmp_path: Path) -> Iterator[EngineServer]:
+    engine_server = EngineServer((tmp_path / "docker.sock").as_posix())
+    thread = threading.Thread(target=engine_server.serve_forever, daemon=True)
+    thread.start()
+    yield engine_server
+    engine_server.shutdown()
+    engine_server.server_close()
+
+
+# the lock file of packaged projects, holding their single runtime dependency
+PACKAGE_LOCK = """
+[[package]]
+name = "six"
+version = "1.16.0"
+optional = false
+python-versions = ">=2.7"
+groups = ["main"]
+files = [
+    {file = "six-1.16.0-py2.py3-none-any.whl", hash = "sha256:aaa"},
+]
+
+[metadata]
+lock-version = "2.1"
+python-versions = "^3.11"
+content-hash = "0"
+"""
+
+
+class DockerProject:
+    def __init__(self, path: Path):
+        """
+        A synthetic poetry project with a [tool.docker] configuration, whose docker command
+        runs in-process.
+
+        :param path: the project directory
+        """
+        self.path = path
+        self.stdout = ""
+
+    def configure(
+        self,
+        images: int = 1,
+        instructions: int = 10,
+        chained: bool = False,
+        copy: bool | str = False,
+        package: bool = False,
+        settings: Sequence[str] = (),
+    ) -> None:
+        """
+        Writes the pyproject.toml of the project.
+
+        :param images: the number of images
+        :param instructions: the number of flow instructions of each image
+        :param chained: bases every image on the previous one, otherwise all images are independent
+        :param copy: copies a file of the build context, 'dist/image-<i>.txt', or the given source into every image
+        :param package: packages the project, a 'synthetic' module depending on 'six', and installs it into every image
+        :param settings: additional TOML lines of the configuration of every image, e.g. 'multistage = true'
+        """
+        lines = [
+            "[project]",
+            'name = "synthetic"',
+            'version = "1.0.0"',
+            'authors = [{name = "Foo", email = "foo@example.com"}]',
+            *(['dependencies = ["six>=1.16"]'] if package else []),
+            "",
+            "[tool.poetry]",
+            'packages = [{include = "synthetic"}]' if package else "package-mode = false",
+            "",
+            "[tool.poetry.dependencies]",
+            'python = "^3.11"',
+        ]
+        if package:
+            lines += [
+                "",
+                "[build-system]",
+                'requires = ["poetry-core>=2.0.0"]',
+                'build-backend = "poetry.core.masonry.api"',
+            ]
+            (self.path / "synthetic").mkdir(exist_ok=True)
+            (self.path / "synthetic" / "__init__.py").write_text('VERSION = "1.0.0"\n')
+            (self.path / "poetry.lock").write_text(PACKAGE_LOCK.lstrip())
+        for image in range(images):
+            base = f"org/image-{image - 1}:@(version)" if chained and image > 0 else "python:@(py_version)-slim"
+            flow = ", ".join(
+                f'{{ run = "echo step {step} > step-{step % 10}.txt" }}'
+                if step % 10
+                else f'{{ work_dir = "/app/stage-{step // 10}" }}'
+                for step in range(instructions)
+            )
+            lines += [
+                "",
+                f"[tool.docker.image-{image}]",
+                f'tags = ["org/image-{image}:@(version)", "org/image-{image}:latest"]',
+                f'from = "{base}"',
+                f'labels = {{ "org.opencontainers.image.title" = "image-{image}" }}',
+                f'env = {{ IMAGE = "image-{image}", VERSION = "@(version)" }}',
+                f"flow = [{flow}]",
+                'cmd = ["python"]',
+                *settings,
+            ]
+            if copy:
+                source = copy if isinstance(copy, str) else f"image-{image}.txt"
+                lines.append(f'copy = [{{ source = "{source}", target = "/app/" }}]')
+                (self.path / "dist").mkdir(exist_ok=True)
+                (self.path / "dist" / f"image-{image}.txt").write_text(f"image-{image}")
+        (self.path / "pyproject.toml").write_text("\n".join(lines) + "\n")
+
+    def run(self, *args: str) -> tuple[int, str]:
+        """
+        Runs the docker command of the project, keeping its standard output in 'stdout'.
+
+        :param args: the command line options
+        :return: the exit code and the output of the command, both standard output and error
+        """
+        # Dependencies
+        from cleo.testers.command_tester import CommandTester
+        from poetry.console.application import Application
+        from poetry.factory import Factory
+
+        # Project
+        from poetry_docker_plugin.command import DockerBuild
+
+        command = DockerBuild()
+        # packaging calls the build command of poetry
+        Application().add(command)
+        command.set_poetry(Factory().create_poetry(self.path))
+        tester = CommandTester(command)
+        status = tester.execute(" ".join(args))
+        self.stdout = tester.io.fetch_output()
+        return status, self.stdout + tester.io.fetch_error()
+
+
+@pytest.fixture
+def docker_project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> DockerProject:
+    path = tmp_path / "project"
+    path.mkdir()
+    monkeypatch.chdir(path)
+    return DockerProject(path)
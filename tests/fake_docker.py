@@ -0,0 +1,191 @@
+"""
+A stand-in of the docker CLI, used by tests in place of the 'docker' executable. Every
+invocation is appended as a JSON line to the log file, and build, push and tag commands
+emit output similar to the one of the docker CLI, while save commands write an image
+archive holding a layer shared by all images and a layer specific to the saved tag. The
+tags of images loaded by builds, or created by tag commands, are kept next to the log, so
+that inspecting, tagging or saving an image that was never loaded fails, as it does in docker.
+
+The behavior is configured through environment variables:
+
+* FAKE_DOCKER_LOG: path to the invocation log (required)
+* FAKE_DOCKER_LATENCY: seconds each build or push takes (default: 0)
+* FAKE_DOCKER_FAIL: a regular expression, failing every invocation whose arguments match
+* FAKE_DOCKER_FLAKY: the number of pushes failing with a transient registry error, before pushes succeed
+* FAKE_DOCKER_NOISE: the number of warning lines save commands write to stderr before the archive (default: 0)
+"""
+
+# Standard Library
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+import time
+
+TRANSIENT_ERROR = "received unexpected HTTP status: 503 Service Unavailable"
+
+
+def _option_values(args: list[str], name: str) -> list[str]:
+    values = [args[i + 1] for i, arg in enumerate(args[:-1]) if arg == name]
+    return values + [arg.split("=", 1)[1] for arg in args if arg.startswith(f"{name}=")]
+
+
+def _digest(*values: str) -> str:
+    return f"sha256:{hashlib.sha256(' '.join(values).encode()).hexdigest()}"
+
+
+def _loaded_tags(args: list[str]) -> list[str]:
+    # plain builds load their image, while cross builds and bakes load it only using the docker exporter
+    if args[:1] == ["build"]:
+        return _option_values(args, "--tag")
+    if args[:2] == ["buildx", "build"]:
+        loaded = "--load" in args or "type=docker" in _option_values(args, "--output")
+        return _option_values(args, "--tag") if loaded else []
+
+    with open(_option_values(args, "--file")[0]) as bake_file:
+        definition = json.load(bake_file)
+    names = [arg for arg in args[2:] if not arg.startswith("-") and arg not in _option_values(args, "--file")]
+    targets = [definition["target"][name] for name in names or definition["group"]["default"]["targets"]]
+    return [
+        tag
+        for target in targets
+        if "type=docker" in target.get("output", ["type=docker"] if len(target.get("platforms", [])) < 2 else [])
+        for tag in target["tags"]
+    ]
+
+
+def _images(log_path: str) -> set[str]:
+    images_path = f"{log_path}.images"
+    if not os.path.exists(images_path):
+        return set()
+    with open(images_path) as images_file:
+        return set(images_file.read().splitlines())
+
+
+def _load(log_path: str, tags: list[str]) -> None:
+    with open(f"{log_path}.images", "a") as images_file:
+        images_file.writelines(f"{tag}\n" for tag in tags)
+
+
+def _build(args: list[str], latency: float) -> None:
+    tags = _option_values(args, "--tag")
+    dockerfile = _option_values(args, "--file")
+    instructions: list[str] = []
+    if dockerfile and os.path.exists(dockerfile[0]):
+        with open(dockerfile[0]) as dockerfile_file:
+            instructions = [line for line in dockerfile_file.read().splitlines() if line and not line.startswith("#")]
+
+    print('#0 building with "default" instance using docker driver')
+    print(f"#1 [internal] load build definition from {os.path.basename(dockerfile[0]) if dockerfile else 'Dockerfile'}")
+    for step, instruction in enumerate(instructions, start=2):
+        print(f"#{step} [{step - 1}/{len(instructions)}] {instruction}")
+        print(f"#{step} DONE {latency / max(len(instructions), 1):.1f}s")
+    time.sleep(latency)
+    print(f"#{len(instructions) + 2} exporting to image")
+    print(f"#{len(instructions) + 2} writing image {_digest(*instructions)} done")
+    for tag in tags:
+        print(f"#{len(instructions) + 2} naming to docker.io/{tag} done")
+
+
+def _push(args: list[str], latency: float, log_path: str) -> int:
+    flaky_path = f"{log_path}.flaky"
+    failures = int(os.environ.get("FAKE_DOCKER_FLAKY", "0"))
+    attempts = 0
+    if os.path.exists(flaky_path):
+        with open(flaky_path) as flaky_file:
+            attempts = int(flaky_file.read())
+    if attempts < failures:
+        with open(flaky_path, "w") as flaky_file:
+            flaky_file.write(str(attempts + 1))
+        print(TRANSIENT_ERROR)
+        return 1
+
+    image_tag = args[-1]
+    repository, _, tag = image_tag.rpartition(":") if ":" in image_tag.rsplit("/", 1)[-1] else (image_tag, "", "")
+    print(f"The push refers to repository [{repository}]")
+    time.sleep(latency)
+    print(f"{tag or 'latest'}: digest: {_digest(repository)} size: 1234")
+    return 0
+
+
+def _layer(name: str, size: int) -> bytes:
+    content = b"".join(hashlib.sha256(f"{name}{i}".encode()).digest() for i in range(size // 32))
+    layer = io.BytesIO()
+    with tarfile.open(fileobj=layer, mode="w") as layer_archive:
+        info = tarfile.TarInfo(f"{name}.bin")
+        info.size = len(content)
+        layer_archive.addfile(info, io.BytesIO(content))
+    return layer.getvalue()
+
+
+def _save(args: list[str]) -> None:
+    for _ in range(int(os.environ.get("FAKE_DOCKER_NOISE", "0"))):
+        print("WARNING: image platform does not match the host platform", file=sys.stderr)
+    # an OCI image layout, as saved by docker 25 or later
+    layers = [_layer("base", 256 << 10), _layer(args[-1], 64 << 10)]
+    digests = [hashlib.sha256(layer).hexdigest() for layer in layers]
+    config = json.dumps({"rootfs": {"type": "layers", "diff_ids": [f"sha256:{digest}" for digest in digests]}})
+    config_digest = hashlib.sha256(config.encode()).hexdigest()
+    files = [
+        ("oci-layout", b'{"imageLayoutVersion": "1.0.0"}'),
+        *[(f"blobs/sha256/{digest}", layer) for digest, layer in zip(digests, layers)],
+        (f"blobs/sha256/{config_digest}", config.encode()),
+        (
+            "manifest.json",
+            json.dumps(
+                [
+                    {
+                        "Config": f"blobs/sha256/{config_digest}",
+                        "RepoTags": [args[-1]],
+                        "Layers": [f"blobs/sha256/{digest}" for digest in digests],
+                    }
+                ]
+            ).encode(),
+        ),
+    ]
+    with tarfile.open(fileobj=sys.stdout.buffer, mode="w|") as archive:
+        for name, content in files:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+
+
+def main(args: list[str]) -> int:
+    log_path = os.environ["FAKE_DOCKER_LOG"]
+    with open(log_path, "a") as log_file:
+        log_file.write(json.dumps({"args": args, "cwd": os.getcwd(), "time": time.time()}) + "\n")
+
+    latency = float(os.environ.get("FAKE_DOCKER_LATENCY", "0"))
+    fail = os.environ.get("FAKE_DOCKER_FAIL")
+    if fail and re.search(fail, " ".join(args)):
+        time.sleep(latency)
+        print('ERROR: failed to solve: process "/bin/sh -c exit 1" did not complete successfully: exit code: 1')
+        return 1
+
+    if args[:1] == ["build"] or args[:2] in (["buildx", "build"], ["buildx", "bake"]):
+        _build(args, latency)
+        _load(log_path, _loaded_tags(args))
+        if "--push" in args:
+            for tag in _option_values(args, "--tag"):
+                print(f"pushing {tag} with docker {_digest(tag)}")
+    elif args[:2] == ["image", "inspect"] or args[:1] in (["tag"], ["save"]):
+        image_tag = args[2] if args[0] == "image" else args[1] if args[0] == "tag" else args[-1]
+        if image_tag not in _images(log_path):
+            print(f"Error response from daemon: No such image: {image_tag}", file=sys.stderr)
+            return 1
+        if args[0] == "tag":
+            _load(log_path, [args[2]])
+        elif args[0] == "save":
+            _save(args)
+    elif args[:1] == ["push"]:
+        return _push(args, latency, log_path)
+    elif args[:3] == ["buildx", "imagetools", "create"]:
+        print(f"#1 pushing {_digest(args[-1])} to {_option_values(args, '--tag')[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
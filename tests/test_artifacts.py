@@ -0,0 +1,74 @@
+# Standard Library
+from pathlib import Path
+
+# Dependencies
+import pytest
+from poetry.factory import Factory
+
+# Project
+from poetry_docker_plugin.artifacts import find_wheel, find_wheels, is_up_to_date, package_fingerprint
+
+PYPROJECT = """
+[project]
+name = "demo-app"
+version = "1.0.0"
+authors = [{name = "Jane Doe", email = "jane@example.com"}]
+
+[tool.poetry]
+packages = [{include = "app"}]
+
+[build-system]
+requires = ["poetry-core>=2.0.0"]
+build-backend = "poetry.core.masonry.api"
+"""
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    (tmp_path / "pyproject.toml").write_text(PYPROJECT)
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "__init__.py").write_text("")
+    return tmp_path
+
+
+def test_package_fingerprint_tracks_sources(project: Path) -> None:
+    fingerprint = package_fingerprint(Factory().create_poetry(project))
+    assert fingerprint == package_fingerprint(Factory().create_poetry(project))
+
+    (project / "app" / "__init__.py").write_text("VERSION = 1")
+    assert fingerprint != package_fingerprint(Factory().create_poetry(project))
+
+
+def test_package_fingerprint_ignores_unpackaged_files(project: Path) -> None:
+    fingerprint = package_fingerprint(Factory().create_poetry(project))
+    (project / "notes.txt").write_text("foo")
+
+    assert fingerprint == package_fingerprint(Factory().create_poetry(project))
+
+
+def test_is_up_to_date(tmp_path: Path) -> None:
+    fingerprint_path = (tmp_path / "fingerprint").as_posix()
+    artifacts = [(tmp_path / "app-1.0.0.tar.gz").as_posix(), (tmp_path / "app-1.0.0-*.whl").as_posix()]
+    (tmp_path / "fingerprint").write_text("abc")
+    (tmp_path / "app-1.0.0.tar.gz").write_text("")
+
+    assert not is_up_to_date("abc", fingerprint_path, artifacts)
+
+    (tmp_path / "app-1.0.0-py3-none-any.whl").write_text("")
+    assert is_up_to_date("abc", fingerprint_path, artifacts)
+    assert not is_up_to_date("def", fingerprint_path, artifacts)
+
+
+def test_find_wheel(tmp_path: Path) -> None:
+    (tmp_path / "app-1.0.0.tar.gz").write_text("")
+    (tmp_path / "app-1.0.0-cp311-cp311-manylinux_2_17_x86_64.whl").write_text("")
+    assert find_wheel("app-1.0.0", tmp_path.as_posix()) is None
+
+    (tmp_path / "app-1.0.0-py3-none-any.whl").write_text("")
+    (tmp_path / "app-1.0.1-py3-none-any.whl").write_text("")
+    assert find_wheel("app-1.0.0", tmp_path.as_posix()) == "app-1.0.0-py3-none-any.whl"
+    assert find_wheels(tmp_path.as_posix()) == [
+        "app-1.0.0-cp311-cp311-manylinux_2_17_x86_64.whl",
+        "app-1.0.0-py3-none-any.whl",
+        "app-1.0.1-py3-none-any.whl",
+    ]
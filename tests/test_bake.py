@@ -0,0 +1,89 @@
+# Standard Library
+import json
+import os
+from pathlib import Path
+
+# Dependencies
+from cleo.io.buffered_io import BufferedIO
+
+# Project
+from poetry_docker_plugin.bake import BakeCommand, bake_target, target_name, write_bake_file
+from poetry_docker_plugin.docker_builder import BuildCache, DockerFile, From, ImageBuild
+
+
+def _image_build(**kwargs: object) -> ImageBuild:
+    return ImageBuild(DockerFile(BufferedIO(), [From("python:3.11")]), **kwargs)  # type: ignore[arg-type]
+
+
+def test_target_name() -> None:
+    assert target_name(None) == "image"
+    assert target_name("worker") == "worker"
+    assert target_name("worker.gpu") == "worker-gpu"
+
+
+def test_bake_target(dist_directory: str) -> None:
+    image_build = _image_build(
+        image_tags=["org/foo:latest"],
+        platform=[],
+        arguments={"python_version": "3.11"},
+        dockerfile_name="Dockerfile_foo",
+        secrets=["id=netrc,src=.netrc"],
+    )
+    assert bake_target(image_build) == {
+        "context": dist_directory,
+        "dockerfile": os.path.join(dist_directory, "Dockerfile_foo"),
+        "tags": ["org/foo:latest"],
+        "args": {"python_version": "3.11"},
+        "secret": ["id=netrc,src=.netrc"],
+        "no-cache": True,
+        "output": ["type=docker"],
+    }
+
+
+def test_bake_target_with_platforms_and_cache() -> None:
+    image_build = _image_build(
+        image_tags=["org/foo:latest"],
+        platform=["linux/amd64", "linux/arm64"],
+        cache=BuildCache("registry", ["org/foo:buildcache"], ["org/foo:buildcache"]),
+    )
+    target = bake_target(image_build, "/tmp/context")
+
+    assert target["context"] == "/tmp/context"
+    assert target["platforms"] == ["linux/amd64", "linux/arm64"]
+    assert target["cache-from"] == ["type=registry,ref=org/foo:buildcache"]
+    assert target["cache-to"] == ["type=registry,ref=org/foo:buildcache,mode=max"]
+    assert "output" not in target
+
+    image_build.platform = ["linux/amd64"]
+    image_build.push = True
+    assert bake_target(image_build)["output"] == ["type=registry", "type=docker"]
+    image_build.platform = ["linux/amd64", "linux/arm64"]
+    assert bake_target(image_build)["output"] == ["type=registry"]
+
+    image_build.oci_path = "dist/Dockerfile.oci.tar"
+    assert bake_target(image_build)["output"] == [
+        "type=registry",
+        f"type=oci,dest={os.path.abspath('dist/Dockerfile.oci.tar')}",
+    ]
+
+
+def test_write_bake_file(tmp_path: Path) -> None:
+    path = (tmp_path / "dist" / "docker-bake.json").as_posix()
+    write_bake_file({"service": {"tags": ["org/service"]}, "worker": {"tags": ["org/worker"]}}, path)
+
+    assert json.loads(Path(path).read_text()) == {
+        "group": {"default": {"targets": ["service", "worker"]}},
+        "target": {"service": {"tags": ["org/service"]}, "worker": {"tags": ["org/worker"]}},
+    }
+
+
+def test_bake_command() -> None:
+    assert BakeCommand(targets=["service", "worker"]).command() == [
+        "docker",
+        "buildx",
+        "bake",
+        "--file",
+        "dist/docker-bake.json",
+        "service",
+        "worker",
+    ]
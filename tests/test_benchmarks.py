@@ -0,0 +1,104 @@
+# Standard Library
+from pathlib import Path
+
+# Dependencies
+import git
+import pytest
+from cleo.io.buffered_io import BufferedIO
+
+# Project
+from poetry_docker_plugin.docker_builder import DockerFile, Env, From, Instruction, Labels, Run, WorkDir
+from poetry_docker_plugin.vcs import GitRepository, commit_sha
+from tests.conftest import Benchmark, DockerProject, FakeDocker
+
+# scales of the synthetic configs, as the number of images and of flow instructions of each image.
+# Only the first scale runs by default, the rest run using --benchmark
+SCALES = [(1, 10), (1, 5000), (20, 500), (200, 10), (200, 250)]
+
+INSTRUCTIONS = [10, 500, 5000]
+
+
+def _instructions(count: int) -> list[Instruction]:
+    instructions: list[Instruction] = [From("python:3.11-slim")]
+    for step in range(count):
+        if step % 10 == 0:
+            instructions.append(WorkDir(f"/app/stage-{step // 10}"))
+        elif step % 10 == 1:
+            instructions.append(Env(f"STEP_{step}", str(step)))
+        elif step % 10 == 2:
+            instructions.append(Labels({f"step.{step}": str(step)}))
+        else:
+            instructions.append(Run(f"echo step {step} > step-{step % 10}.txt"))
+    return instructions
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("images, instructions", SCALES, ids=[f"{i}-images-{n}-instructions" for i, n in SCALES])
+def test_benchmark_planning(
+    benchmark: Benchmark, docker_project: DockerProject, images: int, instructions: int
+) -> None:
+    docker_project.configure(images, instructions, chained=True)
+
+    status, _ = benchmark(lambda: docker_project.run("--dockerfile-only", "--force"))
+
+    assert status == 0
+    assert len(list((docker_project.path / "dist").glob("Dockerfile_*"))) == images
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("images, instructions", SCALES, ids=[f"{i}-images-{n}-instructions" for i, n in SCALES])
+def test_benchmark_cached_planning(
+    benchmark: Benchmark, docker_project: DockerProject, images: int, instructions: int
+) -> None:
+    docker_project.configure(images, instructions, chained=True)
+    docker_project.run("--dockerfile-only")
+
+    status, output = benchmark(lambda: docker_project.run("--dockerfile-only"))
+
+    assert status == 0
+    assert "Build plan is up to date" in output
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("count", INSTRUCTIONS, ids=[f"{n}-instructions" for n in INSTRUCTIONS])
+def test_benchmark_rendering(benchmark: Benchmark, count: int) -> None:
+    def render() -> str:
+        docker_file = DockerFile(BufferedIO(), _instructions(count))
+        docker_file.declare_arguments({"python_version": "3.11"})
+        docker_file.optimize()
+        return docker_file.render()
+
+    content = benchmark(render)
+    assert content.startswith("FROM python:3.11-slim")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("images, instructions", SCALES, ids=[f"{i}-images-{n}-instructions" for i, n in SCALES])
+def test_benchmark_orchestration(
+    benchmark: Benchmark,
+    docker_project: DockerProject,
+    fake_docker: FakeDocker,
+    images: int,
+    instructions: int,
+) -> None:
+    docker_project.configure(images, instructions)
+
+    status, _ = benchmark(lambda: docker_project.run("--force", "--push", "--jobs", "8"), rounds=1)
+
+    assert status == 0
+    assert len([args for args in fake_docker.invocations() if args[0] == "build"]) == images
+    assert Path(fake_docker.log_path).exists()
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("resolver", ["direct", "gitpython"])
+def test_benchmark_commit_sha(benchmark: Benchmark, resolver: str) -> None:
+    if GitRepository.find() is None:
+        pytest.skip("benchmarks are not running inside a git repository")
+
+    def resolve() -> set[object]:
+        if resolver == "direct":
+            return {commit_sha() for _ in range(20)}
+        return {git.Repo(search_parent_directories=True).head.object.hexsha for _ in range(20)}
+
+    assert benchmark(resolve) == {git.Repo(search_parent_directories=True).head.object.hexsha}
@@ -0,0 +1,460 @@
+# Standard Library
+import json
+import pstats
+import shutil
+import subprocess
+from pathlib import Path
+
+# Dependencies
+import pytest
+
+# Project
+from poetry_docker_plugin import docker_builder, watch
+from poetry_docker_plugin.command import _builder_image
+from poetry_docker_plugin.watch import PollingWatcher
+from tests.conftest import DockerProject, EngineServer, FakeDocker
+
+
+def _builds(fake_docker: FakeDocker) -> list[list[str]]:
+    return [args for args in fake_docker.invocations() if args[0] == "build"]
+
+
+def _tags(args: list[str]) -> list[str]:
+    return [args[i + 1] for i, arg in enumerate(args) if arg == "--tag"]
+
+
+def test_dockerfile_only(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3)
+    status, output = docker_project.run("--dockerfile-only")
+
+    assert status == 0
+    assert "Dockerfile is located in 'dist/Dockerfile_image-1'." in output
+    assert (docker_project.path / "dist" / "Dockerfile_image-0").read_text().startswith("FROM python:3.11-slim")
+    assert fake_docker.invocations() == []
+
+
+def test_build_and_push(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3, chained=True)
+    status, output = docker_project.run("--push")
+
+    assert status == 0
+    assert [_tags(args) for args in _builds(fake_docker)] == [
+        ["org/image-0:1.0.0", "org/image-0:latest"],
+        ["org/image-1:1.0.0", "org/image-1:latest"],
+    ]
+    assert [args[:2] for args in fake_docker.invocations() if args[0] != "build"] == [
+        ["push", "org/image-0:1.0.0"],
+        ["buildx", "imagetools"],
+        ["push", "org/image-1:1.0.0"],
+        ["buildx", "imagetools"],
+    ]
+    assert "[image-1] Image tag 'org/image-1:latest' was successfully pushed (sha256:" in output
+
+
+def test_build_skips_unchanged_images(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3)
+    assert docker_project.run()[0] == 0
+    status, output = docker_project.run()
+
+    assert status == 0
+    assert len(_builds(fake_docker)) == 2
+    assert "Image inputs have not changed since the last build, skipping build." in output
+
+
+def test_build_skips_unchanged_images_copying_the_whole_context(
+    docker_project: DockerProject, fake_docker: FakeDocker
+) -> None:
+    docker_project.configure(images=1, instructions=3, copy=".")
+    for _ in range(3):
+        assert docker_project.run("--log", "--timings")[0] == 0
+
+    assert len(_builds(fake_docker)) == 1
+    (docker_project.path / "dist" / "image-0.txt").write_text("changed")
+    assert docker_project.run()[0] == 0
+    assert len(_builds(fake_docker)) == 2
+
+
+def test_build_ignores_generated_files_of_unstaged_contexts(
+    docker_project: DockerProject, fake_docker: FakeDocker
+) -> None:
+    docker_project.configure(images=2, instructions=3, copy="${SOURCE}")
+    status, output = docker_project.run("--jobs", "2")
+
+    assert status == 0
+    assert "Cannot resolve all COPY sources, using 'dist' as build context." in output
+    ignored = (docker_project.path / "dist" / ".dockerignore").read_text().splitlines()
+    assert {".context", ".export", "logs", ".docker-manifest.json"}.issubset(ignored)
+    assert len(ignored) == len(set(ignored))
+
+
+def test_build_rebuilds_removed_images(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3)
+    assert docker_project.run()[0] == 0
+    fake_docker.configure(fail="image inspect org/image-1")
+    status, output = docker_project.run()
+
+    assert status == 0
+    assert [_tags(args)[0] for args in _builds(fake_docker)] == [
+        "org/image-0:1.0.0",
+        "org/image-1:1.0.0",
+        "org/image-1:1.0.0",
+    ]
+    assert "[image-1] Image 'org/image-1:1.0.0' no longer exists, rebuilding it." in output
+
+
+def test_build_failure_skips_dependent_images(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=3, instructions=3, chained=True)
+    fake_docker.configure(fail="Dockerfile_image-1")
+    status, output = docker_project.run("--jobs", "2")
+
+    assert status == 1
+    assert [_tags(args)[0] for args in _builds(fake_docker)] == ["org/image-0:1.0.0", "org/image-1:1.0.0"]
+    assert "[image-1] Failed to build image tags" in output
+    assert "[image-2] Skipped, since base image 'image-1' failed to build." in output
+
+
+def test_push_retries_transient_failures(
+    docker_project: DockerProject, fake_docker: FakeDocker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(docker_builder, "PUSH_BACKOFF", 0)
+    docker_project.configure(images=1, instructions=3)
+    fake_docker.configure(flaky=2)
+    status, output = docker_project.run("--push")
+
+    assert status == 0
+    assert [args for args in fake_docker.invocations() if args[0] == "push"] == [["push", "org/image-0:1.0.0"]] * 3
+    assert "Retrying in 0s (2/3)." in output
+
+
+def test_bake_and_push_loads_images(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3)
+    assert docker_project.run("--bake", "--push", "--export")[0] == 0
+    status, output = docker_project.run("--bake", "--push", "--export")
+
+    assert status == 0
+    assert len([args for args in fake_docker.invocations() if args[:2] == ["buildx", "bake"]]) == 1
+    assert len([args for args in fake_docker.invocations() if args[0] == "save"]) == 2
+    assert "no longer exists" not in output
+    assert (docker_project.path / "dist" / "Dockerfile_image-1.tar.gz").exists()
+
+
+def test_build_log(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=1, instructions=3)
+    assert docker_project.run("--log")[0] == 0
+
+    log = Path(docker_project.path / "dist" / "logs" / "Dockerfile_image-0.log").read_text()
+    assert "naming to docker.io/org/image-0:latest done" in log
+
+
+def test_plan(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3, chained=True)
+    status, output = docker_project.run("--plan", "--push", "--timings")
+
+    assert status == 0
+    # the standard output holds only the plan
+    plan = json.loads(docker_project.stdout)
+    assert [image["image_tags"] for image in plan["images"]] == [
+        ["org/image-0:1.0.0", "org/image-0:latest"],
+        ["org/image-1:1.0.0", "org/image-1:latest"],
+    ]
+    assert plan["images"][1]["instructions"][0] == {
+        "instruction": "From",
+        "base_image": "org/image-0:1.0.0",
+        "platform": None,
+        "stage": None,
+    }
+    assert all(image["push"] for image in plan["images"])
+    assert fake_docker.invocations() == []
+    assert not (docker_project.path / "dist" / "Dockerfile_image-0").exists()
+    assert not (docker_project.path / "dist" / ".docker-plan.json").exists()
+    assert "Timings:" in output
+
+
+def test_plan_is_cached(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3)
+    assert "skipping planning" not in docker_project.run()[1]
+
+    status, output = docker_project.run()
+    assert status == 0
+    assert "Build plan is up to date, skipping planning of '2' image(s)." in output
+
+    docker_project.configure(images=2, instructions=4)
+    assert "skipping planning" not in docker_project.run()[1]
+    assert "skipping planning" not in docker_project.run("--push")[1]
+
+    # the wheels of the project determine the installed package
+    (docker_project.path / "dist" / "synthetic-1.0.0-py3-none-any.whl").write_text("")
+    assert "skipping planning" not in docker_project.run("--push")[1]
+    assert "skipping planning" in docker_project.run("--push")[1]
+
+
+def test_watch_rebuilds_affected_images(
+    docker_project: DockerProject, fake_docker: FakeDocker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(watch, "WATCH_INTERVAL", 0.01)
+    monkeypatch.setattr(watch, "WATCH_DEBOUNCE", 0.01)
+    docker_project.configure(images=3, instructions=3, chained=True, copy=True)
+    edits = [
+        lambda: (docker_project.path / "dist" / "image-1.txt").write_text("changed"),
+        lambda: docker_project.configure(images=3, instructions=4, copy=True),
+    ]
+    wait = PollingWatcher.wait
+
+    def edit_and_wait(watcher: PollingWatcher) -> set[str]:
+        if not edits:
+            raise KeyboardInterrupt
+        edits.pop(0)()
+        return wait(watcher)
+
+    monkeypatch.setattr(PollingWatcher, "wait", edit_and_wait)
+    status, output = docker_project.run("--watch")
+
+    assert status == 0
+    assert [_tags(args)[0] for args in _builds(fake_docker)] == [
+        "org/image-0:1.0.0",
+        "org/image-1:1.0.0",
+        "org/image-2:1.0.0",
+        # the changed file is copied into image-1, and image-2 is based on it
+        "org/image-1:1.0.0",
+        "org/image-2:1.0.0",
+        # the changed configuration is planned again, and no longer chains the images
+        "org/image-0:1.0.0",
+        "org/image-1:1.0.0",
+        "org/image-2:1.0.0",
+    ]
+    assert "Changes affect image(s): ['image-1', 'image-2']." in output
+    assert "Stopped watching." in output
+
+
+def test_watch_rebuilds_images_of_unresolved_sources(
+    docker_project: DockerProject, fake_docker: FakeDocker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(watch, "WATCH_INTERVAL", 0.01)
+    monkeypatch.setattr(watch, "WATCH_DEBOUNCE", 0.01)
+    docker_project.configure(images=1, instructions=3, copy="${SOURCE}")
+    (docker_project.path / "dist" / "app.conf").write_text("conf")
+    edits = [lambda: (docker_project.path / "dist" / "app.conf").write_text("changed")]
+    wait = PollingWatcher.wait
+
+    def edit_and_wait(watcher: PollingWatcher) -> set[str]:
+        if not edits:
+            raise KeyboardInterrupt
+        edits.pop(0)()
+        return wait(watcher)
+
+    monkeypatch.setattr(PollingWatcher, "wait", edit_and_wait)
+    status, output = docker_project.run("--watch")
+
+    assert status == 0
+    assert len(_builds(fake_docker)) == 2
+    assert "Changes affect image(s): ['image-0']." in output
+
+
+def test_export(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3)
+    status, output = docker_project.run("--export")
+
+    assert status == 0
+    assert [args for args in fake_docker.invocations() if args[0] == "save"] == [
+        ["save", "org/image-0:1.0.0"],
+        ["save", "org/image-1:1.0.0"],
+    ]
+    assert "[image-1] Image exported to 'dist/Dockerfile_image-1.tar.gz'" in output
+    assert "reused 1 of 3 compressed layers" in output
+    assert json.loads((docker_project.path / "dist" / "Dockerfile_image-0.layers.json").read_text())["layers"]
+
+    status, output = docker_project.run("--export")
+    assert status == 0
+    assert len([args for args in fake_docker.invocations() if args[0] == "save"]) == 2
+    assert "Archive 'dist/Dockerfile_image-0.tar.gz' is up to date, skipping export." in output
+
+
+def test_export_rejects_multiple_platforms(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=1, instructions=3)
+
+    with pytest.raises(RuntimeError, match="Consider using '--oci' instead"):
+        docker_project.run("--export", "--platform", "linux/amd64", "--platform", "linux/arm64")
+    assert not [args for args in fake_docker.invocations() if args[0] in ("build", "buildx", "save")]
+
+
+def test_invalid_push_jobs(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3)
+
+    with pytest.raises(RuntimeError, match="Invalid number of push-jobs '0', expected a positive integer."):
+        docker_project.run("--push-jobs", "0")
+    assert fake_docker.invocations() == []
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_dirty_working_tree(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=1, instructions=3)
+    for args in (["init", "-q"], ["add", "."], ["commit", "-q", "-m", "init"]):
+        git = ["git", "-c", "user.name=test", "-c", "user.email=test@test.com", *args]
+        subprocess.run(git, cwd=docker_project.path, capture_output=True, check=True)
+    assert "unstaged changes" not in docker_project.run("--dockerfile-only")[1]
+
+    docker_project.configure(images=1, instructions=4)
+    status, output = docker_project.run("--dockerfile-only")
+    assert status == 0
+    assert "Working tree has unstaged changes, thus images do not match commit" in output
+
+
+def test_profile_records_image_builds(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3)
+    status, output = docker_project.run("--profile", "--jobs", "4")
+
+    assert status == 0
+    assert "Profiling builds images one at a time, ignoring '--jobs'." in output
+    stats = pstats.Stats((docker_project.path / "dist" / "poetry-docker.pstats").as_posix())
+    functions = {(Path(path).name, name) for path, _, name in stats.stats}  # type: ignore[attr-defined]
+    assert ("docker_builder.py", "build") in functions
+
+
+def test_package_installs_the_wheel(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=1, instructions=3, package=True)
+    status, output = docker_project.run()
+
+    assert status == 0
+    assert "Packaged project in" in output
+    dockerfile = (docker_project.path / "dist" / "Dockerfile_image-0").read_text()
+    assert "COPY synthetic-1.0.0-py3-none-any.whl /package/synthetic-1.0.0-py3-none-any.whl" in dockerfile
+    assert (
+        "RUN --mount=type=cache,target=/root/.cache/pip pip install /package/synthetic-1.0.0-py3-none-any.whl"
+        in dockerfile
+    )
+    # only the wheel is staged into the build context
+    context = docker_project.path / "dist" / ".context" / "Dockerfile_image-0"
+    assert sorted(path.name for path in context.iterdir()) == ["synthetic-1.0.0-py3-none-any.whl"]
+    assert [args[-1] for args in _builds(fake_docker)] == [context.as_posix()]
+
+
+def test_package_falls_back_to_the_source_distribution(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3, package=True)
+    # Dockerfiles are created without packaging, thus no wheel exists
+    status, output = docker_project.run("--dockerfile-only")
+
+    assert status == 0
+    assert "No platform independent wheel found, installing 'synthetic-1.0.0.tar.gz' instead." in output
+    assert "pip install --no-cache-dir" not in (docker_project.path / "dist" / "Dockerfile_image-0").read_text()
+    assert "COPY synthetic-1.0.0.tar.gz" in (docker_project.path / "dist" / "Dockerfile_image-1").read_text()
+
+    docker_project.configure(images=1, instructions=3, package=True, settings=['package = "sdist"'])
+    assert docker_project.run()[0] == 0
+    dockerfile = (docker_project.path / "dist" / "Dockerfile_image-0").read_text()
+    assert "COPY synthetic-1.0.0.tar.gz /package/synthetic-1.0.0.tar.gz" in dockerfile
+    assert ".whl" not in dockerfile
+
+
+def test_package_without_pip_cache(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(
+        images=1, instructions=3, package=True, settings=["dependency_layer = true", "pip_cache = false"]
+    )
+    status, output = docker_project.run()
+
+    assert status == 0
+    assert "Exported locked dependencies to 'dist/requirements-image-0.txt'." in output
+    assert "six==1.16.0" in (docker_project.path / "dist" / "requirements-image-0.txt").read_text()
+    dockerfile = (docker_project.path / "dist" / "Dockerfile_image-0").read_text()
+    assert "--mount=type=cache" not in dockerfile
+    assert "# syntax=docker/dockerfile:1" not in dockerfile
+    assert dockerfile.index("RUN pip install --no-cache-dir -r /package/requirements.txt") < dockerfile.index(
+        "RUN pip install --no-cache-dir --no-deps /package/synthetic-1.0.0-py3-none-any.whl"
+    )
+
+
+def test_package_multistage(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=1, instructions=3, package=True, settings=["multistage = true"])
+    status, output = docker_project.run()
+
+    assert status == 0
+    dockerfile = (docker_project.path / "dist" / "Dockerfile_image-0").read_text().splitlines()
+    # the builder stage uses the full python image of the final stage
+    assert dockerfile[1:5] == [
+        "FROM python:3.11 AS builder",
+        "COPY requirements-image-0.txt /package/requirements.txt",
+        "RUN --mount=type=cache,target=/root/.cache/pip pip wheel --wheel-dir /wheels -r /package/requirements.txt",
+        "COPY synthetic-1.0.0-py3-none-any.whl /wheels/synthetic-1.0.0-py3-none-any.whl",
+    ]
+    assert "FROM python:3.11-slim" in dockerfile
+    assert (
+        "RUN --mount=type=bind,from=builder,source=/wheels,target=/wheels "
+        "pip install --no-cache-dir --no-index --no-deps /wheels/*.whl"
+    ) in dockerfile
+    assert "Builder image" not in output
+    assert len(_builds(fake_docker)) == 1
+
+    docker_project.configure(
+        images=1, instructions=3, package=True, settings=['multistage = { from = "python:3.12-bookworm" }']
+    )
+    status, output = docker_project.run("--dockerfile-only")
+    assert status == 0
+    assert (
+        "Builder image 'python:3.12-bookworm' uses Python 3.12, while base image 'python:3.11-slim' uses Python 3.11"
+        in output
+    )
+
+
+def test_package_bake(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=2, instructions=3, package=True)
+    status, _ = docker_project.run("--bake")
+
+    assert status == 0
+    assert [args[:2] for args in fake_docker.invocations()] == [["buildx", "bake"]]
+    bake = json.loads((docker_project.path / "dist" / "docker-bake.json").read_text())
+    for target in bake["target"].values():
+        assert [path.name for path in Path(target["context"]).iterdir()] == ["synthetic-1.0.0-py3-none-any.whl"]
+        assert target["output"] == ["type=docker"]
+
+
+def test_package_skips_unchanged_distributions(docker_project: DockerProject, fake_docker: FakeDocker) -> None:
+    docker_project.configure(images=1, instructions=3, package=True)
+    assert docker_project.run()[0] == 0
+    status, output = docker_project.run()
+
+    assert status == 0
+    assert "Distribution is up to date, skipping packaging" in output
+    assert "Image inputs have not changed since the last build, skipping build." in output
+    assert len(_builds(fake_docker)) == 1
+
+    (docker_project.path / "synthetic" / "__init__.py").write_text('VERSION = "1.0.1"\n')
+    status, output = docker_project.run()
+    assert status == 0
+    assert "Packaged project in" in output
+    assert len(_builds(fake_docker)) == 2
+
+
+def test_package_through_the_engine(
+    docker_project: DockerProject, fake_docker: FakeDocker, server: EngineServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{server.server_address}")
+    docker_project.configure(images=1, instructions=3, package=True)
+    status, output = docker_project.run("--engine")
+
+    assert status == 0
+    # the engine lacks BuildKit, thus pip commands do not use a cache mount by default
+    dockerfile = (docker_project.path / "dist" / "Dockerfile_image-0").read_text()
+    assert "RUN pip install --no-cache-dir /package/synthetic-1.0.0-py3-none-any.whl" in dockerfile
+    assert "/build" in [request.path for request in server.requests]
+    assert _builds(fake_docker) == []
+    assert "using the docker CLI instead" not in output
+
+    docker_project.configure(images=1, instructions=3, package=True, settings=["pip_cache = true"])
+    status, output = docker_project.run("--engine")
+    assert status == 0
+    assert "[image-0] Docker Engine API cannot build images using RUN mounts, using the docker CLI instead." in output
+    assert len(_builds(fake_docker)) == 1
+
+
+@pytest.mark.parametrize(
+    "base_image, builder_image",
+    [
+        ("python:3.11-slim", "python:3.11"),
+        ("python:3.11-slim-bookworm", "python:3.11-bookworm"),
+        ("docker.io/library/python:3.12.1-slim", "docker.io/library/python:3.12.1"),
+        ("python:3.11-alpine", "python:3.11-alpine"),
+        ("python:3.11", "python:3.11"),
+        ("ubuntu:24.04", "ubuntu:24.04"),
+    ],
+)
+def test_builder_image(base_image: str, builder_image: str) -> None:
+    assert _builder_image(base_image) == builder_image
@@ -0,0 +1,75 @@
+# Standard Library
+import os
+from pathlib import Path
+
+# Dependencies
+import pytest
+
+# Project
+from poetry_docker_plugin.context import GENERATED_PATHS, stage_context, write_ignore_file
+
+
+@pytest.fixture
+def dist(tmp_path: Path) -> Path:
+    dist = tmp_path / "dist"
+    (dist / "conf").mkdir(parents=True)
+    (dist / "app-1.0.0.tar.gz").write_text("sdist")
+    (dist / "app-0.9.0.tar.gz").write_text("old sdist")
+    (dist / "conf" / "app.conf").write_text("conf")
+    (dist / "Dockerfile").write_text("FROM python:3.11")
+    return dist
+
+
+def test_stage_context_with_files_and_directories(dist: Path) -> None:
+    context = dist / ".context" / "Dockerfile"
+
+    assert stage_context(["app-1.0.0.tar.gz", "/conf"], context.as_posix(), dist.as_posix())
+    assert sorted(path.relative_to(context).as_posix() for path in context.rglob("*") if path.is_file()) == [
+        "app-1.0.0.tar.gz",
+        "conf/app.conf",
+    ]
+    assert os.path.samefile(context / "app-1.0.0.tar.gz", dist / "app-1.0.0.tar.gz")
+
+
+def test_stage_context_is_refreshed(dist: Path) -> None:
+    context = dist / ".context" / "Dockerfile"
+
+    assert stage_context(["*.tar.gz"], context.as_posix(), dist.as_posix())
+    assert stage_context(["conf"], context.as_posix(), dist.as_posix())
+    assert [path.name for path in context.rglob("*") if path.is_file()] == ["app.conf"]
+
+
+def test_stage_context_with_hidden_files(dist: Path) -> None:
+    context = dist / ".context" / "Dockerfile"
+    (dist / ".env").write_text("env")
+    (dist / "conf" / ".secrets").write_text("secrets")
+    (dist / "logs").mkdir()
+    (dist / "logs" / "Dockerfile.log").write_text("log")
+    (dist / ".docker-manifest.json").write_text("{}")
+    (dist / "Dockerfile.tar.gz").write_text("archive")
+
+    assert stage_context(["*", "conf/.*"], context.as_posix(), dist.as_posix())
+    assert sorted(path.relative_to(context).as_posix() for path in context.rglob("*") if path.is_file()) == [
+        ".env",
+        "Dockerfile",
+        "app-0.9.0.tar.gz",
+        "app-1.0.0.tar.gz",
+        "conf/.secrets",
+        "conf/app.conf",
+    ]
+
+
+def test_write_ignore_file(dist: Path) -> None:
+    (dist / ".dockerignore").write_text("*.whl")
+
+    write_ignore_file(dist.as_posix())
+    write_ignore_file(dist.as_posix())
+    assert (dist / ".dockerignore").read_text().splitlines() == ["*.whl", *GENERATED_PATHS]
+
+
+@pytest.mark.parametrize("source", ["${CONF}", "missing.conf", "../pyproject.toml"])
+def test_stage_context_with_unresolved_sources(dist: Path, source: str) -> None:
+    context = dist / ".context" / "Dockerfile"
+
+    assert not stage_context(["app-1.0.0.tar.gz", source], context.as_posix(), dist.as_posix())
+    assert not context.exists()
@@ -1,6 +1,29 @@
+# Standard Library
+from pathlib import Path
+
+# Dependencies
+import pytest
+from cleo.io.buffered_io import BufferedIO
+
 # Project
-from poetry_docker_plugin import Arg, Cmd, Copy, EntryPoint, Env, Expose, From, Labels, Run, User, Volume, WorkDir
-from poetry_docker_plugin.docker_builder import BuildCommand, PushCommand
+from poetry_docker_plugin import (
+    Arg,
+    Cmd,
+    Copy,
+    DockerFile,
+    EntryPoint,
+    Env,
+    Expose,
+    From,
+    Labels,
+    Run,
+    User,
+    Volume,
+    WorkDir,
+)
+from poetry_docker_plugin import docker_builder
+from poetry_docker_plugin.docker_builder import BuildCache, BuildCommand, ImageBuild, Mount, PushCommand
+from poetry_docker_plugin.runner import CommandError
 
 
 def test_arg_with_no_default_value() -> None:
@@ -33,6 +56,30 @@ def test_from_with_base_image_and_platform() -> None:
     assert str(fromm) == "FROM --platform linux/amd64 python:3.8"
 
 
+def test_from_with_stage() -> None:
+    from_ = From(base_image="python:3.11", stage="builder")
+    assert str(from_) == "FROM python:3.11 AS builder"
+
+
+def test_copy_from_stage() -> None:
+    copy = Copy(source="/wheels", destination="/wheels", from_stage="builder")
+    assert str(copy) == "COPY --from=builder /wheels /wheels"
+
+
+def test_docker_file_sources_exclude_stages() -> None:
+    docker_file = DockerFile(
+        BufferedIO(),
+        [
+            From("python:3.11", stage="builder"),
+            Copy("foo-1.0.0.tar.gz", "/package/foo-1.0.0.tar.gz"),
+            From("python:3.11-slim"),
+            Copy("/wheels", "/wheels", from_stage="builder"),
+            Copy("foo.conf", "/package/foo.conf"),
+        ],
+    )
+    assert docker_file.sources() == ["foo-1.0.0.tar.gz", "foo.conf"]
+
+
 def test_copy_with_one_source_and_destination() -> None:
     copy = Copy(source="foo", destination="bar")
     assert str(copy) == "COPY foo bar"
@@ -73,6 +120,59 @@ def test_run_with_one_command() -> None:
     assert str(run) == "RUN echo 'Hello, World!'"
 
 
+def test_run_with_cache_mount() -> None:
+    run = Run(command="pip install foo", mounts=[Mount("cache", target="/root/.cache/pip", sharing="locked")])
+    assert str(run) == "RUN --mount=type=cache,target=/root/.cache/pip,sharing=locked pip install foo"
+
+
+def test_run_with_bind_and_secret_mounts() -> None:
+    run = Run(
+        command="pip install /wheels/*.whl",
+        mounts=[
+            Mount("bind", target="/wheels", source="/wheels", from_stage="builder"),
+            Mount("secret", mount_id="netrc", target="/root/.netrc"),
+        ],
+    )
+    assert str(run) == (
+        "RUN --mount=type=bind,from=builder,source=/wheels,target=/wheels "
+        "--mount=type=secret,id=netrc,target=/root/.netrc pip install /wheels/*.whl"
+    )
+
+
+def test_mount_validation() -> None:
+    with pytest.raises(RuntimeError, match="Unknown mount type"):
+        Mount("tmpfs", target="/tmp")
+    with pytest.raises(RuntimeError, match="A target is required"):
+        Mount("cache")
+    with pytest.raises(RuntimeError, match="Unknown sharing mode"):
+        Mount("cache", target="/root/.cache/pip", sharing="exclusive")
+
+
+def test_docker_file_syntax_header_with_mounts() -> None:
+    docker_file = DockerFile(BufferedIO(), [From("python:3.11"), Run("echo foo")])
+    assert docker_file.render().splitlines() == ["FROM python:3.11", "RUN echo foo"]
+
+    docker_file.add(Run("pip install foo", [Mount("cache", target="/root/.cache/pip")]))
+    assert docker_file.render().splitlines() == [
+        "# syntax=docker/dockerfile:1",
+        "FROM python:3.11",
+        "RUN echo foo",
+        "RUN --mount=type=cache,target=/root/.cache/pip pip install foo",
+    ]
+
+
+def test_docker_file_sources_include_bind_mounts() -> None:
+    docker_file = DockerFile(
+        BufferedIO(),
+        [
+            From("python:3.11"),
+            Run("pip install /wheels/*.whl", [Mount("bind", target="/wheels", source="/wheels", from_stage="builder")]),
+            Run("make", [Mount("bind", target="/src", source="src")]),
+        ],
+    )
+    assert docker_file.sources() == ["src"]
+
+
 def test_cmd_with_one_arg() -> None:
     cmd = Cmd(args=["echo"])
     assert str(cmd) == 'CMD ["echo"]'
@@ -93,6 +193,54 @@ def test_entrypoint_with_two_args() -> None:
     assert str(entrypoint) == 'ENTRYPOINT ["python", "app.py"]'
 
 
+def test_docker_file_declares_arguments_once() -> None:
+    docker_file = DockerFile(
+        BufferedIO(),
+        [
+            From("python:3.11"),
+            Copy("foo.conf", "/opt/${app}/foo.conf"),
+            Run("echo ${app}"),
+            Run("echo $app $HOME"),
+            Env("FOO", "${version}"),
+        ],
+    )
+    docker_file.declare_arguments({"app": "foo", "version": "1.0", "unused": "bar"})
+
+    assert docker_file.render().splitlines() == [
+        "FROM python:3.11",
+        "ARG app=foo",
+        "COPY foo.conf /opt/${app}/foo.conf",
+        "RUN echo ${app}",
+        "RUN echo $app $HOME",
+        "ARG version=1.0",
+        'ENV FOO="${version}"',
+    ]
+
+
+def test_docker_file_declares_arguments_per_stage() -> None:
+    docker_file = DockerFile(
+        BufferedIO(),
+        [
+            From("python:${python_version}"),
+            Run("echo ${python_version}"),
+            From("python:${python_version}-slim"),
+            Arg("python_version"),
+            Run("echo ${python_version}"),
+        ],
+    )
+    docker_file.declare_arguments({"python_version": "3.11"})
+
+    assert docker_file.render().splitlines() == [
+        "ARG python_version=3.11",
+        "FROM python:${python_version}",
+        "ARG python_version=3.11",
+        "RUN echo ${python_version}",
+        "FROM python:${python_version}-slim",
+        "ARG python_version",
+        "RUN echo ${python_version}",
+    ]
+
+
 def test_build_command_with_no_platform(dist_directory: str) -> None:
     build_cmd = BuildCommand(image_tags=["foo"], platform=[])
     assert build_cmd.command() == [
@@ -136,6 +284,21 @@ def test_build_with_no_platform_and_one_arg(dist_directory: str) -> None:
     ]
 
 
+def test_build_command_with_secrets(dist_directory: str) -> None:
+    build_cmd = BuildCommand(image_tags=["foo"], platform=[], secrets=["id=netrc,src=.netrc"])
+    assert build_cmd.command() == [
+        "docker",
+        "build",
+        "--no-cache",
+        "--secret=id=netrc,src=.netrc",
+        "--tag",
+        "foo",
+        "--file",
+        "dist/Dockerfile",
+        dist_directory,
+    ]
+
+
 def test_build_with_no_platform_and_two_args(dist_directory: str) -> None:
     build_cmd = BuildCommand(image_tags=["foo"], platform=[], arguments={"foo": "bar", "baz": "qux"})
     assert build_cmd.command() == [
@@ -199,3 +362,215 @@ def test_push_with_two_platforms(dist_directory: str) -> None:
         "dist/Dockerfile",
         dist_directory,
     ]
+
+
+def test_build_and_push_with_two_platforms(dist_directory: str) -> None:
+    build_cmd = BuildCommand(image_tags=["foo"], platform=["linux/amd64", "linux/arm64"], push=True)
+    assert build_cmd.command() == [
+        "docker",
+        "buildx",
+        "build",
+        "--push",
+        "--no-cache",
+        "--platform=linux/amd64,linux/arm64",
+        "--tag",
+        "foo",
+        "--file",
+        "dist/Dockerfile",
+        dist_directory,
+    ]
+
+
+def test_build_command_with_oci_export(dist_directory: str) -> None:
+    build_cmd = BuildCommand(image_tags=["foo"], platform=[], oci_path="dist/Dockerfile.oci.tar")
+    assert build_cmd.command()[:5] == [
+        "docker",
+        "buildx",
+        "build",
+        "--output=type=docker",
+        "--output=type=oci,dest=dist/Dockerfile.oci.tar",
+    ]
+
+    build_cmd = BuildCommand(
+        image_tags=["foo"], platform=["linux/amd64", "linux/arm64"], push=True, oci_path="dist/Dockerfile.oci.tar"
+    )
+    assert build_cmd.outputs() == ["type=registry", "type=oci,dest=dist/Dockerfile.oci.tar"]
+
+
+def test_build_command_with_no_cache(dist_directory: str) -> None:
+    build_cmd = BuildCommand(image_tags=["foo"], platform=[], cache=BuildCache("none"))
+    assert build_cmd.command() == [
+        "docker",
+        "build",
+        "--no-cache",
+        "--tag",
+        "foo",
+        "--file",
+        "dist/Dockerfile",
+        dist_directory,
+    ]
+
+
+def test_build_command_with_local_cache(dist_directory: str) -> None:
+    build_cmd = BuildCommand(image_tags=["foo"], platform=[], cache=BuildCache("local"))
+    assert build_cmd.command() == [
+        "docker",
+        "build",
+        "--tag",
+        "foo",
+        "--file",
+        "dist/Dockerfile",
+        dist_directory,
+    ]
+
+
+def test_build_command_with_local_cache_directories(dist_directory: str) -> None:
+    cache = BuildCache("local", cache_from=["/tmp/cache"], cache_to=["/tmp/cache"])
+    build_cmd = BuildCommand(image_tags=["foo"], platform=["linux/amd64"], cache=cache)
+    assert build_cmd.command() == [
+        "docker",
+        "buildx",
+        "build",
+        "--load",
+        "--cache-from=type=local,src=/tmp/cache",
+        "--cache-to=type=local,dest=/tmp/cache,mode=max",
+        "--platform=linux/amd64",
+        "--tag",
+        "foo",
+        "--file",
+        "dist/Dockerfile",
+        dist_directory,
+    ]
+
+
+def test_build_command_with_registry_cache(dist_directory: str) -> None:
+    cache = BuildCache("registry", cache_from=["org/foo:buildcache"], cache_to=["org/foo:buildcache"])
+    build_cmd = BuildCommand(image_tags=["foo"], platform=["linux/amd64", "linux/arm64"], cache=cache)
+    assert build_cmd.command() == [
+        "docker",
+        "buildx",
+        "build",
+        "--cache-from=type=registry,ref=org/foo:buildcache",
+        "--cache-to=type=registry,ref=org/foo:buildcache,mode=max",
+        "--platform=linux/amd64,linux/arm64",
+        "--tag",
+        "foo",
+        "--file",
+        "dist/Dockerfile",
+        dist_directory,
+    ]
+
+
+def test_build_command_with_explicit_cache_backend(dist_directory: str) -> None:
+    cache = BuildCache("registry", cache_from=["type=gha"], cache_to=["type=gha,mode=max"])
+    build_cmd = BuildCommand(image_tags=["foo"], platform=[], cache=cache)
+    assert build_cmd.command() == [
+        "docker",
+        "build",
+        "--cache-from=type=gha",
+        "--cache-to=type=gha,mode=max",
+        "--tag",
+        "foo",
+        "--file",
+        "dist/Dockerfile",
+        dist_directory,
+    ]
+
+
+def test_build_cache_with_unknown_mode() -> None:
+    with pytest.raises(RuntimeError):
+        BuildCache("remote")
+
+
+def test_docker_file_push_creates_remaining_tags_from_digest(monkeypatch: pytest.MonkeyPatch) -> None:
+    digest = "sha256:" + "a" * 64
+    created_digest = "sha256:" + "c" * 64
+    commands: list[list[str]] = []
+
+    def run_command(command: list[str], *args: object, **kwargs: object) -> list[str]:
+        commands.append(command)
+        if command[1] == "push":
+            return [f"latest: digest: {digest} size: 1234"]
+        return [f"#1 pushing {created_digest} to docker.io/library/{command[-2]}"]
+
+    monkeypatch.setattr(docker_builder, "run_command", run_command)
+
+    io = BufferedIO()
+    DockerFile(io, [From("python:3.11")]).push(
+        ["localhost:5000/foo:latest", "localhost:5000/foo:1.0.0", "bar:1.0.0"], []
+    )
+
+    assert commands[0] == ["docker", "push", "localhost:5000/foo:latest"]
+    assert sorted(commands[1:]) == [
+        ["docker", "buildx", "imagetools", "create", "--tag", tag, f"localhost:5000/foo@{digest}"]
+        for tag in ["bar:1.0.0", "localhost:5000/foo:1.0.0"]
+    ]
+    output = io.fetch_output()
+    assert f"Image tag 'localhost:5000/foo:latest' was successfully pushed ({digest})!" in output
+    assert f"Image tag 'bar:1.0.0' was successfully pushed ({created_digest})!" in output
+
+
+def test_docker_file_push_retries_transient_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    failures = [["received unexpected HTTP status: 503 Service Unavailable"], ["net/http: TLS handshake timeout"]]
+    commands: list[list[str]] = []
+
+    def run_command(command: list[str], *args: object, **kwargs: object) -> list[str]:
+        commands.append(command)
+        if failures:
+            raise CommandError(command, 1, failures.pop(0))
+        return []
+
+    monkeypatch.setattr(docker_builder, "run_command", run_command)
+    monkeypatch.setattr(docker_builder, "PUSH_BACKOFF", 0)
+
+    DockerFile(BufferedIO(), [From("python:3.11")]).push(["foo:latest"], [])
+    assert commands == [["docker", "push", "foo:latest"]] * 3
+
+
+def test_docker_file_push_does_not_retry_permanent_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    commands: list[list[str]] = []
+
+    def run_command(command: list[str], *args: object, **kwargs: object) -> list[str]:
+        commands.append(command)
+        raise CommandError(command, 1, ["denied: requested access to the resource is denied"])
+
+    monkeypatch.setattr(docker_builder, "run_command", run_command)
+    monkeypatch.setattr(docker_builder, "PUSH_BACKOFF", 0)
+
+    with pytest.raises(RuntimeError, match="Failed to push image tag 'foo:latest'"):
+        DockerFile(BufferedIO(), [From("python:3.11")]).push(["foo:latest", "foo:1.0.0"], [])
+    assert commands == [["docker", "push", "foo:latest"]]
+
+
+def test_docker_file_build_failure(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    def run_command(command: list[str], *args: object, **kwargs: object) -> list[str]:
+        raise CommandError(command, 1, ["ERROR: failed to solve"])
+
+    monkeypatch.setattr(docker_builder, "run_command", run_command)
+
+    image_build = ImageBuild(DockerFile(BufferedIO(), [From("python:3.11")], name="foo"), ["foo"], [])
+    with pytest.raises(RuntimeError, match="failed to solve"):
+        image_build.run()
+    assert (tmp_path / "dist" / "Dockerfile").read_text().strip() == "FROM python:3.11"
+
+
+def test_image_build_pushes_multiple_platforms_in_a_single_invocation(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    commands: list[list[str]] = []
+
+    def run_command(command: list[str], *args: object, **kwargs: object) -> list[str]:
+        commands.append(command)
+        return []
+
+    monkeypatch.setattr(docker_builder, "run_command", run_command)
+
+    docker_file = DockerFile(BufferedIO(), [From("python:3.11")], name="foo")
+    ImageBuild(docker_file, ["foo:latest", "foo:1.0.0"], ["linux/amd64", "linux/arm64"], push=True).run()
+
+    assert len(commands) == 1
+    assert commands[0][:4] == ["docker", "buildx", "build", "--push"]
+    assert commands[0].count("--tag") == 2
@@ -0,0 +1,211 @@
+# Standard Library
+import base64
+import io
+import json
+import tarfile
+from pathlib import Path
+
+# Dependencies
+import pytest
+from cleo.io.buffered_io import BufferedIO
+
+# Project
+from poetry_docker_plugin import docker_builder
+from poetry_docker_plugin.docker_builder import DockerFile, From, ImageBuild, Mount, Run
+from poetry_docker_plugin.engine import (
+    DockerEngine,
+    EngineError,
+    context_archive,
+    registry_auth,
+    registry_name,
+    split_reference,
+)
+from tests.conftest import EngineServer
+
+DIGEST = "sha256:" + "b" * 64
+
+
+@pytest.fixture
+def engine(server: EngineServer) -> DockerEngine:
+    return DockerEngine(server.server_address, timeout=5)  # type: ignore[arg-type]
+
+
+def _archive_names(body: bytes) -> list[str]:
+    with tarfile.open(fileobj=io.BytesIO(body)) as archive:
+        return archive.getnames()
+
+
+def test_split_reference() -> None:
+    assert split_reference("org/foo:1.0.0") == ("org/foo", "1.0.0")
+    assert split_reference("localhost:5000/foo") == ("localhost:5000/foo", "latest")
+    assert split_reference("localhost:5000/foo:1.0.0") == ("localhost:5000/foo", "1.0.0")
+
+
+def test_registry_name() -> None:
+    assert registry_name("org/foo") == "https://index.docker.io/v1/"
+    assert registry_name("foo") == "https://index.docker.io/v1/"
+    assert registry_name("localhost:5000/foo") == "localhost:5000"
+    assert registry_name("ghcr.io/org/foo") == "ghcr.io"
+
+
+def test_registry_auth(tmp_path: Path) -> None:
+    auth = base64.b64encode(b"user:secret").decode()
+    (tmp_path / "config.json").write_text(json.dumps({"auths": {"ghcr.io": {"auth": auth}}}))
+
+    assert registry_auth("ghcr.io/org/foo", tmp_path.as_posix()) == {
+        "username": "user",
+        "password": "secret",
+        "serveraddress": "ghcr.io",
+    }
+    assert registry_auth("org/foo", tmp_path.as_posix()) == dict()
+
+
+def test_context_archive(tmp_path: Path) -> None:
+    (tmp_path / "context" / ".context").mkdir(parents=True)
+    (tmp_path / "context" / ".context" / "staged.txt").write_text("staged")
+    (tmp_path / "context" / "foo-1.0.0.tar.gz").write_text("sdist")
+    (tmp_path / "context" / ".dockerignore").write_text(".context\n")
+    (tmp_path / "Dockerfile").write_text("FROM python:3.11\n")
+
+    chunks, dockerfile_name = context_archive((tmp_path / "context").as_posix(), (tmp_path / "Dockerfile").as_posix())
+
+    assert dockerfile_name == ".dockerfile.Dockerfile"
+    assert _archive_names(b"".join(chunks)) == [".dockerignore", "foo-1.0.0.tar.gz", ".dockerfile.Dockerfile"]
+
+
+def test_engine_ping(engine: DockerEngine, tmp_path: Path) -> None:
+    assert engine.ping()
+    assert not DockerEngine((tmp_path / "missing.sock").as_posix()).ping()
+
+
+def test_engine_build(engine: DockerEngine, server: EngineServer, tmp_path: Path) -> None:
+    (tmp_path / "dist").mkdir()
+    (tmp_path / "dist" / "Dockerfile").write_text("FROM python:3.11\n")
+    server.responses["/build"] = (
+        200,
+        [
+            {"stream": "Step 1/1 : FROM python:3.11\n"},
+            {"stream": " ---> 1234\n"},
+            {"aux": {"ID": "sha256:1234"}},
+            {"stream": "Successfully tagged foo:latest\n"},
+        ],
+    )
+
+    lines: list[str] = []
+    result = engine.build(
+        (tmp_path / "dist").as_posix(),
+        (tmp_path / "dist" / "Dockerfile").as_posix(),
+        ["foo:latest", "foo:1.0.0"],
+        {"python_version": "3.11"},
+        "linux/amd64",
+        no_cache=True,
+        on_output=lines.append,
+    )
+
+    assert result.image_id == "sha256:1234"
+    assert lines == ["Step 1/1 : FROM python:3.11", " ---> 1234", "Successfully tagged foo:latest"]
+
+    request = server.requests[0]
+    assert (request.method, request.path) == ("POST", "/build")
+    assert request.query["t"] == ["foo:latest", "foo:1.0.0"]
+    assert request.query["dockerfile"] == ["Dockerfile"]
+    assert request.query["platform"] == ["linux/amd64"]
+    assert request.query["nocache"] == ["1"]
+    assert json.loads(request.query["buildargs"][0]) == {"python_version": "3.11"}
+    assert request.headers["Content-Type"] == "application/x-tar"
+    assert _archive_names(request.body) == ["Dockerfile"]
+
+
+def test_engine_build_failure(engine: DockerEngine, server: EngineServer, tmp_path: Path) -> None:
+    (tmp_path / "Dockerfile").write_text("FROM python:3.11\n")
+    server.responses["/build"] = (
+        200,
+        [{"stream": "Step 1/1 : FROM python:3.11\n"}, {"errorDetail": {"message": "pull access denied"}, "error": "x"}],
+    )
+
+    with pytest.raises(EngineError, match="pull access denied"):
+        engine.build(tmp_path.as_posix(), (tmp_path / "Dockerfile").as_posix(), ["foo"])
+
+
+def test_engine_push(engine: DockerEngine, server: EngineServer) -> None:
+    server.responses["/images/localhost:5000/foo/push"] = (
+        200,
+        [
+            {"status": "The push refers to repository [localhost:5000/foo]"},
+            {"status": "Pushing", "progressDetail": {"current": 512, "total": 1024}, "id": "abcd"},
+            {"status": "Pushed", "progressDetail": {}, "id": "abcd"},
+            {"status": f"1.0.0: digest: {DIGEST} size: 1234"},
+            {"progressDetail": {}, "aux": {"Tag": "1.0.0", "Digest": DIGEST, "Size": 1234}},
+        ],
+    )
+
+    lines: list[str] = []
+    result = engine.push("localhost:5000/foo:1.0.0", lines.append)
+
+    assert (result.digest, result.size) == (DIGEST, 1234)
+    assert lines == [
+        "The push refers to repository [localhost:5000/foo]",
+        "abcd Pushed",
+        f"1.0.0: digest: {DIGEST} size: 1234",
+    ]
+    assert server.requests[0].query == {"tag": ["1.0.0"]}
+    assert "X-Registry-Auth" in server.requests[0].headers
+
+
+def test_engine_tag_and_api_errors(engine: DockerEngine, server: EngineServer) -> None:
+    engine.tag("foo:latest", "localhost:5000/foo:1.0.0")
+    assert server.requests[0].path == "/images/foo:latest/tag"
+    assert server.requests[0].query == {"repo": ["localhost:5000/foo"], "tag": ["1.0.0"]}
+
+    server.responses["/images/bar/tag"] = (404, [{"message": "No such image: bar:latest"}])
+    with pytest.raises(EngineError, match="No such image") as error:
+        engine.tag("bar", "foo:1.0.0")
+    assert error.value.status == 404
+
+
+def test_engine_image_exists(engine: DockerEngine, server: EngineServer) -> None:
+    assert engine.image_exists("foo:1.0.0")
+    assert server.requests[0].path == "/images/foo:1.0.0/json"
+
+    server.responses["/images/bar/json"] = (404, [{"message": "No such image: bar:latest"}])
+    assert not engine.image_exists("bar")
+
+
+def test_docker_file_builds_and_pushes_through_the_engine(
+    engine: DockerEngine, server: EngineServer, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(docker_builder, "run_command", pytest.fail)
+    server.responses["/build"] = (200, [{"aux": {"ID": "sha256:1234"}}])
+    server.responses["/images/foo/push"] = (200, [{"aux": {"Tag": "latest", "Digest": DIGEST, "Size": 1}}])
+
+    output = BufferedIO()
+    docker_file = DockerFile(output, [From("python:3.11")], name="foo", engine=engine)
+    ImageBuild(docker_file, ["foo:latest", "foo:1.0.0"], [], push=True).run()
+
+    assert [request.path for request in server.requests] == ["/build", "/images/foo/push", "/images/foo/push"]
+    assert f"Image tag 'foo:1.0.0' was successfully pushed ({DIGEST})!" in output.fetch_output()
+
+
+def test_docker_file_falls_back_to_the_cli_for_buildkit_features(
+    engine: DockerEngine, server: EngineServer, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    commands: list[list[str]] = []
+
+    def run_command(command: list[str], *args: object, **kwargs: object) -> list[str]:
+        commands.append(command)
+        return []
+
+    monkeypatch.setattr(docker_builder, "run_command", run_command)
+
+    output = BufferedIO()
+    instructions = [From("python:3.11"), Run("pip install foo", [Mount("cache", "/root/.cache/pip")])]
+    DockerFile(output, instructions, name="foo", engine=engine).build(["foo"], [])
+
+    assert commands[0][:2] == ["docker", "build"]
+    assert server.requests == []
+    assert (
+        "[foo] Docker Engine API cannot build images using RUN mounts, using the docker CLI instead."
+        in output.fetch_output()
+    )
@@ -0,0 +1,108 @@
+# Standard Library
+import gzip
+import hashlib
+import io
+import json
+import subprocess
+import tarfile
+from pathlib import Path
+
+# Dependencies
+import pytest
+
+# Project
+from poetry_docker_plugin import export
+from poetry_docker_plugin.export import ArchiveExport, compressor
+from poetry_docker_plugin.runner import CommandError
+from tests.conftest import FakeDocker
+
+
+def _members(archive: tarfile.TarFile) -> dict[str, bytes]:
+    members = dict()
+    for member in archive:
+        member_file = archive.extractfile(member)
+        assert member_file is not None
+        members[member.name] = member_file.read()
+    return members
+
+
+def test_compressed_chunks_concatenate() -> None:
+    compress = compressor("gzip")
+    assert gzip.decompress(compress(b"foo") + compress(b"bar")) == b"foobar"
+
+    with pytest.raises(RuntimeError, match="Unknown compression 'bzip2'"):
+        compressor("bzip2")
+
+
+def test_compressed_zstd_chunks_concatenate() -> None:
+    zstandard = pytest.importorskip("zstandard")
+    compress = compressor("zstd")
+    reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(compress(b"foo") + compress(b"bar")))
+    assert reader.read() == b"foobar"
+
+
+def test_export_image(fake_docker: FakeDocker, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(export, "CHUNK_SIZE", 64 << 10)
+    fake_docker.load("org/foo:1.0.0")
+    saved = subprocess.run(["docker", "save", "org/foo:1.0.0"], check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(saved)) as saved_archive:
+        expected = _members(saved_archive)
+
+    archive_export = ArchiveExport(jobs=4)
+    archive_path = archive_export.archive_path("Dockerfile")
+    result = archive_export.export("org/foo:1.0.0", archive_path)
+
+    assert archive_path == "dist/Dockerfile.tar.gz"
+    with tarfile.open(archive_path, "r:gz") as archive:
+        assert _members(archive) == expected
+    assert result.digest == f"sha256:{hashlib.sha256(Path(archive_path).read_bytes()).hexdigest()}"
+
+    manifest = json.loads(Path("dist/Dockerfile.layers.json").read_text())
+    assert manifest["image"] == "org/foo:1.0.0"
+    assert manifest["digest"] == result.digest
+    assert [layer["name"] for layer in manifest["layers"]] == [name for name in expected if name.startswith("blobs/")]
+    assert all(layer["digest"] == f"sha256:{layer['name'][13:]}" for layer in manifest["layers"])
+    assert result.reused == 0
+
+
+def test_export_reuses_compressed_layers(
+    fake_docker: FakeDocker, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    fake_docker.load("org/foo:1.0.0", "org/bar:1.0.0")
+    archive_export = ArchiveExport()
+    archive_export.export("org/foo:1.0.0", archive_export.archive_path("Dockerfile_foo"))
+    result = archive_export.export("org/bar:1.0.0", archive_export.archive_path("Dockerfile_bar", "linux/arm64"))
+
+    # the base layer is shared by both images
+    assert result.archive_path == "dist/Dockerfile_bar-linux-arm64.tar.gz"
+    assert [layer["reused"] for layer in result.layers] == [True, False, False]
+    with tarfile.open(result.archive_path, "r:gz") as archive:
+        assert "manifest.json" in _members(archive)
+
+
+def test_export_drains_stderr(fake_docker: FakeDocker, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    # more warnings than a pipe buffers
+    fake_docker.configure(noise=10_000)
+    fake_docker.load("org/foo:1.0.0")
+
+    result = ArchiveExport().export("org/foo:1.0.0", "dist/Dockerfile.tar.gz")
+    assert len(result.layers) == 3
+
+
+def test_export_failure(fake_docker: FakeDocker, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    fake_docker.configure(fail="save")
+
+    with pytest.raises(CommandError, match="'docker save' failed with exit code 1"):
+        ArchiveExport().export("org/foo:1.0.0", "dist/Dockerfile.tar.gz")
+    assert not Path("dist/Dockerfile.tar.gz.tmp").exists()
+
+
+def test_export_missing_image(fake_docker: FakeDocker, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.raises(CommandError, match="No such image: org/foo:1.0.0"):
+        ArchiveExport().export("org/foo:1.0.0", "dist/Dockerfile.tar.gz")
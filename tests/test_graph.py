@@ -0,0 +1,153 @@
+# Futures
+from __future__ import annotations
+
+# Standard Library
+import threading
+import time
+
+# Dependencies
+import pytest
+from cleo.io.buffered_io import BufferedIO
+
+# Project
+from poetry_docker_plugin.docker_builder import Arg, DockerFile, From, ImageBuild, Run
+from poetry_docker_plugin.graph import (
+    dependent_images,
+    image_dependencies,
+    normalize_reference,
+    run_graph,
+    topological_order,
+)
+
+
+def _image_build(base_image: str, *tags: str) -> ImageBuild:
+    return ImageBuild(DockerFile(BufferedIO(), [From(base_image)]), list(tags), [])
+
+
+def test_normalize_reference() -> None:
+    assert normalize_reference("python") == "python:latest"
+    assert normalize_reference("docker.io/library/python:3.11") == "python:3.11"
+    assert normalize_reference("localhost:5000/org/app") == "localhost:5000/org/app:latest"
+    assert normalize_reference("org/app@sha256:abc") == "org/app@sha256:abc"
+
+
+def test_image_dependencies() -> None:
+    image_builds: dict[str | None, ImageBuild] = {
+        "base": _image_build("python:3.11", "org/base:1.0.0", "org/base:latest"),
+        "worker": _image_build("docker.io/org/base:1.0.0", "org/worker:1.0.0"),
+        "api": _image_build("org/base", "org/api:1.0.0"),
+    }
+    assert image_dependencies(image_builds) == {
+        "base": {},
+        "worker": {"docker.io/org/base:1.0.0": "base"},
+        "api": {"org/base": "base"},
+    }
+
+
+def test_image_dependencies_resolve_arguments() -> None:
+    docker_file = DockerFile(BufferedIO(), [Arg("version", "1.0.0"), From("org/base:${version}"), Run("echo")])
+    image_builds: dict[str | None, ImageBuild] = {
+        "base": _image_build("python:3.11", "org/base:1.0.0", "org/base:2.0.0"),
+        "worker": ImageBuild(docker_file, ["org/worker"], []),
+    }
+    assert image_dependencies(image_builds)["worker"] == {"org/base:1.0.0": "base"}
+
+    image_builds["worker"].arguments = {"version": "2.0.0"}
+    assert image_dependencies(image_builds)["worker"] == {"org/base:2.0.0": "base"}
+
+
+def test_topological_order() -> None:
+    graph: dict[str | None, set[str | None]] = {
+        "api": {"worker"},
+        "worker": {"base"},
+        "base": set(),
+        "cli": set(),
+    }
+    assert topological_order(graph) == ["base", "cli", "worker", "api"]
+
+    graph["base"] = {"api"}
+    with pytest.raises(RuntimeError, match="based on each other"):
+        topological_order(graph)
+
+
+def test_dependent_images() -> None:
+    graph: dict[str | None, set[str | None]] = {"a": set(), "b": {"a"}, "c": {"b"}, "d": set()}
+    assert dependent_images(graph, {"b"}) == {"b", "c"}
+    assert dependent_images(graph, {"a", "d"}) == {"a", "b", "c", "d"}
+    assert dependent_images(graph, {"e"}) == set()
+
+
+def test_run_graph_builds_bases_first() -> None:
+    graph: dict[str | None, set[str | None]] = {"api": {"base"}, "worker": {"base"}, "base": set()}
+    started: list[str | None] = []
+    lock = threading.Lock()
+    running = threading.Barrier(2, timeout=5)
+
+    def run(name: str | None) -> None:
+        with lock:
+            started.append(name)
+        if name != "base":
+            # both dependent images run concurrently once their base is built
+            running.wait()
+
+    assert run_graph(graph, run, jobs=2) == {}
+    assert started[0] == "base"
+    assert set(started[1:]) == {"api", "worker"}
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_run_graph_skips_images_of_failed_bases(jobs: int) -> None:
+    graph: dict[str | None, set[str | None]] = {
+        "api": {"worker"},
+        "worker": {"base"},
+        "base": set(),
+        "cli": set(),
+    }
+    built: list[str | None] = []
+
+    def run(name: str | None) -> None:
+        time.sleep(0.01)
+        if name == "base":
+            raise RuntimeError("Failed to build image.")
+        built.append(name)
+
+    assert run_graph(graph, run, jobs) == {
+        "base": "Failed to build image.",
+        "worker": "Skipped, since base image 'base' failed to build.",
+        "api": "Skipped, since base image 'worker' failed to build.",
+    }
+    assert built == ["cli"]
+
+
+def test_run_graph_runs_a_single_job_in_the_calling_thread() -> None:
+    graph: dict[str | None, set[str | None]] = {"api": {"base"}, "base": set()}
+    threads: list[int] = []
+
+    assert run_graph(graph, lambda name: threads.append(threading.get_ident()), jobs=1) == {}
+    assert threads == [threading.get_ident()] * 2
+
+
+def test_run_graph_records_unexpected_errors() -> None:
+    graph: dict[str | None, set[str | None]] = {"api": {"base"}, "base": set(), "cli": set()}
+    built: list[str | None] = []
+
+    def run(name: str | None) -> None:
+        if name == "base":
+            raise OSError("No space left on device")
+        built.append(name)
+
+    assert run_graph(graph, run, jobs=2) == {
+        "base": "Unexpected error OSError: No space left on device",
+        "api": "Skipped, since base image 'base' failed to build.",
+    }
+    assert built == ["cli"]
+
+
+def test_image_digest_depends_on_bases() -> None:
+    base = _image_build("python:3.11", "org/base:1.0.0")
+    worker = _image_build("org/base:1.0.0", "org/worker:1.0.0")
+    worker.bases = [base]
+    digest = worker.digest()
+
+    base.docker_file.add(Run("echo foo"))
+    assert worker.digest() != digest
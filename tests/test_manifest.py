@@ -0,0 +1,93 @@
+# Standard Library
+from pathlib import Path
+
+# Dependencies
+import pytest
+from cleo.io.buffered_io import BufferedIO
+
+# Project
+from poetry_docker_plugin import Copy, DockerFile, From, docker_builder
+from poetry_docker_plugin.docker_builder import ImageBuild
+from poetry_docker_plugin.manifest import BuildManifest, image_digest
+
+
+@pytest.fixture
+def docker_commands(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> list[list[str]]:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dist").mkdir()
+    (tmp_path / "dist" / "app.conf").write_text("foo")
+
+    commands: list[list[str]] = []
+
+    def run_command(command: list[str], *args: object, **kwargs: object) -> list[str]:
+        commands.append(command)
+        return []
+
+    monkeypatch.setattr(docker_builder, "run_command", run_command)
+    monkeypatch.setattr(DockerFile, "image_exists", lambda self, image_tag: True)
+    return commands
+
+
+def _image_build(image_tags: list[str], manifest: BuildManifest) -> ImageBuild:
+    docker_file = DockerFile(BufferedIO(), [From("python:3.11"), Copy("app.conf", "/app.conf")])
+    return ImageBuild(docker_file, image_tags, [], manifest=manifest)
+
+
+def test_image_digest_covers_copy_sources(tmp_path: Path) -> None:
+    (tmp_path / "app.conf").write_text("foo")
+    digest = image_digest("FROM python:3.11", None, [], ["app.conf"], context=tmp_path.as_posix())
+
+    assert digest == image_digest("FROM python:3.11", {}, [], ["app.conf"], context=tmp_path.as_posix())
+    assert digest != image_digest("FROM python:3.11", {"foo": "bar"}, [], ["app.conf"], context=tmp_path.as_posix())
+    assert digest != image_digest("FROM python:3.11", None, ["linux/amd64"], ["app.conf"], context=tmp_path.as_posix())
+
+    (tmp_path / "app.conf").write_text("bar")
+    assert digest != image_digest("FROM python:3.11", None, [], ["app.conf"], context=tmp_path.as_posix())
+
+
+def test_build_manifest_is_persisted(tmp_path: Path) -> None:
+    path = (tmp_path / "manifest.json").as_posix()
+    BuildManifest(path).record("Dockerfile", "abc", ["org/foo:latest"], pushed=False)
+
+    assert BuildManifest(path).get("Dockerfile") == {"digest": "abc", "tags": ["org/foo:latest"], "pushed": False}
+    assert BuildManifest(path).get("Dockerfile_bar") is None
+
+
+def test_unchanged_image_is_not_rebuilt(docker_commands: list[list[str]]) -> None:
+    _image_build(["org/foo:latest"], BuildManifest()).run()
+    _image_build(["org/foo:latest"], BuildManifest()).run()
+
+    assert [command[:2] for command in docker_commands] == [["docker", "build"]]
+
+
+def test_changed_image_is_rebuilt(tmp_path: Path, docker_commands: list[list[str]]) -> None:
+    _image_build(["org/foo:latest"], BuildManifest()).run()
+    (tmp_path / "dist" / "app.conf").write_text("bar")
+    _image_build(["org/foo:latest"], BuildManifest()).run()
+
+    assert [command[:2] for command in docker_commands] == [["docker", "build"], ["docker", "build"]]
+
+
+def test_unchanged_image_is_tagged_and_pushed(docker_commands: list[list[str]]) -> None:
+    _image_build(["org/foo:latest"], BuildManifest()).run()
+    image_build = _image_build(["org/foo:latest", "org/foo:1.0.0"], BuildManifest())
+    image_build.push = True
+    image_build.run()
+
+    assert docker_commands[1:] == [
+        ["docker", "tag", "org/foo:latest", "org/foo:1.0.0"],
+        ["docker", "push", "org/foo:latest"],
+        ["docker", "buildx", "imagetools", "create", "--tag", "org/foo:1.0.0", "org/foo:latest"],
+    ]
+
+
+def test_unchanged_pushed_multi_platform_image_is_tagged_in_the_registry(docker_commands: list[list[str]]) -> None:
+    docker_file = DockerFile(BufferedIO(), [From("python:3.11"), Copy("app.conf", "/app.conf")])
+    platform = ["linux/amd64", "linux/arm64"]
+    ImageBuild(docker_file, ["org/foo:latest"], platform, push=True, manifest=BuildManifest()).run()
+    ImageBuild(docker_file, ["org/foo:latest", "org/foo:1.0.0"], platform, push=True, manifest=BuildManifest()).run()
+
+    assert docker_commands[0][:3] == ["docker", "buildx", "build"]
+    assert docker_commands[1:] == [
+        ["docker", "buildx", "imagetools", "create", "--tag", "org/foo:1.0.0", "org/foo:latest"]
+    ]
@@ -0,0 +1,105 @@
+# Standard Library
+import subprocess
+from pathlib import Path
+
+# Dependencies
+import pytest
+from cleo.io.buffered_io import BufferedIO
+
+# Project
+from poetry_docker_plugin.docker_builder import (
+    Arg,
+    Cmd,
+    Copy,
+    DockerFile,
+    Env,
+    From,
+    Instruction,
+    Labels,
+    Mount,
+    Run,
+    User,
+    WorkDir,
+)
+from poetry_docker_plugin.optimizer import optimize
+
+GOLDEN_DIRECTORY = Path(__file__).parent / "golden"
+
+CASES: dict[str, list[Instruction]] = {
+    "flow": [
+        From("python:3.11"),
+        Copy("foo-1.0.0.tar.gz", "/package/foo-1.0.0.tar.gz"),
+        Run("pip install /package/foo-1.0.0.tar.gz"),
+        WorkDir("/opt/foo"),
+        Run("apt-get update"),
+        Run("apt-get install -y curl"),
+        Run("rm -rf /var/lib/apt/lists/*"),
+        User("foo"),
+        Run("cd /opt/foo && make"),
+        Run("export FOO=bar"),
+        Run("echo ready"),
+        Cmd(["foo"]),
+    ],
+    "metadata": [
+        Arg("python_version", "3.11"),
+        From("python:${python_version}"),
+        Arg("python_version", "3.11"),
+        Labels({"org.opencontainers.image.title": "foo", "org.opencontainers.image.version": "1.0.0"}),
+        Labels({}),
+        Env("FOO", "foo"),
+        Env("BAR", "bar"),
+        Env("BAZ", "${FOO}/baz"),
+        Env("QUX", "qux"),
+        Arg("python_version"),
+        Run("echo ${python_version}"),
+        Arg("python_version", "3.12"),
+        Run("echo ${python_version}"),
+    ],
+    "mounts": [
+        From("python:3.11"),
+        Run("pip install foo", [Mount("cache", target="/root/.cache/pip")]),
+        Run("pip install bar", [Mount("cache", target="/root/.cache/pip")]),
+        Run("apt-get update"),
+        Run("apt-get install -y curl"),
+    ],
+    "unchainable": [
+        From("python:3.11"),
+        Run("echo one"),
+        Run("echo two # comment"),
+        Run("echo three"),
+        Run("sleep 10 &"),
+        Run("echo four"),
+        Run("echo five"),
+    ],
+}
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_optimizer_golden_files(case: str) -> None:
+    docker_file = DockerFile(BufferedIO(), list(CASES[case]))
+    docker_file.optimize()
+
+    assert docker_file.render() == (GOLDEN_DIRECTORY / f"{case}.Dockerfile").read_text()
+
+
+def test_optimizer_keeps_optimized_instructions() -> None:
+    instructions: list[Instruction] = [From("python:3.11"), Env("FOO", "foo"), Run("echo foo")]
+    assert [str(instruction) for instruction in optimize(instructions)] == [
+        str(instruction) for instruction in instructions
+    ]
+
+
+def test_optimizer_does_not_modify_input() -> None:
+    instructions: list[Instruction] = [Run("echo one"), Run("echo two")]
+    optimize(instructions)
+    assert [str(instruction) for instruction in instructions] == ["RUN echo one", "RUN echo two"]
+
+
+@pytest.mark.parametrize("command", ["apt-get update || true", "true; true", "echo ok | cat", "sleep 0 & wait"])
+def test_optimizer_keeps_failures_of_chained_commands(command: str) -> None:
+    optimized = optimize([Run("false"), Run(command), Run("echo ok")])
+    assert len(optimized) == 1
+
+    chained = optimized[0]
+    assert isinstance(chained, Run)
+    assert subprocess.run(["sh", "-c", chained.command], capture_output=True, check=False).returncode != 0
@@ -0,0 +1,107 @@
+# Standard Library
+import json
+from pathlib import Path
+
+# Dependencies
+import pytest
+
+# Project
+from poetry_docker_plugin.docker_builder import (
+    Arg,
+    BuildCache,
+    Cmd,
+    Copy,
+    EntryPoint,
+    Env,
+    Expose,
+    From,
+    Instruction,
+    Labels,
+    Mount,
+    Run,
+    User,
+    Volume,
+    WorkDir,
+)
+from poetry_docker_plugin.plan import BuildPlan, ImagePlan, decode_instruction, encode_instruction, plan_key
+
+INSTRUCTIONS: list[Instruction] = [
+    Arg("python_version", "3.11"),
+    From("python:${python_version}", stage="builder"),
+    Labels({"org.opencontainers.image.title": "foo"}, single_instruction=True),
+    Copy("foo-1.0.0-py3-none-any.whl", "/wheels/foo-1.0.0-py3-none-any.whl"),
+    Env.of({"FOO": "1", "BAR": "2"}),
+    Expose(8080),
+    Volume("/data"),
+    WorkDir("/app"),
+    User("app", "app"),
+    Run("pip install /wheels/*.whl", [Mount("bind", "/wheels", "/wheels", "builder"), Mount("cache", "/root/.cache")]),
+    Cmd(["python", "-m", "foo"]),
+    EntryPoint(["tini", "--"]),
+]
+
+
+def _image_plan() -> ImagePlan:
+    return ImagePlan(
+        "foo",
+        "Dockerfile_foo",
+        ["org/foo:1.0.0"],
+        ["linux/amd64"],
+        {"python_version": "3.12"},
+        INSTRUCTIONS,
+        ["foo-1.0.0-py3-none-any.whl"],
+        BuildCache("registry", ["org/foo:buildcache"], ["org/foo:buildcache"]),
+        push=True,
+    )
+
+
+@pytest.mark.parametrize("instruction", INSTRUCTIONS, ids=lambda instruction: type(instruction).__name__)
+def test_instruction_round_trip(instruction: Instruction) -> None:
+    data = json.loads(json.dumps(encode_instruction(instruction)))
+    assert str(decode_instruction(data)) == str(instruction)
+
+
+def test_instructions_have_no_dict() -> None:
+    assert not any(hasattr(instruction, "__dict__") for instruction in INSTRUCTIONS)
+
+
+def test_image_plan_is_immutable() -> None:
+    image_plan = _image_plan()
+    with pytest.raises(AttributeError):
+        image_plan.push = False
+    assert image_plan.image_tags == ("org/foo:1.0.0",)
+
+
+def test_build_plan_round_trip(tmp_path: Path) -> None:
+    path = (tmp_path / "plan.json").as_posix()
+    BuildPlan("key", "foo", "1.0.0", True, [_image_plan()]).write(path)
+
+    plan = BuildPlan.load("key", path)
+    assert plan is not None
+    assert plan.to_dict() == BuildPlan("key", "foo", "1.0.0", True, [_image_plan()]).to_dict()
+    assert [str(instruction) for instruction in plan.images[0].instructions] == [str(i) for i in INSTRUCTIONS]
+    assert plan.images[0].cache().arguments() == _image_plan().cache().arguments()
+
+    assert BuildPlan.load("other", path) is None
+    assert BuildPlan.load("key", (tmp_path / "missing.json").as_posix()) is None
+
+
+def test_build_plan_is_complete(tmp_path: Path) -> None:
+    plan = BuildPlan("key", "foo", "1.0.0", True, [_image_plan()])
+    assert not plan.is_complete(tmp_path.as_posix())
+
+    (tmp_path / "foo-1.0.0-py3-none-any.whl").write_text("wheel")
+    assert plan.is_complete(tmp_path.as_posix())
+
+
+def test_plan_key(tmp_path: Path) -> None:
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text('[tool.docker]\nfrom = "python:3.11"\n')
+    paths = [pyproject.as_posix(), (tmp_path / "poetry.lock").as_posix()]
+
+    key = plan_key(paths, {"push": False})
+    assert key == plan_key(paths, {"push": False})
+    assert key != plan_key(paths, {"push": True})
+
+    pyproject.write_text('[tool.docker]\nfrom = "python:3.12"\n')
+    assert key != plan_key(paths, {"push": False})
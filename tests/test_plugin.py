@@ -0,0 +1,74 @@
+# Standard Library
+import json
+import subprocess
+import sys
+
+# Project
+from poetry_docker_plugin.plugin import DockerPlugin
+
+# simulates poetry activating the plugin, after poetry itself has been loaded
+ACTIVATION = """
+import json, sys
+import poetry.plugins.application_plugin
+
+class CommandLoader:
+    def register_factory(self, name, factory):
+        self.factories = {name: factory}
+
+class Application:
+    command_loader = CommandLoader()
+
+from poetry_docker_plugin.plugin import DockerPlugin
+DockerPlugin().activate(Application())
+print(json.dumps(sorted(sys.modules)))
+"""
+
+# import time budget of the plugin modules, relative to the import time of the modules poetry loads before them
+IMPORT_TIME_RATIO = 0.25
+
+
+def _activate() -> tuple[set[str], dict[str, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", ACTIVATION], capture_output=True, text=True, check=True
+    )
+
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_time, _, module = line[len("import time:") :].split("|")
+            if self_time.strip().isdigit():
+                import_times[module.strip()] = int(self_time)
+
+    return set(json.loads(result.stdout)), import_times
+
+
+def test_plugin_registers_command_factory() -> None:
+    class CommandLoader:
+        factories: dict = {}
+
+        def register_factory(self, name: str, factory: object) -> None:
+            self.factories[name] = factory
+
+    class Application:
+        command_loader = CommandLoader()
+
+    DockerPlugin().activate(Application())  # type: ignore[arg-type]
+    assert Application.command_loader.factories["docker"]().name == "docker"
+
+
+def test_plugin_activation_defers_imports() -> None:
+    modules, _ = _activate()
+
+    assert "git" not in modules
+    assert {"poetry_docker_plugin", "poetry_docker_plugin.plugin"} == {
+        module for module in modules if module.startswith("poetry_docker_plugin")
+    }
+
+
+def test_plugin_activation_import_time() -> None:
+    _, import_times = _activate()
+
+    # compared to a baseline measured in the same process, so that the budget holds on slower machines
+    plugin_time = sum(time for module, time in import_times.items() if module.startswith("poetry_docker_plugin"))
+    baseline_time = sum(import_times.values()) - plugin_time
+    assert plugin_time < baseline_time * IMPORT_TIME_RATIO
@@ -0,0 +1,204 @@
+# Standard Library
+from pathlib import Path
+
+# Dependencies
+import pytest
+
+# Project
+from poetry_docker_plugin.requirements import LOCK_HASH_HEADER, export_requirements, lock_hash
+
+LOCK_WITH_GROUPS = """
+[[package]]
+name = "Flask"
+version = "3.0.0"
+optional = false
+python-versions = ">=3.8"
+groups = ["main"]
+files = [
+    {file = "flask-3.0.0-py3-none-any.whl", hash = "sha256:aaa"},
+    {file = "flask-3.0.0.tar.gz", hash = "sha256:bbb"},
+]
+
+[[package]]
+name = "colorama"
+version = "0.4.6"
+optional = false
+python-versions = ">=3.7"
+groups = ["main", "dev"]
+markers = {main = "platform_system == \\"Windows\\"", dev = "sys_platform == \\"win32\\""}
+files = [
+    {file = "colorama-0.4.6-py2.py3-none-any.whl", hash = "sha256:ccc"},
+]
+
+[[package]]
+name = "pytest"
+version = "8.0.0"
+optional = false
+python-versions = ">=3.8"
+groups = ["dev"]
+files = [
+    {file = "pytest-8.0.0-py3-none-any.whl", hash = "sha256:ddd"},
+]
+
+[metadata]
+lock-version = "2.1"
+"""
+
+LOCK_WITHOUT_GROUPS = """
+[[package]]
+name = "flask"
+version = "3.0.0"
+optional = false
+python-versions = ">=3.8"
+files = [
+    {file = "flask-3.0.0-py3-none-any.whl", hash = "sha256:aaa"},
+]
+
+[package.dependencies]
+Werkzeug = ">=3.0.0"
+
+[[package]]
+name = "werkzeug"
+version = "3.0.1"
+optional = false
+python-versions = ">=3.8"
+files = [
+    {file = "werkzeug-3.0.1-py3-none-any.whl", hash = "sha256:eee"},
+]
+
+[[package]]
+name = "pytest"
+version = "8.0.0"
+optional = false
+python-versions = ">=3.8"
+files = [
+    {file = "pytest-8.0.0-py3-none-any.whl", hash = "sha256:ddd"},
+]
+
+[metadata]
+lock-version = "2.0"
+"""
+
+LOCK_WITH_EDGE_MARKERS = """
+[[package]]
+name = "app-tools"
+version = "1.0.0"
+optional = false
+python-versions = ">=3.8"
+files = []
+
+[package.dependencies]
+pywin32 = {version = ">=306", markers = "sys_platform == \\"win32\\""}
+colorama = [
+    {version = ">=0.4", markers = "platform_system == \\"Windows\\""},
+    {version = ">=0.3", markers = "python_version < \\"3.9\\""},
+]
+certifi = "*"
+
+[[package]]
+name = "pywin32"
+version = "306"
+optional = false
+python-versions = "*"
+files = []
+
+[[package]]
+name = "colorama"
+version = "0.4.6"
+optional = false
+python-versions = ">=3.7"
+files = []
+
+[[package]]
+name = "certifi"
+version = "2024.2.2"
+optional = false
+python-versions = ">=3.6"
+files = []
+
+[metadata]
+lock-version = "2.0"
+"""
+
+
+def _write_lock(tmp_path: Path, content: str) -> str:
+    lock_path = tmp_path / "poetry.lock"
+    lock_path.write_text(content)
+    return lock_path.as_posix()
+
+
+def test_export_requirements_using_lock_groups(tmp_path: Path) -> None:
+    lock_path = _write_lock(tmp_path, LOCK_WITH_GROUPS)
+    requirements_path = tmp_path / "dist" / "requirements.txt"
+
+    assert export_requirements(lock_path, requirements_path.as_posix(), ["flask"])
+    assert requirements_path.read_text().splitlines() == [
+        f"{LOCK_HASH_HEADER} {lock_hash(lock_path)}",
+        'colorama==0.4.6 ; platform_system == "Windows" \\',
+        "    --hash=sha256:ccc",
+        "Flask==3.0.0 \\",
+        "    --hash=sha256:aaa \\",
+        "    --hash=sha256:bbb",
+    ]
+
+
+def test_export_requirements_walking_dependencies(tmp_path: Path) -> None:
+    lock_path = _write_lock(tmp_path, LOCK_WITHOUT_GROUPS)
+    requirements_path = tmp_path / "requirements.txt"
+
+    assert export_requirements(lock_path, requirements_path.as_posix(), ["Flask"])
+    assert requirements_path.read_text().splitlines()[1:] == [
+        "flask==3.0.0 \\",
+        "    --hash=sha256:aaa",
+        "werkzeug==3.0.1 \\",
+        "    --hash=sha256:eee",
+    ]
+
+
+def test_export_requirements_walking_dependencies_with_markers(tmp_path: Path) -> None:
+    lock_path = _write_lock(tmp_path, LOCK_WITH_EDGE_MARKERS)
+    requirements_path = tmp_path / "requirements.txt"
+
+    assert export_requirements(lock_path, requirements_path.as_posix(), {"app-tools": 'python_version >= "3.8"'})
+    assert requirements_path.read_text().splitlines()[1:] == [
+        'app-tools==1.0.0 ; python_version >= "3.8"',
+        'certifi==2024.2.2 ; python_version >= "3.8"',
+        (
+            'colorama==0.4.6 ; (platform_system == "Windows" and python_version >= "3.8") or '
+            '(python_version < "3.9" and python_version >= "3.8")'
+        ),
+        'pywin32==306 ; python_version >= "3.8" and sys_platform == "win32"',
+    ]
+
+    # certifi is also a direct, unconditional dependency
+    requirements_path.unlink()
+    assert export_requirements(lock_path, requirements_path.as_posix(), {"app-tools": "", "certifi": ""})
+    assert requirements_path.read_text().splitlines()[1:] == [
+        "app-tools==1.0.0",
+        "certifi==2024.2.2",
+        'colorama==0.4.6 ; platform_system == "Windows" or python_version < "3.9"',
+        'pywin32==306 ; sys_platform == "win32"',
+    ]
+
+
+def test_export_requirements_only_when_lock_changes(tmp_path: Path) -> None:
+    lock_path = _write_lock(tmp_path, LOCK_WITH_GROUPS)
+    requirements_path = (tmp_path / "requirements.txt").as_posix()
+
+    assert export_requirements(lock_path, requirements_path, ["flask"])
+    assert not export_requirements(lock_path, requirements_path, ["flask"])
+
+    _write_lock(tmp_path, LOCK_WITHOUT_GROUPS)
+    assert export_requirements(lock_path, requirements_path, ["flask"])
+
+
+def test_export_requirements_with_local_package(tmp_path: Path) -> None:
+    lock_path = _write_lock(
+        tmp_path,
+        LOCK_WITH_GROUPS.replace(
+            'groups = ["dev"]', 'groups = ["main"]\nsource = {type = "directory", url = "../pytest"}'
+        ),
+    )
+
+    with pytest.raises(RuntimeError):
+        export_requirements(lock_path, (tmp_path / "requirements.txt").as_posix(), ["flask"])
@@ -0,0 +1,50 @@
+# Standard Library
+import sys
+from pathlib import Path
+
+# Dependencies
+import pytest
+from cleo.io.buffered_io import BufferedIO
+
+# Project
+from poetry_docker_plugin.runner import CommandError, run_command
+
+
+def _python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+def test_run_command_forwards_output() -> None:
+    io = BufferedIO()
+    tail = run_command(_python("print('step 1'); print('<step 2>')"), io, prefix="[foo] ")
+
+    assert tail == ["step 1", "<step 2>"]
+    assert io.fetch_output() == "[foo] step 1\n[foo] <step 2>\n"
+
+
+def test_run_command_keeps_only_the_tail() -> None:
+    tail = run_command(_python("for i in range(1000): print(i)"), BufferedIO(), tail=3)
+    assert tail == ["997", "998", "999"]
+
+
+def test_run_command_merges_error_output() -> None:
+    io = BufferedIO()
+    run_command(_python("import sys; sys.stderr.write('progress\\n')"), io)
+    assert io.fetch_output() == "progress\n"
+
+
+def test_run_command_failure() -> None:
+    with pytest.raises(CommandError) as error:
+        run_command(_python("print('building'); print('failed to solve'); exit(3)"), BufferedIO(), tail=1)
+
+    assert error.value.return_code == 3
+    assert error.value.tail == ["failed to solve"]
+    assert "failed to solve" in str(error.value)
+
+
+def test_run_command_with_log_file(tmp_path: Path) -> None:
+    log_path = tmp_path / "logs" / "Dockerfile.log"
+    run_command(_python("print('first')"), BufferedIO(), log_path=log_path.as_posix())
+    run_command(_python("print('second')"), BufferedIO(), log_path=log_path.as_posix())
+
+    assert log_path.read_text() == "first\nsecond\n"
@@ -0,0 +1,68 @@
+# Standard Library
+import time
+
+# Dependencies
+import pytest
+
+# Project
+from poetry_docker_plugin.templates import Template, TemplateEngine, UndeclaredVariableError
+
+
+def test_template_render() -> None:
+    template = Template("org/@(name):@(version)-@(sha)")
+
+    assert template.variables == ["name", "version", "sha"]
+    assert template.render({"name": "foo", "version": "1.0", "sha": "abc1234"}) == ("org/foo:1.0-abc1234", [])
+    assert Template("python:3.9").render({}) == ("python:3.9", [])
+
+
+def test_template_render_single_pass() -> None:
+    # substituted values are never rendered again
+    assert Template("@(a)-@(b)").render({"a": "@(b)", "b": "x"}) == ("@(b)-x", [])
+
+
+def test_template_keeps_undeclared_variables() -> None:
+    assert Template("org/@(context)/@(name)").render({"name": "foo"}) == ("org/@(context)/foo", ["context"])
+
+
+def test_engine_caches_templates() -> None:
+    engine = TemplateEngine({"name": "foo"})
+
+    assert engine.compile("org/@(name)") is engine.compile("org/@(name)")
+    assert engine.render("org/@(name)") == "org/foo"
+
+
+def test_engine_reports_undeclared_variables() -> None:
+    engine = TemplateEngine({"name": "foo"})
+    engine.render("org/@(context)/@(name)", "tags[0]")
+    engine.render("/opt/@(home)", "copy[1].target")
+
+    with pytest.raises(UndeclaredVariableError) as e:
+        engine.check()
+    assert e.value.undeclared == [("context", "tags[0]"), ("home", "copy[1].target")]
+    assert str(e.value) == "No value found for variables: '@(context)' in tags[0], '@(home)' in copy[1].target."
+
+    # undeclared variables are reset after each check
+    engine.check()
+
+
+def test_engine_performance() -> None:
+    variables = {f"var_{i}": f"value_{i}" for i in range(500)}
+    texts = [f"RUN echo @(var_{i % 500}) @(var_{(i * 7) % 500}) /opt/@(var_{(i * 13) % 500})" for i in range(2000)]
+
+    def replace(text: str) -> str:
+        for var, val in variables.items():
+            text = text.replace(f"@({var})", val)
+        return text
+
+    start = time.perf_counter()
+    expected = [replace(text) for text in texts]
+    replace_time = time.perf_counter() - start
+
+    engine = TemplateEngine(variables)
+    start = time.perf_counter()
+    rendered = [engine.render(text) for text in texts]
+    engine_time = time.perf_counter() - start
+
+    assert rendered == expected
+    assert engine_time < replace_time
@@ -0,0 +1,39 @@
+# Standard Library
+import json
+import time
+from pathlib import Path
+
+# Dependencies
+import pytest
+
+# Project
+from poetry_docker_plugin.timing import Timings
+
+
+def test_timings_record_phases() -> None:
+    timings = Timings()
+    with timings.phase("build", "foo"):
+        time.sleep(0.01)
+    timings.record("git", 0.5)
+
+    records = timings.records()
+    assert [(record["phase"], record["image"]) for record in records] == [("build", "foo"), ("git", None)]
+    assert records[0]["seconds"] >= 0.01
+    assert timings.report()[1] == f"{'git':<40} {0.5:>9.3f}s"
+
+
+def test_timings_record_failed_phases() -> None:
+    timings = Timings()
+    with pytest.raises(RuntimeError), timings.phase("push", "foo"):
+        raise RuntimeError("Failed to push image.")
+
+    assert [record["phase"] for record in timings.records()] == ["push"]
+
+
+def test_timings_json_report(tmp_path: Path) -> None:
+    timings = Timings()
+    timings.record("package", 1.25)
+    timings.write((tmp_path / "dist" / "timings.json").as_posix())
+
+    report = json.loads((tmp_path / "dist" / "timings.json").read_text())
+    assert report["phases"] == [{"phase": "package", "image": None, "seconds": 1.25}]
@@ -0,0 +1,106 @@
+# Standard Library
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+# Dependencies
+import git
+import pytest
+
+# Project
+from poetry_docker_plugin.vcs import GitRepository, UnsupportedRepositoryError, commit_sha, is_dirty
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(path: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@test.com", *args],
+        cwd=path,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repository(tmp_path: Path) -> Path:
+    path = tmp_path / "project"
+    (path / "app").mkdir(parents=True)
+    _git(path, "init", "-q")
+    (path / "app" / "__init__.py").write_text("VERSION = 1\n")
+    (path / "README.md").write_text("readme\n")
+    _git(path, "add", ".")
+    _git(path, "commit", "-q", "-m", "init")
+    return path
+
+
+def test_commit_sha_outside_repository(tmp_path: Path) -> None:
+    if GitRepository.find(tmp_path.as_posix()) is not None:
+        pytest.skip("temporary directory is inside a git repository")
+
+    assert commit_sha(tmp_path.as_posix()) is None
+    assert not is_dirty(tmp_path.as_posix())
+
+
+def test_commit_sha_without_commits(tmp_path: Path) -> None:
+    _git(tmp_path, "init", "-q")
+    assert commit_sha(tmp_path.as_posix()) is None
+
+
+def test_commit_sha_from_loose_ref(repository: Path) -> None:
+    assert commit_sha((repository / "app").as_posix()) == _git(repository, "rev-parse", "HEAD")
+
+
+def test_commit_sha_from_packed_refs(repository: Path) -> None:
+    _git(repository, "pack-refs", "--all")
+    assert not (repository / ".git" / "refs" / "heads" / "master").exists()
+    assert not (repository / ".git" / "refs" / "heads" / "main").exists()
+    assert commit_sha(repository.as_posix()) == _git(repository, "rev-parse", "HEAD")
+
+
+def test_commit_sha_with_detached_head(repository: Path) -> None:
+    first = _git(repository, "rev-parse", "HEAD")
+    _git(repository, "commit", "-q", "--allow-empty", "-m", "second")
+    _git(repository, "checkout", "-q", first)
+    assert commit_sha(repository.as_posix()) == first
+
+
+def test_commit_sha_in_worktree(repository: Path, tmp_path: Path) -> None:
+    _git(repository, "worktree", "add", "-q", "-b", "feature", (tmp_path / "feature").as_posix())
+    _git(tmp_path / "feature", "commit", "-q", "--allow-empty", "-m", "feature")
+
+    assert (tmp_path / "feature" / ".git").is_file()
+    assert commit_sha((tmp_path / "feature").as_posix()) == _git(tmp_path / "feature", "rev-parse", "HEAD")
+    assert commit_sha(repository.as_posix()) == _git(repository, "rev-parse", "HEAD")
+
+
+def test_is_dirty(repository: Path) -> None:
+    assert not is_dirty(repository.as_posix())
+
+    # touching a file does not change its content
+    os.utime(repository / "README.md", (time.time() + 10, time.time() + 10))
+    assert not is_dirty(repository.as_posix())
+
+    (repository / "app" / "__init__.py").write_text("VERSION = 2\n")
+    assert is_dirty(repository.as_posix())
+
+    _git(repository, "checkout", "--", ".")
+    assert not is_dirty(repository.as_posix())
+
+    (repository / "README.md").unlink()
+    assert is_dirty(repository.as_posix())
+
+
+def test_is_dirty_of_unreadable_repository(repository: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def unsupported(self: GitRepository) -> bool:
+        raise UnsupportedRepositoryError("Index version 4 cannot be read directly.")
+
+    def invalid(*args: object, **kwargs: object) -> None:
+        raise git.InvalidGitRepositoryError(repository.as_posix())
+
+    monkeypatch.setattr(GitRepository, "is_dirty", unsupported)
+    monkeypatch.setattr(git, "Repo", invalid)
+    assert not is_dirty(repository.as_posix())
@@ -0,0 +1,47 @@
+# Standard Library
+import threading
+from pathlib import Path
+
+# Project
+from poetry_docker_plugin.watch import PollingWatcher, changed_paths, snapshot
+
+
+def test_snapshot_and_changed_paths(tmp_path: Path) -> None:
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    paths = [(tmp_path / name).as_posix() for name in ("a.txt", "b.txt", "c.txt")]
+    before = snapshot(paths)
+    assert set(before) == set(paths[:2])
+
+    (tmp_path / "a.txt").write_text("changed")
+    (tmp_path / "b.txt").unlink()
+    (tmp_path / "c.txt").write_text("c")
+    assert changed_paths(before, snapshot(paths)) == set(paths)
+    assert changed_paths(before, before) == set()
+
+
+def test_watcher_debounces_changes(tmp_path: Path) -> None:
+    paths = [(tmp_path / f"{i}.txt").as_posix() for i in range(3)]
+    watcher = PollingWatcher(interval=0.01, debounce=0.2)
+    watcher.watch(paths)
+
+    def save() -> None:
+        for path in paths:
+            Path(path).write_text(path)
+            threading.Event().wait(0.05)
+
+    editor = threading.Thread(target=save)
+    editor.start()
+    changes = watcher.wait()
+    editor.join()
+
+    assert changes == set(paths)
+
+
+def test_watcher_stops() -> None:
+    stop = threading.Event()
+    watcher = PollingWatcher(interval=0.01, stop=stop)
+    watcher.watch([])
+    threading.Timer(0.05, stop.set).start()
+
+    assert watcher.wait() == set()